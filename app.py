@@ -4,8 +4,10 @@ from backend.auth import (
     president_login,
     member_login,
     create_shg,
-    get_shg_id
+    admin_login
 )
+from backend.db import warm_up_pool
+from backend.sms import start_dispatcher
 
 # 1. PAGE CONFIG
 
@@ -16,6 +18,16 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# 1b. BACKEND WARM-UP (once per server process)
+
+@st.cache_resource
+def init_backend():
+    warm_up_pool()
+    start_dispatcher()  # delivers any SMS still queued from before a restart
+    return True
+
+init_backend()
+
 # 2. SESSION STATE INITIALIZATION (CRITICAL FIX)
 
 # This prevents the "AttributeError" crash
@@ -27,6 +39,10 @@ if "role" not in st.session_state:
     st.session_state.role = None
 if "shg_no" not in st.session_state:
     st.session_state.shg_no = None
+if "shg_name" not in st.session_state:
+    st.session_state.shg_name = None
+if "village" not in st.session_state:
+    st.session_state.village = None
 if "member_id" not in st.session_state:
     st.session_state.member_id = None
 
@@ -114,6 +130,7 @@ LANG = {
         "role": "प्रवेश प्रकार निवडा",
         "president": "अध्यक्ष (President)",
         "member": "सभासद (Member)",
+        "admin": "प्रशासक (Admin)",
         "login": "लॉगिन करा",
         "register": "नवीन बचत गट नोंदणी",
         "username": "युजरनेम",
@@ -133,6 +150,7 @@ LANG = {
         "role": "Select Login Type",
         "president": "President",
         "member": "Member",
+        "admin": "Admin",
         "login": "Login Now",
         "register": "Register New Group",
         "username": "Username",
@@ -165,7 +183,7 @@ if not st.session_state.logged_in:
     # Custom segmented control
     role_type = st.segmented_control(
         t["role"],
-        [t["president"], t["member"]],
+        [t["president"], t["member"], t["admin"]],
         default=t["president"],
         label_visibility="collapsed"
     )
@@ -180,11 +198,9 @@ if not st.session_state.logged_in:
 
             # BLUE LOGIN BUTTON
             if st.button(t["login"]):
-                if president_login(shg_no, username, password):
-                    st.session_state.logged_in = True
-                    st.session_state.role = "president"
-                    st.session_state.shg_no = shg_no
-                    st.session_state.shg_id = get_shg_id(shg_no)
+                session = president_login(shg_no, username, password)
+                if session:
+                    st.session_state.update(session)
                     st.toast(t["success"], icon="✅")
                     time.sleep(0.5)
                     st.switch_page("pages/dashboard.py")
@@ -209,6 +225,21 @@ if not st.session_state.logged_in:
                     else:
                         st.error("SHG Number already exists.")
 
+        elif role_type == t["admin"]:
+            # ADMIN (ALL SHGs)
+            a_user = st.text_input(f"👤 {t['username']}", key="a_user")
+            a_pass = st.text_input(f"🔑 {t['password']}", type="password", key="a_pass")
+
+            if st.button(t["login"], key="admin_btn"):
+                if admin_login(a_user, a_pass):
+                    st.session_state.logged_in = True
+                    st.session_state.role = "admin"
+                    st.toast(t["success"], icon="✅")
+                    time.sleep(0.5)
+                    st.switch_page("pages/admin.py")
+                else:
+                    st.error(t["invalid"])
+
         else:
             # MEMBER VIEW
             m_shg = st.text_input(f"🆔 {t['shg']}", key="m_shg_input")
@@ -221,17 +252,15 @@ if not st.session_state.logged_in:
             mobile = st.text_input(f"📱 {t['mobile']}")
 
             if st.button(t["login"]):
-                member_id = member_login(m_shg, fname, lname, mobile)
-                if member_id:
-                    st.session_state.logged_in = True
-                    st.session_state.role = "member"
-                    st.session_state.shg_no = m_shg
-                    st.session_state.shg_id = get_shg_id(m_shg)
-                    st.session_state.member_id = member_id
+                session = member_login(m_shg, fname, lname, mobile)
+                if session:
+                    st.session_state.update(session)
                     st.toast(t["success"], icon="✅")
                     time.sleep(0.5)
                     st.switch_page("pages/dashboard.py")
                 else:
                     st.error(t["invalid"])
+elif st.session_state.role == "admin":
+    st.switch_page("pages/admin.py")
 else:
     st.switch_page("pages/dashboard.py")
\ No newline at end of file
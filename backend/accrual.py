@@ -0,0 +1,118 @@
+"""
+backend/accrual.py
+------------------
+Interest accrual for active loans.
+
+Interest is monthly simple interest at interest_rate % on the principal
+still outstanding in that month: a loan owes one month's interest for
+every month after the month it was given, and a principal repayment
+lowers the interest of every month after the one it was paid in.
+
+For one loan with principal P given in month L, repayments p_i in
+months m_i, and the current month C:
+
+    principal-months = P * (C - L) - sum(p_i * (C - m_i))
+    interest due     = rate / 100 * principal-months
+
+The second sum is C * sum(p_i) - sum(p_i * m_i), so one grouped query
+(principal repaid and its month-weighted sum per loan) is enough, and
+every loan is then accrued in one NumPy pass.
+
+Months are indexed as year * 12 + month - 1.
+"""
+from datetime import date
+import numpy as np
+from backend.db import transaction
+
+ACCRUAL_QUERY = """
+    SELECT
+        l.id,
+        l.shg_id,
+        l.member_id,
+        l.loan_amount,
+        l.interest_rate,
+        YEAR(l.loan_date) * 12 + MONTH(l.loan_date) - 1,
+        IFNULL(SUM(CASE WHEN p.payment_type='principal' THEN p.amount END), 0),
+        IFNULL(SUM(CASE WHEN p.payment_type='principal' THEN p.amount * (
+            YEAR(IFNULL(p.payment_date, p.created_at)) * 12
+                + MONTH(IFNULL(p.payment_date, p.created_at)) - 1
+        ) END), 0),
+        IFNULL(SUM(CASE WHEN p.payment_type='interest' THEN p.amount END), 0)
+    FROM loans l
+    LEFT JOIN loan_payments p ON p.loan_id = l.id
+    WHERE l.status='active' AND {where}
+    GROUP BY l.id
+    ORDER BY l.id
+"""
+
+ACCRUAL_FIELDS = (
+    "loan_id", "shg_id", "member_id", "principal", "interest_rate",
+    "outstanding", "months", "interest_due", "interest_paid",
+    "arrears", "next_interest", "next_payable",
+)
+
+
+def accrue(rows, as_of=None) -> dict:
+    """
+    Accrue ACCRUAL_QUERY rows as of a date (default today).
+    Returns {field: array} for ACCRUAL_FIELDS, one entry per loan:
+      interest_due   interest owed from the loan month to as_of's month
+      arrears        interest_due not yet paid
+      next_interest  next month's interest on the outstanding principal
+      next_payable   arrears + next_interest
+    """
+    as_of = as_of or date.today()
+    current = as_of.year * 12 + as_of.month - 1
+
+    data = np.array(rows, dtype=np.float64).reshape(-1, 9)
+    loan_id, shg_id, member_id = (data[:, i].astype(np.int64) for i in range(3))
+    principal, rate, loan_month = data[:, 3], data[:, 4], data[:, 5]
+    repaid, repaid_month_sum, interest_paid = data[:, 6], data[:, 7], data[:, 8]
+
+    months = np.maximum(current - loan_month, 0)
+    principal_months = np.maximum(
+        principal * months - (current * repaid - repaid_month_sum), 0
+    )
+    outstanding = np.maximum(principal - repaid, 0)
+
+    # Whole rupees; the epsilon keeps float rates (e.g. 1.1 %) from
+    # rounding an exact amount down by one
+    interest_due = np.floor(principal_months * rate / 100 + 1e-6)
+    arrears = np.maximum(interest_due - interest_paid, 0)
+    next_interest = np.floor(outstanding * rate / 100 + 1e-6)
+
+    def as_int(values):
+        return values.astype(np.int64)
+
+    return {
+        "loan_id": loan_id,
+        "shg_id": shg_id,
+        "member_id": member_id,
+        "principal": as_int(principal),
+        "interest_rate": rate,
+        "outstanding": as_int(outstanding),
+        "months": as_int(months),
+        "interest_due": as_int(interest_due),
+        "interest_paid": as_int(interest_paid),
+        "arrears": as_int(arrears),
+        "next_interest": as_int(next_interest),
+        "next_payable": as_int(arrears + next_interest),
+    }
+
+
+def get_loan_accruals(shg_id=None, as_of=None, cur=None) -> dict:
+    """
+    accrue() for every active loan of one SHG, or of all SHGs
+    (shg_id=None), from one query.
+    """
+    where, params = ("1=1", ()) if shg_id is None else ("l.shg_id=%s", (shg_id,))
+    with transaction(cur) as cur:
+        cur.execute(ACCRUAL_QUERY.format(where=where), params)
+        rows = cur.fetchall()
+    return accrue(rows, as_of)
+
+
+def accrual_rows(accruals) -> list:
+    """accrue() output as one dict per loan"""
+    columns = [accruals[f].tolist() for f in ACCRUAL_FIELDS]
+    return [dict(zip(ACCRUAL_FIELDS, values)) for values in zip(*columns)]
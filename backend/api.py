@@ -1,155 +1,260 @@
-from backend.db import get_db_connection
-from backend.calculations import close_loan_if_paid
+from backend.db import transaction
+from backend.balances import bump_balance
+from backend.cache import bump_data_version, bump_data_version_for_member
+from backend.calculations import close_loan_if_paid, get_wallet_balance
 
 # MEMBER MANAGEMENT
 
-def add_member(shg_id, first_name, last_name, mobile, monthly_deposit=500):
-    conn = get_db_connection()
-    cur = conn.cursor()
+def add_member(shg_id, first_name, last_name, mobile, monthly_deposit=500, cur=None):
+    with transaction(cur) as cur:
+        cur.execute("""
+            INSERT INTO members (
+                shg_id, first_name, last_name, mobile, monthly_deposit, join_date
+            )
+            VALUES (%s, %s, %s, %s, %s, CURDATE())
+        """, (shg_id, first_name, last_name, mobile, monthly_deposit))
 
-    cur.execute("""
-        INSERT INTO members (
-            shg_id, first_name, last_name, mobile, monthly_deposit
-        )
-        VALUES (%s, %s, %s, %s, %s)
-    """, (shg_id, first_name, last_name, mobile, monthly_deposit))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+        bump_data_version(cur, shg_id)
 
 # DEPOSIT
+#
+# Write functions take two options for entries made before the app
+# was used (the Legacy tab) or recorded late:
+#   entry_date  date (or datetime) the entry really happened; default now
+#   legacy      mark the passbook entry as legacy data
+# Both are written by the same INSERTs, and every passbook entry
+# carries reference_id (deposit / loan / payment id).
 
-def add_deposit(shg_id, member_id, amount, month, year):
-    conn = get_db_connection()
-    cur = conn.cursor()
+def _period(entry_date):
+    """Monthly rollup period of a write (None = this month)"""
+    return (entry_date.year, entry_date.month) if entry_date else None
 
-    # Save deposit
-    cur.execute("""
-        INSERT INTO deposits (
-            shg_id, member_id, amount, deposit_month, deposit_year
-        )
-        VALUES (%s, %s, %s, %s, %s)
-    """, (shg_id, member_id, amount, month, year))
 
-    # Log transaction (PASSBOOK ENTRY)
-    cur.execute("""
-        INSERT INTO transactions (
-            shg_id, member_id, txn_type, amount, created_by
-        )
-        VALUES (%s, %s, 'deposit', %s, 'president')
-    """, (shg_id, member_id, amount))
+def add_deposit(shg_id, member_id, amount, month, year, entry_date=None, legacy=False, cur=None):
+    with transaction(cur) as cur:
+        # Save deposit
+        cur.execute("""
+            INSERT INTO deposits (
+                shg_id, member_id, amount, deposit_month, deposit_year
+            )
+            VALUES (%s, %s, %s, %s, %s)
+        """, (shg_id, member_id, amount, month, year))
 
-    conn.commit()
-    cur.close()
-    conn.close()
+        deposit_id = cur.lastrowid
 
-# LOANS
+        # Log transaction (PASSBOOK ENTRY)
+        cur.execute("""
+            INSERT INTO transactions (
+                shg_id, member_id, txn_type, reference_id, amount,
+                created_by, is_legacy, created_at
+            )
+            VALUES (%s, %s, 'deposit', %s, %s, 'president', %s,
+                    IFNULL(%s, CURRENT_TIMESTAMP))
+        """, (shg_id, member_id, deposit_id, amount, legacy, entry_date))
 
-def give_loan(shg_id, member_id, loan_amount, interest_rate, remarks=None):
-    conn = get_db_connection()
-    cur = conn.cursor()
+        bump_balance(cur, shg_id, savings=amount, period=(year, month))
 
-    # Create loan
-    cur.execute("""
-        INSERT INTO loans (
-            shg_id, member_id, loan_amount, interest_rate, loan_date, remarks
-        )
-        VALUES (%s, %s, %s, %s, CURDATE(), %s)
-    """, (shg_id, member_id, loan_amount, interest_rate, remarks))
+    return deposit_id
 
-    loan_id = cur.lastrowid
 
-    # Log transaction
-    cur.execute("""
-        INSERT INTO transactions (
-            shg_id, member_id, txn_type, amount, created_by
-        )
-        VALUES (%s, %s, 'loan_given', %s, 'president')
-    """, (shg_id, member_id, loan_amount))
+def add_deposits_bulk(shg_id, entries, month, year, entry_date=None, legacy=False, cur=None):
+    """
+    Record deposits for many members for one month in one transaction.
+
+    entries: iterable of (member_id, amount)
+
+    Members who already have a deposit for that month (the
+    UNIQUE member/month/year key) are reported, not fatal. Only the
+    first entry of a member listed twice is used; the others are
+    returned as "repeated".
+
+    Returns:
+    {
+        "results": {member_id: "recorded" | "duplicate"},
+        "repeated": [(member_id, amount), ...] entries not written,
+        "balance": wallet balance after the batch
+    }
+    """
+    results = {}
+    pending, repeated = [], []
+    for member_id, amount in entries:
+        if member_id in results:
+            repeated.append((member_id, amount))
+            continue
+        results[member_id] = "recorded"
+        pending.append((member_id, amount))
+
+    with transaction(cur) as cur:
+        if pending:
+            # Lock the month's keys so no other writer can slip in between
+            ids = [member_id for member_id, _ in pending]
+            cur.execute(f"""
+                SELECT member_id
+                FROM deposits
+                WHERE deposit_month=%s AND deposit_year=%s
+                  AND member_id IN ({", ".join(["%s"] * len(ids))})
+                FOR UPDATE
+            """, (month, year, *ids))
+            existing = {row[0] for row in cur.fetchall()}
+
+            for member_id in existing:
+                results[member_id] = "duplicate"
+            pending = [e for e in pending if e[0] not in existing]
+
+        if pending:
+            # Save deposits (one multi-row statement)
+            cur.execute(f"""
+                INSERT INTO deposits (
+                    shg_id, member_id, amount, deposit_month, deposit_year
+                )
+                VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(pending))}
+            """, [v for member_id, amount in pending
+                  for v in (shg_id, member_id, amount, month, year)])
+
+            # Their ids, by the unique member/month/year key
+            ids = [member_id for member_id, _ in pending]
+            cur.execute(f"""
+                SELECT member_id, id
+                FROM deposits
+                WHERE deposit_month=%s AND deposit_year=%s
+                  AND member_id IN ({", ".join(["%s"] * len(ids))})
+            """, (month, year, *ids))
+            deposit_ids = dict(cur.fetchall())
+
+            # Log transactions (PASSBOOK ENTRIES)
+            cur.execute(f"""
+                INSERT INTO transactions (
+                    shg_id, member_id, txn_type, reference_id, amount,
+                    created_by, is_legacy, created_at
+                )
+                VALUES {", ".join(["(%s, %s, 'deposit', %s, %s, 'president', %s, IFNULL(%s, CURRENT_TIMESTAMP))"] * len(pending))}
+            """, [v for member_id, amount in pending
+                  for v in (shg_id, member_id, deposit_ids[member_id], amount, legacy, entry_date)])
+
+            bump_balance(
+                cur, shg_id,
+                savings=sum(amount for _, amount in pending),
+                period=(year, month)
+            )
+
+        balance = get_wallet_balance(shg_id, cur)
+
+    return {"results": results, "repeated": repeated, "balance": balance}
+
+# LOANS
 
-    conn.commit()
-    cur.close()
-    conn.close()
+def give_loan(shg_id, member_id, loan_amount, interest_rate, remarks=None,
+              entry_date=None, legacy=False, cur=None):
+    with transaction(cur) as cur:
+        # Create loan
+        cur.execute("""
+            INSERT INTO loans (
+                shg_id, member_id, loan_amount, interest_rate, loan_date, remarks
+            )
+            VALUES (%s, %s, %s, %s, IFNULL(%s, CURDATE()), %s)
+        """, (shg_id, member_id, loan_amount, interest_rate, entry_date, remarks))
+
+        loan_id = cur.lastrowid
+
+        # Log transaction
+        cur.execute("""
+            INSERT INTO transactions (
+                shg_id, member_id, txn_type, reference_id, amount,
+                created_by, is_legacy, created_at
+            )
+            VALUES (%s, %s, 'loan_given', %s, %s, 'president', %s,
+                    IFNULL(%s, CURRENT_TIMESTAMP))
+        """, (shg_id, member_id, loan_id, loan_amount, legacy, entry_date))
+
+        bump_balance(cur, shg_id, loans=loan_amount, period=_period(entry_date))
 
     return loan_id
 
 # LOAN REPAYMENT
 
-def repay_loan(loan_id, amount, payment_type):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # Record repayment
-    cur.execute("""
-        INSERT INTO loan_payments (
-            loan_id, amount, payment_type, payment_date
+def repay_loan(loan_id, amount, payment_type, entry_date=None, legacy=False, cur=None):
+    """
+    Record a repayment and auto-close the loan once principal is
+    fully paid, all in one transaction.
+    Returns True when this payment closed the loan.
+    """
+    with transaction(cur) as cur:
+        # Lock the loan so concurrent repayments close it exactly once
+        cur.execute(
+            "SELECT shg_id, member_id FROM loans WHERE id=%s FOR UPDATE",
+            (loan_id,)
         )
-        VALUES (%s, %s, %s, CURDATE())
-    """, (loan_id, amount, payment_type))
+        loan = cur.fetchone()
+        if loan is None:
+            raise ValueError(f"Unknown loan {loan_id}")
+        shg_id, member_id = loan
 
-    # Log transaction
-    cur.execute("""
-        INSERT INTO transactions (
-            shg_id,
-            member_id,
-            txn_type,
-            amount,
-            created_by
-        )
-        SELECT
-            l.shg_id,
-            l.member_id,
-            'loan_payment',
-            %s,
-            'president'
-        FROM loans l
-        WHERE l.id = %s
-    """, (amount, loan_id))
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-    # Auto-close loan if principal fully paid
-    close_loan_if_paid(loan_id)
-
-def update_member(member_id, first_name, last_name, mobile, monthly_deposit):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE members
-        SET first_name=%s,
-            last_name=%s,
-            mobile=%s,
-            monthly_deposit=%s
-        WHERE id=%s
-    """, (first_name, last_name, mobile, monthly_deposit, member_id))
-    conn.commit()
-    cur.close()
-    conn.close()
-
-
-def deactivate_member(member_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE members
-        SET status='left'
-        WHERE id=%s
-    """, (member_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def activate_member(member_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
+        # Record repayment
+        cur.execute("""
+            INSERT INTO loan_payments (
+                loan_id, amount, payment_type, payment_date
+            )
+            VALUES (%s, %s, %s, IFNULL(%s, CURDATE()))
+        """, (loan_id, amount, payment_type, entry_date))
+
+        payment_id = cur.lastrowid
+
+        # Log transaction
+        cur.execute("""
+            INSERT INTO transactions (
+                shg_id, member_id, txn_type, reference_id, amount,
+                created_by, is_legacy, created_at
+            )
+            VALUES (%s, %s, 'loan_payment', %s, %s, 'president', %s,
+                    IFNULL(%s, CURRENT_TIMESTAMP))
+        """, (shg_id, member_id, payment_id, amount, legacy, entry_date))
+
+        if payment_type == "principal":
+            bump_balance(cur, shg_id, principal=amount, period=_period(entry_date))
+        else:
+            bump_balance(cur, shg_id, interest=amount, period=_period(entry_date))
+
+        # Auto-close loan if principal fully paid
+        return close_loan_if_paid(loan_id, closed_date=entry_date, cur=cur)
+
+def update_member(member_id, first_name, last_name, mobile, monthly_deposit, cur=None):
+    with transaction(cur) as cur:
+        cur.execute("""
+            UPDATE members
+            SET first_name=%s,
+                last_name=%s,
+                mobile=%s,
+                monthly_deposit=%s
+            WHERE id=%s
+        """, (first_name, last_name, mobile, monthly_deposit, member_id))
+
+        bump_data_version_for_member(cur, member_id)
+
+
+def deactivate_member(member_id, cur=None):
+    with transaction(cur) as cur:
+        _set_member_status(cur, member_id, "left")
+
+def activate_member(member_id, cur=None):
+    with transaction(cur) as cur:
+        _set_member_status(cur, member_id, "active")
+
+
+def _set_member_status(cur, member_id, status):
+    """
+    Change status and record it in member_status_history (used by
+    backend/missed.py to know which months a member owed a deposit).
+    """
     cur.execute("""
         UPDATE members
-        SET status='active'
-        WHERE id=%s
-    """, (member_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
+        SET status=%s
+        WHERE id=%s AND status<>%s
+    """, (status, member_id, status))
+
+    if cur.rowcount:
+        cur.execute("""
+            INSERT INTO member_status_history (member_id, status)
+            VALUES (%s, %s)
+        """, (member_id, status))
+
+    bump_data_version_for_member(cur, member_id)
@@ -1,64 +1,70 @@
-from backend.db import get_db_connection
+from functools import lru_cache
+from backend.db import transaction
+
+# SESSION PAYLOAD
+
+def _session(role, shg_id, shg_number, shg_name, village, member_id=None) -> dict:
+    """Everything the pages need about the logged-in user and SHG"""
+    return {
+        "logged_in": True,
+        "role": role,
+        "shg_id": shg_id,
+        "shg_no": shg_number,
+        "shg_name": shg_name or "SHG",
+        "village": village or "",
+        "member_id": member_id,
+    }
 
 # SHG HELPERS
 
 def shg_exists(shg_number: str) -> bool:
     """Check if SHG group number already exists"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        "SELECT id FROM shg_groups WHERE shg_number = %s",
-        (shg_number,)
-    )
-    exists = cur.fetchone() is not None
-
-    cur.close()
-    conn.close()
+    with transaction() as cur:
+        cur.execute(
+            "SELECT id FROM shg_groups WHERE shg_number = %s",
+            (shg_number,)
+        )
+        exists = cur.fetchone() is not None
     return exists
 
 
+@lru_cache(maxsize=1024)
 def get_shg_id(shg_number: str):
-    """Get SHG internal ID from SHG number"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        "SELECT id FROM shg_groups WHERE shg_number = %s AND is_active = 1",
-        (shg_number,)
-    )
-    row = cur.fetchone()
-
-    cur.close()
-    conn.close()
+    """
+    Get SHG internal ID from SHG number.
+    Cached per process; create_shg clears the cache.
+    """
+    with transaction() as cur:
+        cur.execute(
+            "SELECT id FROM shg_groups WHERE shg_number = %s AND is_active = 1",
+            (shg_number,)
+        )
+        row = cur.fetchone()
     return row[0] if row else None
 
 # PRESIDENT AUTH
 
-def president_login(shg_number: str, username: str, password: str) -> bool:
+def president_login(shg_number: str, username: str, password: str):
     """
     President login using:
     - SHG group number
     - Username
     - Password
+
+    Returns the session payload (see _session) if valid, else None
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT id
-        FROM shg_groups
-        WHERE shg_number = %s
-          AND president_username = %s
-          AND president_password = %s
-          AND is_active = 1
-    """, (shg_number, username, password))
-
-    success = cur.fetchone() is not None
-
-    cur.close()
-    conn.close()
-    return success
+    with transaction() as cur:
+        cur.execute("""
+            SELECT id, shg_number, shg_name, village
+            FROM shg_groups
+            WHERE shg_number = %s
+              AND president_username = %s
+              AND president_password = %s
+              AND is_active = 1
+        """, (shg_number, username, password))
+
+        row = cur.fetchone()
+    return _session("president", *row) if row else None
 
 
 def create_shg(
@@ -77,29 +83,24 @@ def create_shg(
     if shg_exists(shg_number):
         return False
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT INTO shg_groups (
+    with transaction() as cur:
+        cur.execute("""
+            INSERT INTO shg_groups (
+                shg_number,
+                shg_name,
+                village,
+                president_username,
+                president_password
+            )
+            VALUES (%s, %s, %s, %s, %s)
+        """, (
             shg_number,
             shg_name,
             village,
             president_username,
             president_password
-        )
-        VALUES (%s, %s, %s, %s, %s)
-    """, (
-        shg_number,
-        shg_name,
-        village,
-        president_username,
-        president_password
-    ))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+        ))
+    get_shg_id.cache_clear()  # the number may have been looked up (and missed) before
     return True
 
 
@@ -109,21 +110,15 @@ def change_president_password(
     new_password: str
 ) -> bool:
     """Allow president to change password"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        UPDATE shg_groups
-        SET president_password = %s
-        WHERE shg_number = %s
-          AND president_password = %s
-    """, (new_password, shg_number, old_password))
-
-    conn.commit()
-    updated = cur.rowcount == 1
-
-    cur.close()
-    conn.close()
+    with transaction() as cur:
+        cur.execute("""
+            UPDATE shg_groups
+            SET president_password = %s
+            WHERE shg_number = %s
+              AND president_password = %s
+        """, (new_password, shg_number, old_password))
+
+        updated = cur.rowcount == 1
     return updated
 
 # MEMBER AUTH (VIEW ONLY)
@@ -141,24 +136,35 @@ def member_login(
     - Mobile number (acts as password)
     - SHG group number
 
-    Returns member_id if valid, else None
+    Returns the session payload (see _session) if valid, else None
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT m.id
-        FROM members m
-        JOIN shg_groups s ON s.id = m.shg_id
-        WHERE s.shg_number = %s
-          AND m.first_name = %s
-          AND m.last_name = %s
-          AND m.mobile = %s
-          AND m.status = 'active'
-    """, (shg_number, first_name, last_name, mobile))
-
-    row = cur.fetchone()
-
-    cur.close()
-    conn.close()
-    return row[0] if row else None
+    with transaction() as cur:
+        cur.execute("""
+            SELECT s.id, s.shg_number, s.shg_name, s.village, m.id
+            FROM members m
+            JOIN shg_groups s ON s.id = m.shg_id
+            WHERE s.shg_number = %s
+              AND m.first_name = %s
+              AND m.last_name = %s
+              AND m.mobile = %s
+              AND m.status = 'active'
+              AND s.is_active = 1
+        """, (shg_number, first_name, last_name, mobile))
+
+        row = cur.fetchone()
+    return _session("member", *row[:4], member_id=row[4]) if row else None
+
+# ADMIN AUTH
+
+def admin_login(username: str, password: str) -> bool:
+    """System admin login (admins table)"""
+    with transaction() as cur:
+        cur.execute("""
+            SELECT id
+            FROM admins
+            WHERE username = %s
+              AND password = %s
+        """, (username, password))
+
+        success = cur.fetchone() is not None
+    return success
@@ -0,0 +1,299 @@
+"""
+backend/balances.py
+-------------------
+Running totals per SHG, stored in shg_balances.
+Every ledger write updates them in the same transaction, so summary
+reads are a primary-key lookup instead of SUM scans over history.
+
+The same writes also update shg_monthly_totals, one row per SHG and
+month, so totals for any date range sum a few hundred rows at most.
+"""
+from backend.db import transaction
+
+BALANCE_COLUMNS = (
+    "total_savings",
+    "total_loan_given",
+    "principal_repaid",
+    "interest_collected",
+)
+
+MONTHLY_COLUMNS = (
+    "deposits",
+    "loans_disbursed",
+    "principal_repaid",
+    "interest_collected",
+)
+
+# INCREMENTAL UPDATE (called inside ledger writes)
+
+def bump_balance(cur, shg_id, savings=0, loans=0, principal=0, interest=0, period=None):
+    """
+    Add deltas to an SHG's running totals and to its monthly rollup.
+    Must be called with the cursor of the ledger write.
+    period: (year, month) the amounts belong to; default this month.
+    Also bumps the SHG's data_version (see backend/cache.py).
+    """
+    cur.execute("""
+        INSERT INTO shg_balances (
+            shg_id, total_savings, total_loan_given,
+            principal_repaid, interest_collected, data_version
+        )
+        VALUES (%s, %s, %s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE
+            total_savings = total_savings + VALUES(total_savings),
+            total_loan_given = total_loan_given + VALUES(total_loan_given),
+            principal_repaid = principal_repaid + VALUES(principal_repaid),
+            interest_collected = interest_collected + VALUES(interest_collected),
+            data_version = data_version + 1
+    """, (shg_id, savings, loans, principal, interest))
+
+    year, month = period or (None, None)
+    cur.execute("""
+        INSERT INTO shg_monthly_totals (
+            shg_id, year, month, deposits, loans_disbursed,
+            principal_repaid, interest_collected
+        )
+        VALUES (
+            %s, IFNULL(%s, YEAR(CURDATE())), IFNULL(%s, MONTH(CURDATE())),
+            %s, %s, %s, %s
+        )
+        ON DUPLICATE KEY UPDATE
+            deposits = deposits + VALUES(deposits),
+            loans_disbursed = loans_disbursed + VALUES(loans_disbursed),
+            principal_repaid = principal_repaid + VALUES(principal_repaid),
+            interest_collected = interest_collected + VALUES(interest_collected)
+    """, (shg_id, year, month, savings, loans, principal, interest))
+
+# READS
+
+def get_balance(shg_id, cur=None) -> dict:
+    with transaction(cur) as cur:
+        cur.execute(f"""
+            SELECT {", ".join(BALANCE_COLUMNS)}
+            FROM shg_balances
+            WHERE shg_id=%s
+        """, (shg_id,))
+        row = cur.fetchone()
+    return dict(zip(BALANCE_COLUMNS, row or (0,) * len(BALANCE_COLUMNS)))
+
+
+def _month_index(value):
+    return value.year * 12 + value.month
+
+
+PERIOD_TOTALS_QUERY = f"""
+    SELECT
+        shg_id,
+        {", ".join(f"IFNULL(SUM({c}), 0)" for c in MONTHLY_COLUMNS)}
+    FROM shg_monthly_totals
+    WHERE {{shg_filter}}
+      AND year * 12 + month BETWEEN %s AND %s
+    GROUP BY shg_id
+"""
+
+
+def get_period_totals(shg_id, period_from, period_to, cur=None) -> dict:
+    """
+    Deposits, loans disbursed, principal repaid and interest collected
+    between two dates, summed from the monthly rollup.
+    Whole months: every month the range touches is counted.
+    Deposits count in the month they are for, loans and payments in
+    the month they were made.
+    """
+    with transaction(cur) as cur:
+        cur.execute(
+            PERIOD_TOTALS_QUERY.format(shg_filter="shg_id=%s"),
+            (shg_id, _month_index(period_from), _month_index(period_to))
+        )
+        row = cur.fetchone()
+    values = row[1:] if row else (0,) * len(MONTHLY_COLUMNS)
+    return dict(zip(MONTHLY_COLUMNS, (int(v) for v in values)))
+
+
+def get_period_totals_by_shg(period_from, period_to, cur=None) -> dict:
+    """
+    get_period_totals for every SHG in one query: {shg_id: totals}.
+    SHGs with no activity in the range are missing.
+    """
+    with transaction(cur) as cur:
+        cur.execute(
+            PERIOD_TOTALS_QUERY.format(shg_filter="1=1"),
+            (_month_index(period_from), _month_index(period_to))
+        )
+        rows = cur.fetchall()
+    return {
+        row[0]: dict(zip(MONTHLY_COLUMNS, (int(v) for v in row[1:])))
+        for row in rows
+    }
+
+# REBUILD / VERIFY FROM RAW LEDGER
+
+RAW_TOTALS_QUERY = """
+    SELECT
+        s.id,
+        IFNULL((SELECT SUM(amount) FROM deposits d
+                WHERE d.shg_id = s.id), 0),
+        IFNULL((SELECT SUM(loan_amount) FROM loans l
+                WHERE l.shg_id = s.id), 0),
+        IFNULL((SELECT SUM(p.amount) FROM loan_payments p
+                JOIN loans l ON l.id = p.loan_id
+                WHERE l.shg_id = s.id AND p.payment_type='principal'), 0),
+        IFNULL((SELECT SUM(p.amount) FROM loan_payments p
+                JOIN loans l ON l.id = p.loan_id
+                WHERE l.shg_id = s.id AND p.payment_type='interest'), 0)
+    FROM shg_groups s
+"""
+
+
+# (shg_id, year, month, deposits, loans, principal, interest)
+RAW_MONTHLY_QUERY = """
+    SELECT shg_id, y, m, SUM(dep), SUM(loan), SUM(prin), SUM(intr)
+    FROM (
+        SELECT shg_id, deposit_year AS y, deposit_month AS m,
+               SUM(amount) AS dep, 0 AS loan, 0 AS prin, 0 AS intr
+        FROM deposits
+        GROUP BY shg_id, deposit_year, deposit_month
+        UNION ALL
+        SELECT shg_id, YEAR(loan_date), MONTH(loan_date),
+               0, SUM(loan_amount), 0, 0
+        FROM loans
+        GROUP BY shg_id, YEAR(loan_date), MONTH(loan_date)
+        UNION ALL
+        SELECT l.shg_id,
+               YEAR(IFNULL(p.payment_date, p.created_at)),
+               MONTH(IFNULL(p.payment_date, p.created_at)),
+               0, 0,
+               SUM(IF(p.payment_type='principal', p.amount, 0)),
+               SUM(IF(p.payment_type='interest', p.amount, 0))
+        FROM loan_payments p
+        JOIN loans l ON l.id = p.loan_id
+        GROUP BY l.shg_id,
+                 YEAR(IFNULL(p.payment_date, p.created_at)),
+                 MONTH(IFNULL(p.payment_date, p.created_at))
+    ) t
+"""
+
+
+def _raw_totals_query(shg_id):
+    if shg_id is None:
+        return RAW_TOTALS_QUERY, ()
+    return RAW_TOTALS_QUERY + " WHERE s.id=%s", (shg_id,)
+
+
+def _raw_monthly_query(shg_id):
+    if shg_id is None:
+        return RAW_MONTHLY_QUERY + " GROUP BY shg_id, y, m", ()
+    return RAW_MONTHLY_QUERY + " WHERE shg_id=%s GROUP BY shg_id, y, m", (shg_id,)
+
+
+def rebuild_balances(shg_id=None, cur=None) -> int:
+    """
+    Recompute counters and the monthly rollup from deposits, loans
+    and loan_payments. Rebuilds one SHG, or all when shg_id is None.
+    Returns the number of SHGs rebuilt.
+    """
+    query, params = _raw_totals_query(shg_id)
+    monthly_query, monthly_params = _raw_monthly_query(shg_id)
+    with transaction(cur) as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+        if rows:
+            cur.executemany("""
+                INSERT INTO shg_balances (
+                    shg_id, total_savings, total_loan_given,
+                    principal_repaid, interest_collected
+                )
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    total_savings = VALUES(total_savings),
+                    total_loan_given = VALUES(total_loan_given),
+                    principal_repaid = VALUES(principal_repaid),
+                    interest_collected = VALUES(interest_collected),
+                    data_version = data_version + 1
+            """, rows)
+
+        if shg_id is None:
+            cur.execute("DELETE FROM shg_monthly_totals")
+        else:
+            cur.execute("DELETE FROM shg_monthly_totals WHERE shg_id=%s", (shg_id,))
+        cur.execute(f"""
+            INSERT INTO shg_monthly_totals (
+                shg_id, year, month, {", ".join(MONTHLY_COLUMNS)}
+            )
+        """ + monthly_query, monthly_params)
+    return len(rows)
+
+
+def verify_balances(shg_id=None) -> list:
+    """
+    Compare counters with the raw ledger.
+    Returns a list of mismatches (empty when everything agrees).
+    """
+    query, params = _raw_totals_query(shg_id)
+    monthly_query, monthly_params = _raw_monthly_query(shg_id)
+    with transaction() as cur:
+        cur.execute(query, params)
+        raw = {row[0]: row[1:] for row in cur.fetchall()}
+        cur.execute(f"SELECT shg_id, {', '.join(BALANCE_COLUMNS)} FROM shg_balances")
+        stored = {row[0]: row[1:] for row in cur.fetchall()}
+
+        cur.execute(monthly_query, monthly_params)
+        raw_monthly = {row[:3]: row[3:] for row in cur.fetchall()}
+        cur.execute(f"""
+            SELECT shg_id, year, month, {", ".join(MONTHLY_COLUMNS)}
+            FROM shg_monthly_totals
+        """)
+        stored_monthly = {row[:3]: row[3:] for row in cur.fetchall()}
+
+    mismatches = []
+    for sid, expected in raw.items():
+        actual = stored.get(sid, (0,) * len(BALANCE_COLUMNS))
+        for column, want, have in zip(BALANCE_COLUMNS, expected, actual):
+            if want != have:
+                mismatches.append({
+                    "shg_id": sid,
+                    "column": column,
+                    "expected": want,
+                    "stored": have,
+                })
+
+    empty = (0,) * len(MONTHLY_COLUMNS)
+    for key in sorted(set(raw_monthly) | set(stored_monthly)):
+        sid, year, month = key
+        if shg_id is not None and sid != shg_id:
+            continue
+        expected = raw_monthly.get(key, empty)
+        actual = stored_monthly.get(key, empty)
+        for column, want, have in zip(MONTHLY_COLUMNS, expected, actual):
+            if want != have:
+                mismatches.append({
+                    "shg_id": sid,
+                    "column": f"{year}-{month:02d} {column}",
+                    "expected": want,
+                    "stored": have,
+                })
+    return mismatches
+
+# COMMAND LINE
+# python -m backend.balances rebuild [shg_id]
+# python -m backend.balances verify [shg_id]
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ("rebuild", "verify"):
+        sys.exit("usage: python -m backend.balances rebuild|verify [shg_id]")
+
+    target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    if sys.argv[1] == "rebuild":
+        print(f"Rebuilt balances for {rebuild_balances(target)} SHG(s)")
+    else:
+        problems = verify_balances(target)
+        for p in problems:
+            print(
+                f"SHG {p['shg_id']}: {p['column']} stored {p['stored']}, "
+                f"ledger says {p['expected']}"
+            )
+        print("OK" if not problems else f"{len(problems)} mismatch(es)")
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,76 @@
+"""
+backend/cache.py
+----------------
+Per-SHG data versions for exact page caching.
+
+Every write in backend/api.py bumps the SHG's data_version (stored on
+its shg_balances row) in the same transaction. Cached page reads take
+the version as an argument, so any write changes the cache key and the
+next rerun reads fresh data, while unchanged SHGs keep hitting the cache
+for hours.
+"""
+import threading
+from backend.db import transaction
+
+CACHE_TTL = 6 * 60 * 60  # seconds; versions make entries exact, TTL only frees memory
+
+# DATA VERSIONS
+
+def bump_data_version(cur, shg_id):
+    """Mark an SHG's data as changed (call with the write's cursor)"""
+    cur.execute("""
+        INSERT INTO shg_balances (shg_id, data_version)
+        VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE data_version = data_version + 1
+    """, (shg_id,))
+
+
+def bump_data_version_for_member(cur, member_id):
+    cur.execute("""
+        INSERT INTO shg_balances (shg_id, data_version)
+        SELECT shg_id, 1 FROM members WHERE id=%s
+        ON DUPLICATE KEY UPDATE data_version = shg_balances.data_version + 1
+    """, (member_id,))
+
+
+def get_data_version(shg_id, cur=None) -> int:
+    with transaction(cur) as cur:
+        cur.execute(
+            "SELECT data_version FROM shg_balances WHERE shg_id=%s",
+            (shg_id,)
+        )
+        row = cur.fetchone()
+    return row[0] if row else 0
+
+# HIT RATE
+# Pages call record_cache_call() on every read and the cached function
+# calls record_cache_miss() from its body, which only runs on a miss.
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _entry(name):
+    return _stats.setdefault(name, {"calls": 0, "misses": 0})
+
+
+def record_cache_call(name):
+    with _stats_lock:
+        _entry(name)["calls"] += 1
+
+
+def record_cache_miss(name):
+    with _stats_lock:
+        _entry(name)["misses"] += 1
+
+
+def get_cache_stats() -> dict:
+    """{name: {"calls", "misses", "hit_rate"}} for this server process"""
+    with _stats_lock:
+        return {
+            name: {
+                **s,
+                "hit_rate": (s["calls"] - s["misses"]) / s["calls"] if s["calls"] else 0.0,
+            }
+            for name, s in _stats.items()
+        }
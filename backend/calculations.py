@@ -1,42 +1,46 @@
-from backend.db import get_db_connection
+from backend.db import transaction, dict_rows
 
 # BASIC CONSTANTS
 DEFAULT_MONTHLY_DEPOSIT = 500
 DEFAULT_INTEREST_RATE = 2  # percent
 
 # WALLET & SUMMARY
+# Totals come from shg_balances (see backend/balances.py), which every
+# ledger write keeps up to date.
 
-def get_total_savings(shg_id: int) -> int:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT IFNULL(SUM(amount),0) FROM deposits WHERE shg_id=%s",
-        (shg_id,)
+def _fetch_value(query, params, cur=None):
+    """
+    Run a single-value query.
+    Uses the caller's cursor when given, else its own connection.
+    """
+    with transaction(cur) as cur:
+        cur.execute(query, params)
+        return cur.fetchone()[0]
+
+
+def get_total_savings(shg_id: int, cur=None) -> int:
+    return _fetch_value(
+        "SELECT IFNULL(MAX(total_savings),0) FROM shg_balances WHERE shg_id=%s",
+        (shg_id,), cur
     )
-    total = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-    return total
-
-
-def get_total_loan_given(shg_id: int) -> int:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT IFNULL(SUM(loan_amount),0) FROM loans WHERE shg_id=%s",
-        (shg_id,)
+
+
+def get_total_loan_given(shg_id: int, cur=None) -> int:
+    return _fetch_value(
+        "SELECT IFNULL(MAX(total_loan_given),0) FROM shg_balances WHERE shg_id=%s",
+        (shg_id,), cur
     )
-    total = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-    return total
 
 
-def get_wallet_balance(shg_id: int) -> int:
+def get_wallet_balance(shg_id: int, cur=None) -> int:
     """
     Wallet = Total savings - total loan principal given
     """
-    return get_total_savings(shg_id) - get_total_loan_given(shg_id)
+    return _fetch_value("""
+        SELECT IFNULL(MAX(total_savings - total_loan_given),0)
+        FROM shg_balances
+        WHERE shg_id=%s
+    """, (shg_id,), cur)
 
 # LOAN CALCULATIONS
 
@@ -62,79 +66,118 @@ def calculate_monthly_payable(
     return monthly_deposit + interest
 
 
-def get_loan_repaid_amount(loan_id: int) -> int:
+# LOAN STATE (SET-BASED)
+# One grouped query over loans + loan_payments returns the state of
+# every loan in a list, instead of 2-3 queries per loan.
+# Grouped by l.id alone (member columns depend on it through the join),
+# so idx_loans_shg_status_id yields the groups already in order.
+
+LOAN_STATES_QUERY = """
+    SELECT
+        l.id AS loan_id,
+        l.shg_id,
+        l.member_id,
+        m.first_name,
+        m.last_name,
+        l.loan_amount AS principal,
+        l.interest_rate,
+        l.loan_date,
+        l.status,
+        l.closed_date,
+        IFNULL(SUM(CASE WHEN p.payment_type='principal' THEN p.amount END), 0)
+            AS principal_repaid,
+        IFNULL(SUM(CASE WHEN p.payment_type='interest' THEN p.amount END), 0)
+            AS interest_paid,
+        MAX(p.payment_date) AS last_payment_date
+    FROM loans l
+    JOIN members m ON m.id = l.member_id
+    LEFT JOIN loan_payments p ON p.loan_id = l.id
+    WHERE {where}
+    GROUP BY l.id
+    ORDER BY l.id
+"""
+
+
+def _query_loan_states(where, params, cur=None):
+    with transaction(cur) as cur:
+        cur.execute(LOAN_STATES_QUERY.format(where=where), params)
+        rows = dict_rows(cur)
+
+    for r in rows:
+        r["principal_repaid"] = int(r["principal_repaid"])
+        r["interest_paid"] = int(r["interest_paid"])
+        r["outstanding"] = r["principal"] - r["principal_repaid"]
+    return rows
+
+
+def get_loan_states(shg_id=None, status=None, cur=None) -> list:
+    """
+    State of every loan in an SHG (all SHGs when shg_id is None),
+    optionally only 'active' or 'closed' loans.
+
+    Each row: loan_id, shg_id, member_id, first_name, last_name,
+    principal, interest_rate, loan_date, status, closed_date,
+    principal_repaid, interest_paid, outstanding, last_payment_date
+    """
+    where, params = ["1=1"], []
+    if shg_id is not None:
+        where.append("l.shg_id=%s")
+        params.append(shg_id)
+    if status is not None:
+        where.append("l.status=%s")
+        params.append(status)
+    return _query_loan_states(" AND ".join(where), params, cur)
+
+
+def get_loan_state(loan_id: int, cur=None):
+    """
+    State of a single loan (same fields as get_loan_states), or None
+    """
+    rows = _query_loan_states("l.id=%s", (loan_id,), cur)
+    return rows[0] if rows else None
+
+
+def get_loan_repaid_amount(loan_id: int, cur=None) -> int:
     """
     Total principal repaid so far
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT IFNULL(SUM(amount),0)
-        FROM loan_payments
-        WHERE loan_id=%s AND payment_type='principal'
-    """, (loan_id,))
-    total = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-    return total
+    return get_loan_state(loan_id, cur)["principal_repaid"]
 
 
-def get_loan_interest_paid(loan_id: int) -> int:
+def get_loan_interest_paid(loan_id: int, cur=None) -> int:
     """
     Total interest paid so far
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT IFNULL(SUM(amount),0)
-        FROM loan_payments
-        WHERE loan_id=%s AND payment_type='interest'
-    """, (loan_id,))
-    total = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-    return total
+    return get_loan_state(loan_id, cur)["interest_paid"]
 
 
-def get_loan_outstanding(loan_id: int) -> int:
+def get_loan_outstanding(loan_id: int, cur=None) -> int:
     """
     Outstanding principal = loan amount - repaid principal
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT loan_amount FROM loans WHERE id=%s",
-        (loan_id,)
-    )
-    loan_amount = cur.fetchone()[0]
-    cur.close()
-    conn.close()
-
-    repaid = get_loan_repaid_amount(loan_id)
-    return loan_amount - repaid
+    return get_loan_state(loan_id, cur)["outstanding"]
 
 
-def is_loan_fully_paid(loan_id: int) -> bool:
+def is_loan_fully_paid(loan_id: int, cur=None) -> bool:
     """
     Loan is closed only when principal is fully paid
     """
-    return get_loan_outstanding(loan_id) <= 0
+    return get_loan_outstanding(loan_id, cur) <= 0
 
 
-def close_loan_if_paid(loan_id: int) -> None:
+def close_loan_if_paid(loan_id: int, cur=None, *, closed_date=None) -> bool:
     """
     Mark loan as closed if principal fully paid
-    """
-    if not is_loan_fully_paid(loan_id):
-        return
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE loans
-        SET status='closed', closed_date=CURDATE()
-        WHERE id=%s
-    """, (loan_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
+    (on closed_date, default today).
+    Returns True when the loan was closed by this call.
+    """
+    with transaction(cur) as cur:
+        if not is_loan_fully_paid(loan_id, cur):
+            return False
+
+        cur.execute("""
+            UPDATE loans
+            SET status='closed', closed_date=IFNULL(%s, CURDATE())
+            WHERE id=%s AND status='active'
+        """, (closed_date, loan_id))
+        return cur.rowcount == 1
@@ -0,0 +1,73 @@
+"""
+backend/charts.py
+-----------------
+Small static charts for the pages, rendered to PNG bytes.
+
+Charts are cached by their input values (LRU), so a rerun with the
+same numbers costs nothing, and matplotlib is only imported on the
+first cache miss. Figures are built with matplotlib.figure.Figure
+directly, never through pyplot, so no figure is ever registered in
+pyplot's global figure list to leak in a long-lived server process.
+"""
+import io
+import os
+import sys
+from functools import lru_cache
+
+CHART_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def donut_png(savings: int, loans: int) -> bytes:
+    """
+    Savings vs loans donut (dashboard style).
+    """
+    from matplotlib.figure import Figure
+
+    # Pie charts cannot take negative or all-zero values
+    values = [max(0, savings), max(0, loans)]
+    if not any(values):
+        values = [1, 0]
+
+    fig = Figure(figsize=(4, 4))
+    ax = fig.subplots()
+    ax.pie(
+        values,
+        colors=["#6366f1", "#f43f5e"],
+        autopct="%1.0f%%",
+        startangle=100,
+        pctdistance=0.75,
+        wedgeprops={"width": 0.35, "edgecolor": "none"}
+    )
+    ax.axis("equal")
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", transparent=True, bbox_inches="tight")
+    fig.clear()
+    return buf.getvalue()
+
+# METRICS
+
+def _rss_bytes():
+    """Current resident set size, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def chart_stats() -> dict:
+    """
+    Cache hits / misses / size, open pyplot figures and process RSS.
+    """
+    info = donut_png.cache_info()
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "cached": info.currsize,
+        "max_cached": info.maxsize,
+        "open_figures": len(pyplot.get_fignums()) if pyplot else 0,
+        "rss_bytes": _rss_bytes(),
+    }
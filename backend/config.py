@@ -0,0 +1,22 @@
+"""
+backend/config.py
+-----------------
+Settings from .env and the environment.
+The .env file is read once per process, on first use.
+"""
+import os
+
+_loaded = False
+
+
+def load_config():
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
+
+
+def get_setting(name, default=None):
+    load_config()
+    return os.getenv(name, default)
@@ -0,0 +1,107 @@
+"""
+backend/dashboard.py
+--------------------
+Everything the dashboard page shows, read in one go.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from backend.db import transaction, dict_rows
+from backend.accrual import get_loan_accruals
+
+
+@dataclass(frozen=True)
+class PayableRow:
+    member_id: int
+    name: str
+    monthly_deposit: int
+    interest: int   # next month's interest on outstanding principal
+    arrears: int    # interest due to date and not yet paid
+    payable: int    # monthly_deposit + arrears + interest
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    shg_id: int
+    active_members: int
+    active_loans: int
+    total_savings: int
+    total_loan_given: int
+    wallet_balance: int
+    payables: tuple  # of PayableRow
+
+
+METRICS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM members m
+         WHERE m.shg_id = s.id AND m.status='active') AS active_members,
+        (SELECT COUNT(*) FROM loans l
+         WHERE l.shg_id = s.id AND l.status='active') AS active_loans,
+        IFNULL(b.total_savings, 0) AS total_savings,
+        IFNULL(b.total_loan_given, 0) AS total_loan_given
+    FROM shg_groups s
+    LEFT JOIN shg_balances b ON b.shg_id = s.id
+    WHERE s.id=%s
+"""
+
+ACTIVE_MEMBERS_QUERY = """
+    SELECT
+        m.id AS member_id,
+        m.first_name,
+        m.last_name,
+        m.monthly_deposit
+    FROM members m
+    WHERE m.shg_id=%s AND m.status='active'
+    ORDER BY m.first_name
+"""
+
+
+def get_dashboard_snapshot(shg_id: int, cur=None) -> DashboardSnapshot:
+    """
+    Metrics and the next-payable list from one
+    connection: one query for the metrics, one for the active members
+    and one for the loan accruals (backend/accrual.py). The SHG's name,
+    number and village come from the login session.
+    """
+    with transaction(cur) as cur:
+        cur.execute(METRICS_QUERY, (shg_id,))
+        rows = dict_rows(cur)
+        head = rows[0] if rows else {}
+
+        cur.execute(ACTIVE_MEMBERS_QUERY, (shg_id,))
+        members = dict_rows(cur)
+
+        accruals = get_loan_accruals(shg_id, cur=cur)
+
+    # A member can hold several active loans
+    interest, arrears = defaultdict(int), defaultdict(int)
+    for member_id, next_interest, owed in zip(
+        accruals["member_id"].tolist(),
+        accruals["next_interest"].tolist(),
+        accruals["arrears"].tolist()
+    ):
+        interest[member_id] += next_interest
+        arrears[member_id] += owed
+
+    payables = []
+    for r in members:
+        member_id = r["member_id"]
+        payables.append(PayableRow(
+            member_id=member_id,
+            name=f"{r['first_name']} {r['last_name']}",
+            monthly_deposit=r["monthly_deposit"],
+            interest=interest[member_id],
+            arrears=arrears[member_id],
+            payable=r["monthly_deposit"] + arrears[member_id] + interest[member_id],
+        ))
+
+    savings = int(head.get("total_savings", 0))
+    loans = int(head.get("total_loan_given", 0))
+    return DashboardSnapshot(
+        shg_id=shg_id,
+        active_members=head.get("active_members", 0),
+        active_loans=head.get("active_loans", 0),
+        total_savings=savings,
+        total_loan_given=loans,
+        wallet_balance=savings - loans,
+        payables=tuple(payables),
+    )
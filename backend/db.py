@@ -1,14 +1,250 @@
-import os
-import mysql.connector
-from dotenv import load_dotenv
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from backend.config import get_setting
+from backend import querylog
 
-load_dotenv()
+# POOL SETTINGS (override in .env)
+
+POOL_SIZE = int(get_setting("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(get_setting("DB_POOL_TIMEOUT", "10"))
+
+# STORAGE BACKEND: mysql (server) or sqlite (one file, see backend/sqlite_db.py)
+
+DB_BACKEND = get_setting("DB_BACKEND", "mysql").lower()
+SQLITE_PATH = get_setting("SQLITE_PATH", "mahila_bachat_gat.db")
+
+if DB_BACKEND not in ("mysql", "sqlite"):
+    raise ValueError(f"DB_BACKEND must be mysql or sqlite, not '{DB_BACKEND}'")
+
+
+def _connect():
+    if DB_BACKEND == "sqlite":
+        from backend.sqlite_db import connect
+
+        return connect(SQLITE_PATH)
+
+    import mysql.connector  # loaded with the first connection, not at import
 
-def get_db_connection():
     return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
+        host=get_setting("DB_HOST"),
+        user=get_setting("DB_USER"),
+        password=get_setting("DB_PASSWORD"),
+        database=get_setting("DB_NAME"),
         auth_plugin="mysql_native_password"
-    )
\ No newline at end of file
+    )
+
+# POOLED CONNECTION
+
+class PooledConnection:
+    """
+    Wraps a raw MySQL (or SQLite) connection.
+    close() hands the connection back to the pool instead of
+    closing the socket, so existing callers need no changes.
+    A wrapper dropped without close() (e.g. after an exception) still
+    returns its connection when it is garbage collected.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._finalizer = weakref.finalize(self, pool.release, conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is None:
+            return
+        self._conn = None
+        self._finalizer()  # releases once: later calls and GC do nothing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# CONNECTION POOL
+
+class ConnectionPool:
+    """
+    Process-wide pool of database connections.
+    - Connections are opened lazily up to `size`
+    - Checkout waits up to `timeout` seconds for a free connection
+    - Every checkout is pinged, dead connections are replaced
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, connect=_connect):
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "reconnects": 0,
+            "wait_time": 0.0,
+        }
+
+    def _open(self):
+        with self._lock:
+            if self._opened >= self.size:
+                return None
+            self._opened += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _checkout(self, deadline):
+        """An idle or new connection, waiting until `deadline` for one"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        conn = self._open()
+        if conn is not None:
+            return conn
+        self._count("waits")
+        try:
+            return self._idle.get(timeout=max(deadline - time.perf_counter(), 0))
+        except queue.Empty:
+            self._count("timeouts")
+            raise TimeoutError(
+                f"No database connection free after {self.timeout}s "
+                f"(pool size {self.size})"
+            ) from None
+
+    def acquire(self):
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        while True:
+            conn = self._checkout(deadline)
+            if self._is_alive(conn):
+                break
+            # Dead: free its slot and check out again (another thread
+            # may take the slot first, then this one waits like any other)
+            self._count("reconnects")
+            self._discard(conn)
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += time.perf_counter() - started
+        querylog.record_checkout()
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def warm_up(self, count=None):
+        """Open connections ahead of the first request"""
+        count = self.size if count is None else min(count, self.size)
+        while self._opened < count:
+            conn = self._open()
+            if conn is None:
+                break
+            self._idle.put(conn)
+
+    def stats(self):
+        with self._lock:
+            opened = self._opened
+            stats = dict(self._stats)
+        idle = self._idle.qsize()
+        return {
+            "size": self.size,
+            "opened": opened,
+            "idle": idle,
+            "in_use": opened - idle,
+            **stats,
+        }
+
+# MODULE-LEVEL POOL
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(connect=querylog.instrumented(_connect))
+    return _pool
+
+
+def warm_up_pool(count=None):
+    get_pool().warm_up(count)
+
+
+def get_pool_stats():
+    return get_pool().stats()
+
+
+def get_db_connection():
+    return get_pool().acquire()
+
+def dict_rows(cur):
+    """Fetch all remaining rows of a plain cursor as dicts"""
+    columns = [c[0] for c in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+# UNIT OF WORK
+
+@contextmanager
+def transaction(cur=None):
+    """
+    Run a block of statements on one connection, in one transaction.
+    Commits on success, rolls back on any error.
+
+    If `cur` is given, the block joins that caller's transaction
+    instead of opening a new one.
+    """
+    if cur is not None:
+        yield cur
+        return
+
+    conn = get_db_connection()
+    cur = conn.cursor(buffered=True)
+    try:
+        yield cur
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,112 @@
+"""
+backend/dialect.py
+------------------
+SQL dialect layer: the app's queries are written for MySQL, and
+to_sqlite() rewrites the few MySQL-only constructs they use.
+
+    MySQL                                  SQLite
+    %s                                     ?
+    CURDATE() / NOW() / CURRENT_TIMESTAMP  date/datetime('now', 'localtime')
+    IFNULL(%s, CURRENT_TIMESTAMP)          IFNULL(datetime(?), datetime('now', 'localtime'))
+    NOW() +/- INTERVAL n SECOND            datetime('now', 'localtime', '+/-n seconds')
+    ON DUPLICATE KEY UPDATE c = VALUES(c)  ON CONFLICT DO UPDATE SET c = excluded.c
+    IF(cond, a, b)                         IIF(cond, a, b)
+    SELECT ... FOR UPDATE [SKIP LOCKED]    SELECT ...  (the transaction takes
+                                           the write lock instead, see sqlite_db)
+    DEFAULT CURRENT_TIMESTAMP [ON UPDATE]  DEFAULT (datetime('now', 'localtime'))
+
+IFNULL, row-value IN lists and LIMIT/OFFSET are the same in both.
+YEAR(), MONTH(), LEAST() and GREATEST() have no SQLite equivalent and
+are registered as functions on each connection (SQL_FUNCTIONS).
+ENUM columns are TEXT with a CHECK in database/schema_sqlite.sql.
+
+SQLite compares dates and timestamps as text, so a TIMESTAMP column
+must not hold a bare "YYYY-MM-DD": it would sort before every time of
+that day. A date bound for a timestamp (a backdated entry's created_at)
+is stored through datetime(), as midnight, which is what MySQL stores.
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+_LOCAL_NOW = "datetime('now', 'localtime')"
+
+_SQLITE_RULES = [
+    (r"\bFOR\s+UPDATE(\s+SKIP\s+LOCKED)?", ""),
+    (r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", "ON CONFLICT DO UPDATE SET"),
+    (r"\bVALUES\((\w+)\)", r"excluded.\1"),
+    (r"\bDEFAULT\s+CURRENT_TIMESTAMP(\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP)?",
+     f"DEFAULT ({_LOCAL_NOW})"),
+    (r"\bIFNULL\(\s*%s\s*,\s*CURRENT_TIMESTAMP\s*\)", f"IFNULL(datetime(?), {_LOCAL_NOW})"),
+    (r"\bNOW\(\)\s*([+-])\s*INTERVAL\s+(%s|\d+)\s+SECOND\b",
+     r"datetime('now', 'localtime', '\1' || \2 || ' seconds')"),
+    (r"\bNOW\(\)|\bCURRENT_TIMESTAMP\b", _LOCAL_NOW),
+    (r"\bCURDATE\(\)", "date('now', 'localtime')"),
+    (r"\bIF\(", "IIF("),
+    (r"%s", "?"),
+]
+_SQLITE_RULES = [(re.compile(pattern, re.IGNORECASE), repl) for pattern, repl in _SQLITE_RULES]
+
+_LOCKING_READ = re.compile(r"\bFOR\s+UPDATE\b", re.IGNORECASE)
+_READ = re.compile(r"\s*(SELECT|WITH|EXPLAIN|PRAGMA)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def to_sqlite(sql: str) -> str:
+    """MySQL statement -> SQLite statement (cached per statement text)"""
+    for pattern, repl in _SQLITE_RULES:
+        sql = pattern.sub(repl, sql)
+    return sql
+
+
+def is_write(sql: str) -> bool:
+    """True for statements that change data, and for locking reads"""
+    return not _READ.match(sql) or bool(_LOCKING_READ.search(sql))
+
+# FUNCTIONS MISSING FROM SQLITE
+
+def _year(value):
+    if value is None:
+        return None
+    return value.year if isinstance(value, date) else int(str(value)[:4])
+
+
+def _month(value):
+    if value is None:
+        return None
+    return value.month if isinstance(value, date) else int(str(value)[5:7])
+
+
+def _least(*values):
+    return None if None in values else min(values)
+
+
+def _greatest(*values):
+    return None if None in values else max(values)
+
+
+# name: (argument count, function); -1 is variadic
+SQL_FUNCTIONS = {
+    "YEAR": (1, _year),
+    "MONTH": (1, _month),
+    "LEAST": (-1, _least),
+    "GREATEST": (-1, _greatest),
+}
+
+# PYTHON VALUES <-> SQLITE TEXT
+# Dates are stored as ISO text, like date('now') / datetime('now') write them
+
+def adapt_date(value: date) -> str:
+    return value.isoformat()
+
+
+def adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ", timespec="seconds")
+
+
+def convert_date(raw: bytes) -> date:
+    return date.fromisoformat(raw.decode()[:10])
+
+
+def convert_timestamp(raw: bytes) -> datetime:
+    return datetime.fromisoformat(raw.decode())
@@ -0,0 +1,189 @@
+"""
+backend/export.py
+-----------------
+Full ledger export for auditors and analysis.
+
+    python -m backend.export <out.zip> [shg_id|all] [csv|parquet]
+
+Writes deposits, loans, loan_payments and transactions of one SHG (or
+of all SHGs) into a zip with one file per table: gzip-compressed CSV,
+or Parquet (needs pyarrow, imported only for that format).
+
+Rows are streamed: an unbuffered cursor reads EXPORT_CHUNK_ROWS at a
+time from the server and each chunk is written before the next is
+read, so memory stays flat however large the tables are. All tables
+are read in one consistent snapshot.
+"""
+import csv
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from backend.config import get_setting
+from backend.db import get_db_connection
+
+EXPORT_CHUNK_ROWS = int(get_setting("EXPORT_CHUNK_ROWS", "20000"))
+EXPORT_FORMATS = ("csv", "parquet")
+
+# table: (FROM clause, SHG column, [(column, kind), ...])
+EXPORT_TABLES = {
+    "deposits": ("deposits t", "t.shg_id", [
+        ("id", "int"), ("shg_id", "int"), ("member_id", "int"), ("amount", "int"),
+        ("deposit_month", "int"), ("deposit_year", "int"), ("remarks", "str"),
+        ("created_at", "timestamp"),
+    ]),
+    "loans": ("loans t", "t.shg_id", [
+        ("id", "int"), ("shg_id", "int"), ("member_id", "int"), ("loan_amount", "int"),
+        ("interest_rate", "float"), ("loan_date", "date"), ("status", "str"),
+        ("closed_date", "date"), ("remarks", "str"), ("created_at", "timestamp"),
+    ]),
+    "loan_payments": ("loan_payments t JOIN loans l ON l.id = t.loan_id", "l.shg_id", [
+        ("id", "int"), ("loan_id", "int"), ("payment_type", "str"), ("amount", "int"),
+        ("payment_date", "date"), ("created_at", "timestamp"),
+    ]),
+    "transactions": ("transactions t", "t.shg_id", [
+        ("id", "int"), ("shg_id", "int"), ("member_id", "int"), ("txn_type", "str"),
+        ("reference_id", "int"), ("amount", "int"), ("created_by", "str"),
+        ("is_legacy", "bool"), ("created_at", "timestamp"),
+    ]),
+}
+
+
+def _export_query(table, shg_id):
+    source, shg_column, columns = EXPORT_TABLES[table]
+    select = ", ".join(f"t.{name}" for name, _ in columns)
+    where, params = ("", ()) if shg_id is None else (f"WHERE {shg_column}=%s", (shg_id,))
+    return f"SELECT {select} FROM {source} {where} ORDER BY t.id", params
+
+
+def _chunks(cur):
+    while True:
+        rows = cur.fetchmany(EXPORT_CHUNK_ROWS)
+        if not rows:
+            return
+        yield rows
+
+# WRITERS (one zip entry per table; return the row count)
+
+def _write_csv(zf, table, columns, chunks, progress):
+    count = 0
+    with zf.open(f"{table}.csv.gz", "w", force_zip64=True) as entry, \
+            gzip.GzipFile(fileobj=entry, mode="wb", compresslevel=6) as gz, \
+            io.TextIOWrapper(gz, encoding="utf-8", newline="") as text:
+        out = csv.writer(text)
+        out.writerow([name for name, _ in columns])
+        for rows in chunks:
+            out.writerows(rows)
+            count += len(rows)
+            if progress:
+                progress(table, count)
+    return count
+
+
+def _write_parquet(zf, table, columns, chunks, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from None
+
+    types = {
+        "int": pa.int64(), "float": pa.float64(), "str": pa.string(),
+        "date": pa.date32(), "timestamp": pa.timestamp("s"), "bool": pa.bool_(),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+
+    # Parquet needs a seekable file; build it on disk, then copy it in
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    count = 0
+    try:
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for rows in chunks:
+                arrays = []
+                for (name, kind), values in zip(columns, zip(*rows)):
+                    if kind == "bool":
+                        values = [None if v is None else bool(v) for v in values]
+                    arrays.append(pa.array(values, type=types[kind]))
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                count += len(rows)
+                if progress:
+                    progress(table, count)
+        with open(path, "rb") as src, zf.open(f"{table}.parquet", "w", force_zip64=True) as entry:
+            shutil.copyfileobj(src, entry, 1 << 20)
+    finally:
+        os.remove(path)
+    return count
+
+# EXPORT
+
+def export_ledger(zip_path, shg_id=None, fmt="csv", tables=None, progress=None) -> dict:
+    """
+    Export the ledger tables into zip_path (see the module docstring).
+    shg_id=None exports every SHG. progress(table, rows_done) is called
+    after each chunk.
+
+    Returns stats: rows {table: count}, bytes (zip size), elapsed,
+    rows_per_second
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    write = _write_parquet if fmt == "parquet" else _write_csv
+    tables = list(tables or EXPORT_TABLES)
+    started = time.perf_counter()
+    counts = {}
+
+    conn = get_db_connection()
+    # Unbuffered: rows stay on the server until fetched
+    cur = conn.cursor(buffered=False)
+    try:
+        conn.start_transaction(consistent_snapshot=True, readonly=True)
+        # Entries are already compressed (gzip / Parquet): store, do not deflate again
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for table in tables:
+                sql, params = _export_query(table, shg_id)
+                cur.execute(sql, params)
+                counts[table] = write(zf, table, EXPORT_TABLES[table][2], _chunks(cur), progress)
+        conn.rollback()
+    finally:
+        try:
+            cur.close()
+        except Exception:
+            pass  # unread rows after a failed write; the pool discards the connection
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    return {
+        "rows": counts,
+        "bytes": os.path.getsize(zip_path),
+        "elapsed": elapsed,
+        "rows_per_second": total / elapsed if elapsed else 0.0,
+    }
+
+# COMMAND LINE
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m backend.export <out.zip> [shg_id|all] [csv|parquet]")
+    target = sys.argv[2] if len(sys.argv) > 2 else "all"
+
+    def show(table, rows_done):
+        print(f"\r{table}: {rows_done} rows", end="", flush=True)
+
+    result = export_ledger(
+        sys.argv[1],
+        shg_id=None if target == "all" else int(target),
+        fmt=sys.argv[3] if len(sys.argv) > 3 else "csv",
+        progress=show
+    )
+    print()
+    for table, count in result["rows"].items():
+        print(f"{table:<15} {count:>10} rows")
+    print(f"{result['bytes'] / 1e6:.1f} MB in {result['elapsed']:.1f}s "
+          f"({result['rows_per_second']:.0f} rows/s)")
@@ -0,0 +1,111 @@
+"""
+backend/history.py
+------------------
+Transaction history (passbook) with keyset pagination.
+
+Pages are ordered newest first by (created_at, id). Instead of an
+OFFSET, each page starts after the (created_at, id) of the last row
+of the previous page, so MySQL seeks straight to it in the index and
+page 1,000 costs the same as page 1.
+
+Index per filter (migration 006):
+    SHG          idx_transactions_shg_created  (shg_id, created_at[, id])
+    member       idx_transactions_member_created (member_id, created_at, id)
+    type         idx_transactions_shg_type_created (shg_id, txn_type, created_at, id)
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from backend.db import transaction, dict_rows
+
+HISTORY_PAGE_SIZE = 50
+TXN_TYPES = ("deposit", "loan_given", "loan_payment")
+
+
+@dataclass(frozen=True)
+class HistoryPage:
+    rows: tuple          # of dicts: id, created_at, member_id, name, txn_type, amount, reference_id, is_legacy
+    next_cursor: tuple   # (created_at, id) to pass for the next page; None on the last page
+
+
+HISTORY_QUERY = """
+    SELECT
+        t.id,
+        t.created_at,
+        t.member_id,
+        m.first_name,
+        m.last_name,
+        t.txn_type,
+        t.amount,
+        t.reference_id,
+        t.is_legacy
+    FROM transactions t
+    LEFT JOIN members m ON m.id = t.member_id
+    WHERE {where}
+    ORDER BY t.created_at DESC, t.id DESC
+    LIMIT %s
+"""
+
+
+def history_query(
+    shg_id,
+    member_id=None,
+    txn_type=None,
+    date_from=None,
+    date_to=None,
+    cursor=None,
+    limit=HISTORY_PAGE_SIZE
+) -> tuple:
+    """(sql, params) of one history page; see get_history. Fetches limit + 1 rows."""
+    where, params = ["t.shg_id=%s"], [shg_id]
+    if member_id is not None:
+        where.append("t.member_id=%s")
+        params.append(member_id)
+    if txn_type is not None:
+        where.append("t.txn_type=%s")
+        params.append(txn_type)
+    if date_from is not None:
+        where.append("t.created_at >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("t.created_at < %s")
+        params.append(date_to + timedelta(days=1))
+    if cursor is not None:
+        # (created_at, id) < cursor, written so the index range is clear
+        created_at, last_id = cursor
+        where.append("t.created_at <= %s AND (t.created_at < %s OR t.id < %s)")
+        params += [created_at, created_at, last_id]
+    return HISTORY_QUERY.format(where=" AND ".join(where)), (*params, limit + 1)
+
+
+def get_history(
+    shg_id,
+    member_id=None,
+    txn_type=None,
+    date_from=None,
+    date_to=None,
+    cursor=None,
+    limit=HISTORY_PAGE_SIZE,
+    cur=None
+) -> HistoryPage:
+    """
+    One page of an SHG's transactions, newest first.
+    Optional filters: member, txn_type, date range (dates, inclusive).
+    cursor: next_cursor of the previous page (None for the first page).
+    """
+    query, params = history_query(
+        shg_id, member_id, txn_type, date_from, date_to, cursor, limit
+    )
+    with transaction(cur) as cur:
+        cur.execute(query, params)
+        rows = dict_rows(cur)
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    for r in rows:
+        r["name"] = f"{r.pop('first_name') or ''} {r.pop('last_name') or ''}".strip()
+
+    last = rows[-1] if rows else None
+    return HistoryPage(
+        rows=tuple(rows),
+        next_cursor=(last["created_at"], last["id"]) if more else None,
+    )
@@ -0,0 +1,529 @@
+"""
+backend/importer.py
+-------------------
+Bulk import of paper-register history from a CSV or XLSX file.
+
+    python -m backend.importer <shg_id> <file.csv|file.xlsx>
+
+One row per entry, oldest first (a loan before its repayments):
+
+    date,type,first_name,last_name,mobile,amount,interest_rate,payment_type,loan_ref,month,year
+
+    date          YYYY-MM-DD or DD/MM/YYYY
+    type          deposit | loan | repayment
+    mobile        optional; matches the member before the name does
+    interest_rate loans only (default 2)
+    payment_type  repayments only: interest | principal
+    loan_ref      optional label tying repayments to a loan in the same
+                  file (unique per loan); without it a repayment goes
+                  to the member's latest loan
+    month, year   deposits only; default the month of `date`
+
+The file is read as a stream and written in batches of
+IMPORT_BATCH_SIZE rows, one transaction of multi-row INSERTs per batch
+(legacy entries, as from the Legacy tab). The batch also saves a
+checkpoint, so importing the same file again resumes after the last
+committed batch. Rows that do not validate are reported and skipped.
+"""
+import csv
+import hashlib
+import io
+import os
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from backend.db import transaction
+from backend.balances import bump_balance
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+DEFAULT_INTEREST_RATE = 2.0
+
+TYPES = {
+    "deposit": "deposit",
+    "loan": "loan",
+    "loan_given": "loan",
+    "repayment": "repayment",
+    "loan_payment": "repayment",
+}
+
+# READING (streaming)
+
+def read_rows(source, name=None):
+    """
+    Yield one dict per data row (lower-case column names).
+    source: a path or a binary file object (e.g. a Streamlit upload).
+    """
+    name = (name or getattr(source, "name", None) or str(source)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        yield from _read_xlsx(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            yield from _read_csv(f)
+    else:
+        text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+        try:
+            yield from _read_csv(text)
+        finally:
+            text.detach()
+
+
+def _read_csv(f):
+    for row in csv.DictReader(f):
+        yield {(k or "").strip().lower(): v for k, v in row.items()}
+
+
+def _load_workbook(source, **options):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("XLSX import needs openpyxl: pip install openpyxl") from None
+    return load_workbook(source, read_only=True, **options)
+
+
+def _read_xlsx(source):
+    workbook = _load_workbook(source, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(c or "").strip().lower() for c in next(rows, ())]
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _chunks(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from iter(lambda: f.read(1 << 20), b"")
+    else:
+        position = source.tell()
+        source.seek(0)
+        yield from iter(lambda: source.read(1 << 20), b"")
+        source.seek(position)
+
+
+def scan_file(source, name=None):
+    """
+    (key, rows): a content hash identifying the file for checkpoints,
+    and its number of data rows (approximate for CSV fields with line
+    breaks; None when an XLSX sheet has no recorded size)
+    """
+    name = (name or getattr(source, "name", None) or str(source)).lower()
+    digest, lines, last = hashlib.sha256(), 0, b"\n"
+    for chunk in _chunks(source):
+        digest.update(chunk)
+        lines += chunk.count(b"\n")
+        last = chunk[-1:]
+    if name.endswith((".xlsx", ".xlsm")):
+        rows = _xlsx_rows(source)
+    else:
+        rows = max(lines + (last != b"\n") - 1, 0)  # less the header
+    return digest.hexdigest()[:16], rows
+
+
+def _xlsx_rows(source):
+    workbook = _load_workbook(source)
+    try:
+        rows = workbook.active.max_row
+    finally:
+        workbook.close()
+        if hasattr(source, "seek"):
+            source.seek(0)
+    return rows - 1 if rows else None
+
+# VALIDATION
+
+def _text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # numbers from XLSX cells (mobile, year)
+    return "" if value is None else str(value).strip()
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    try:
+        return date.fromisoformat(text[:10])  # fast path for YYYY-MM-DD
+    except ValueError:
+        pass
+    for fmt in ("%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"bad date '{text}'")
+
+
+def _parse_number(value, label, cast=int):
+    text = _text(value).replace(",", "")
+    try:
+        number = cast(float(text))
+    except ValueError:
+        raise ValueError(f"bad {label} '{text}'") from None
+    if number <= 0:
+        raise ValueError(f"{label} must be positive")
+    return number
+
+
+def _load_members(cur, shg_id):
+    """Lookup tables: mobile -> id, (first, last) -> id (None when ambiguous)"""
+    cur.execute(
+        "SELECT id, first_name, last_name, mobile FROM members WHERE shg_id=%s",
+        (shg_id,)
+    )
+    by_mobile, by_name = {}, {}
+    for member_id, first, last, mobile in cur.fetchall():
+        mobile = _text(mobile)
+        if mobile:
+            by_mobile[mobile] = None if mobile in by_mobile else member_id
+        key = (_text(first).lower(), _text(last).lower())
+        by_name[key] = None if key in by_name else member_id
+    return by_mobile, by_name
+
+
+def _parse_row(number, row, by_mobile, by_name) -> dict:
+    kind = TYPES.get(_text(row.get("type")).lower())
+    if kind is None:
+        raise ValueError(f"unknown type '{_text(row.get('type'))}'")
+
+    mobile = _text(row.get("mobile"))
+    name = (_text(row.get("first_name")).lower(), _text(row.get("last_name")).lower())
+    member_id = by_mobile.get(mobile) if mobile else None
+    if member_id is None:
+        member_id = by_name.get(name)
+    if member_id is None:
+        who = mobile or " ".join(name).strip()
+        raise ValueError(f"no single member matches '{who}'")
+
+    entry = {
+        "row": number,
+        "kind": kind,
+        "member_id": member_id,
+        "date": _parse_date(row.get("date")),
+        "amount": _parse_number(row.get("amount"), "amount"),
+        "loan_ref": _text(row.get("loan_ref")) or None,
+    }
+
+    if kind == "deposit":
+        entry["month"] = int(_text(row.get("month")) or entry["date"].month)
+        entry["year"] = int(_text(row.get("year")) or entry["date"].year)
+        if not 1 <= entry["month"] <= 12:
+            raise ValueError(f"bad month {entry['month']}")
+    elif kind == "loan":
+        rate = _text(row.get("interest_rate"))
+        entry["rate"] = _parse_number(rate, "interest_rate", float) if rate else DEFAULT_INTEREST_RATE
+    else:
+        entry["payment_type"] = _text(row.get("payment_type")).lower()
+        if entry["payment_type"] not in ("interest", "principal"):
+            raise ValueError(f"bad payment_type '{entry['payment_type']}'")
+    return entry
+
+# BATCH WRITE
+
+def _values(row_sql, count):
+    return ", ".join([row_sql] * count)
+
+
+def _deposit_ids(cur, deposits, lock=False) -> dict:
+    """
+    (member_id, month, year) -> id of the recorded deposits of the
+    batch's members over its years. Filtered by member and year rather
+    than by (member, month, year) tuples, which SQLite cannot look up
+    through the unique index.
+    """
+    members = sorted({e["member_id"] for e in deposits})
+    years = [e["year"] for e in deposits]
+    cur.execute(f"""
+        SELECT member_id, deposit_month, deposit_year, id
+        FROM deposits
+        WHERE member_id IN ({_values("%s", len(members))})
+          AND deposit_year BETWEEN %s AND %s
+        {"FOR UPDATE" if lock else ""}
+    """, (*members, min(years), max(years)))
+    return {tuple(row[:3]): row[3] for row in cur.fetchall()}
+
+
+def _write_batch(cur, shg_id, key, entries, state, stats, rows_done):
+    """Write one batch of parsed entries; runs inside the batch transaction."""
+    txns = []  # (member_id, txn_type, reference_id, amount, entry date)
+    deltas = defaultdict(lambda: [0, 0, 0, 0])  # (year, month) -> savings, loans, principal, interest
+
+    # Deposits: skip months already recorded (in the database or earlier in the file)
+    deposits, seen = [], set()
+    for e in entries:
+        if e["kind"] == "deposit":
+            period = (e["member_id"], e["month"], e["year"])
+            if period in seen:
+                stats["duplicates"] += 1
+            else:
+                seen.add(period)
+                deposits.append(e)
+    if deposits:
+        existing = _deposit_ids(cur, deposits, lock=True)
+        stats["duplicates"] += sum(
+            (e["member_id"], e["month"], e["year"]) in existing for e in deposits
+        )
+        deposits = [e for e in deposits
+                    if (e["member_id"], e["month"], e["year"]) not in existing]
+
+    if deposits:
+        cur.execute(f"""
+            INSERT INTO deposits (shg_id, member_id, amount, deposit_month, deposit_year)
+            VALUES {_values("(%s, %s, %s, %s, %s)", len(deposits))}
+        """, [v for e in deposits
+              for v in (shg_id, e["member_id"], e["amount"], e["month"], e["year"])])
+        deposit_ids = _deposit_ids(cur, deposits)
+        for e in deposits:
+            txns.append((e["member_id"], "deposit",
+                         deposit_ids[(e["member_id"], e["month"], e["year"])],
+                         e["amount"], e["date"]))
+            deltas[(e["year"], e["month"])][0] += e["amount"]
+        stats["deposit"] += len(deposits)
+
+    # Loans, labelled so repayments (and a resumed import) can find them;
+    # a label must be unique in the file or payments would reach the wrong loan
+    loans = []
+    for e in entries:
+        if e["kind"] != "loan":
+            continue
+        label = e["loan_ref"] or f"row{e['row']}"
+        if label in state["loan_refs"] or any(l["label"] == label for l in loans):
+            _error(stats, e["row"], f"loan_ref '{label}' is already used by an earlier loan")
+            continue
+        e["label"] = label
+        e["remarks"] = f"import {key}:{label}"
+        loans.append(e)
+    if loans:
+        cur.execute(f"""
+            INSERT INTO loans (shg_id, member_id, loan_amount, interest_rate, loan_date, remarks)
+            VALUES {_values("(%s, %s, %s, %s, %s, %s)", len(loans))}
+        """, [v for e in loans
+              for v in (shg_id, e["member_id"], e["amount"], e["rate"], e["date"], e["remarks"])])
+        cur.execute(f"""
+            SELECT remarks, id FROM loans
+            WHERE shg_id=%s AND remarks IN ({_values("%s", len(loans))})
+        """, (shg_id, *[e["remarks"] for e in loans]))
+        loan_ids = dict(cur.fetchall())
+        for e in loans:
+            loan_id = loan_ids[e["remarks"]]
+            state["loan_refs"][e["label"]] = (loan_id, e["member_id"])
+            state["latest_loan"][e["member_id"]] = loan_id
+            txns.append((e["member_id"], "loan_given", loan_id, e["amount"], e["date"]))
+            deltas[(e["date"].year, e["date"].month)][1] += e["amount"]
+        stats["loan"] += len(loans)
+
+    # Repayments
+    payments = []
+    for e in entries:
+        if e["kind"] != "repayment":
+            continue
+        if e["loan_ref"]:
+            loan_id, member_id = state["loan_refs"].get(e["loan_ref"], (None, None))
+            if loan_id is not None and member_id != e["member_id"]:
+                loan_id = None
+        else:
+            loan_id = state["latest_loan"].get(e["member_id"])
+        if loan_id is None:
+            _error(stats, e["row"], f"no loan '{e['loan_ref'] or 'for member'}' to repay")
+            continue
+        e["loan_id"] = loan_id
+        payments.append(e)
+
+    if payments:
+        # Lock the loans (as repay_loan does): no other payment to them
+        # can land among this batch's rows
+        paid_loans = sorted({e["loan_id"] for e in payments})
+        cur.execute(
+            f"SELECT id FROM loans WHERE id IN ({_values('%s', len(paid_loans))}) FOR UPDATE",
+            paid_loans
+        )
+        cur.fetchall()
+        cur.execute(f"""
+            INSERT INTO loan_payments (loan_id, amount, payment_type, payment_date)
+            VALUES {_values("(%s, %s, %s, %s)", len(payments))}
+        """, [v for e in payments
+              for v in (e["loan_id"], e["amount"], e["payment_type"], e["date"])])
+
+        # Their ids: every id of the INSERT is at least the first one, but
+        # need not be consecutive (innodb_autoinc_lock_mode=2). Rows with
+        # the same values are interchangeable.
+        cur.execute(f"""
+            SELECT loan_id, payment_type, amount, payment_date, id
+            FROM loan_payments
+            WHERE loan_id IN ({_values("%s", len(paid_loans))}) AND id >= %s
+            ORDER BY id
+        """, (*paid_loans, cur.lastrowid))
+        payment_ids = defaultdict(list)
+        for *values, payment_id in cur.fetchall():
+            payment_ids[tuple(values)].append(payment_id)
+        for e in payments:
+            payment_id = payment_ids[
+                (e["loan_id"], e["payment_type"], e["amount"], e["date"])
+            ].pop(0)
+            txns.append((e["member_id"], "loan_payment", payment_id,
+                         e["amount"], e["date"]))
+            column = 2 if e["payment_type"] == "principal" else 3
+            deltas[(e["date"].year, e["date"].month)][column] += e["amount"]
+        stats["repayment"] += len(payments)
+
+        # Close loans whose principal is now fully repaid
+        repaid_loans = sorted({e["loan_id"] for e in payments
+                               if e["payment_type"] == "principal"})
+        if repaid_loans:
+            cur.execute(f"""
+                UPDATE loans
+                SET status='closed',
+                    closed_date=(
+                        SELECT MAX(p.payment_date) FROM loan_payments p
+                        WHERE p.loan_id = loans.id AND p.payment_type='principal'
+                    )
+                WHERE id IN ({_values("%s", len(repaid_loans))})
+                  AND status='active'
+                  AND loan_amount <= (
+                        SELECT SUM(p.amount) FROM loan_payments p
+                        WHERE p.loan_id = loans.id AND p.payment_type='principal'
+                  )
+            """, repaid_loans)
+
+    # Passbook entries (legacy, dated, with their reference ids)
+    if txns:
+        cur.execute(f"""
+            INSERT INTO transactions (
+                shg_id, member_id, txn_type, reference_id, amount,
+                created_by, is_legacy, created_at
+            )
+            VALUES {_values("(%s, %s, %s, %s, %s, 'president', TRUE, %s)", len(txns))}
+        """, [v for *t, when in txns
+              for v in (shg_id, *t, datetime.combine(when, datetime.min.time()))])
+
+        # History can start before a member was added to the app
+        first_seen = {}
+        for member_id, _, _, _, when in txns:
+            first_seen[member_id] = min(when, first_seen.get(member_id, when))
+        cur.executemany("""
+            UPDATE members
+            SET join_date = LEAST(IFNULL(join_date, %s), %s)
+            WHERE id=%s
+        """, [(when, when, member_id) for member_id, when in first_seen.items()])
+
+    for period, (savings, loans_given, principal, interest) in sorted(deltas.items()):
+        bump_balance(cur, shg_id, savings=savings, loans=loans_given,
+                     principal=principal, interest=interest, period=period)
+
+    cur.execute("""
+        INSERT INTO import_checkpoints (shg_id, import_key, rows_done)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE rows_done = VALUES(rows_done)
+    """, (shg_id, key, rows_done))
+
+
+def _error(stats, row, message):
+    stats["error_count"] += 1
+    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+        stats["errors"].append((row, message))
+
+# IMPORT
+
+def import_ledger(shg_id, source, name=None, batch_size=IMPORT_BATCH_SIZE, progress=None) -> dict:
+    """
+    Import a CSV/XLSX ledger into one SHG (see the module docstring).
+
+    progress(rows_done, stats) is called after each committed batch;
+    stats["total"] is the file's row count (see scan_file).
+    Importing the same file again resumes after its last checkpoint.
+
+    Returns stats: rows (read this run), total, resumed_from, deposit, loan,
+    repayment, duplicates, error_count, errors [(row, message), ...]
+    (first MAX_REPORTED_ERRORS), elapsed, rows_per_second
+    """
+    started = time.perf_counter()
+    key, total = scan_file(source, name)
+    stats = {
+        "rows": 0, "total": total, "resumed_from": 0,
+        "deposit": 0, "loan": 0, "repayment": 0,
+        "duplicates": 0, "error_count": 0, "errors": [],
+    }
+
+    with transaction() as cur:
+        cur.execute(
+            "SELECT rows_done FROM import_checkpoints WHERE shg_id=%s AND import_key=%s",
+            (shg_id, key)
+        )
+        row = cur.fetchone()
+        stats["resumed_from"] = row[0] if row else 0
+
+        by_mobile, by_name = _load_members(cur, shg_id)
+
+        # Loans a repayment can refer to: latest per member, and this
+        # file's labelled loans from an interrupted earlier run
+        cur.execute(
+            "SELECT member_id, MAX(id) FROM loans WHERE shg_id=%s GROUP BY member_id",
+            (shg_id,)
+        )
+        state = {"latest_loan": dict(cur.fetchall()), "loan_refs": {}}
+        cur.execute(
+            "SELECT id, member_id, remarks FROM loans WHERE shg_id=%s AND remarks LIKE %s",
+            (shg_id, f"import {key}:%")
+        )
+        for loan_id, member_id, remarks in cur.fetchall():
+            state["loan_refs"][remarks.split(":", 1)[1]] = (loan_id, member_id)
+
+    def flush(batch, rows_done):
+        with transaction() as cur:
+            _write_batch(cur, shg_id, key, batch, state, stats, rows_done)
+        if progress:
+            progress(rows_done, stats)
+
+    batch, number = [], 0
+    if hasattr(source, "seek"):
+        source.seek(0)
+    for number, row in enumerate(read_rows(source, name), start=1):
+        if number <= stats["resumed_from"]:
+            continue
+        stats["rows"] += 1
+        try:
+            batch.append(_parse_row(number, row, by_mobile, by_name))
+        except ValueError as e:
+            _error(stats, number, str(e))
+        if stats["rows"] % batch_size == 0:
+            flush(batch, number)
+            batch = []
+    if stats["rows"] % batch_size:
+        flush(batch, number)
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed"] = elapsed
+    stats["rows_per_second"] = stats["rows"] / elapsed if elapsed else 0.0
+    return stats
+
+# COMMAND LINE
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m backend.importer <shg_id> <file.csv|file.xlsx>")
+
+    def show(rows_done, stats):
+        print(f"\r{rows_done}/{stats['total'] or '?'} rows  "
+              f"({stats['error_count']} errors)", end="", flush=True)
+
+    result = import_ledger(int(sys.argv[1]), sys.argv[2], progress=show)
+    print()
+    if result["resumed_from"]:
+        print(f"Resumed after row {result['resumed_from']}")
+    for row, message in result["errors"]:
+        print(f"row {row}: {message}")
+    print(
+        f"{result['deposit']} deposits, {result['loan']} loans, "
+        f"{result['repayment']} repayments imported; "
+        f"{result['duplicates']} duplicates, {result['error_count']} errors; "
+        f"{result['rows']} rows in {result['elapsed']:.1f}s "
+        f"({result['rows_per_second']:.0f} rows/s)"
+    )
+    sys.exit(1 if result["error_count"] else 0)
@@ -0,0 +1,504 @@
+"""
+backend/migrations.py
+---------------------
+Numbered schema migrations for live databases.
+
+database/schema.sql creates a fresh database at the latest version.
+Existing databases are upgraded here. Every migration checks what
+already exists before changing it, so running the upgrade twice, or
+on top of a fresh schema.sql, is safe.
+
+    python -m backend.migrations            # apply pending migrations
+    python -m backend.migrations status     # list applied / pending
+    python -m backend.migrations explain 1  # check hot queries use indexes
+
+With DB_BACKEND=sqlite an empty database is created from
+database/schema_sqlite.sql (already at the latest version) and every
+migration is recorded as applied.
+"""
+import re
+from datetime import date, datetime
+from backend.db import transaction, DB_BACKEND, SQLITE_PATH
+from backend.balances import RAW_TOTALS_QUERY, RAW_MONTHLY_QUERY, PERIOD_TOTALS_QUERY
+from backend.calculations import LOAN_STATES_QUERY
+from backend.accrual import ACCRUAL_QUERY
+from backend.dashboard import METRICS_QUERY, ACTIVE_MEMBERS_QUERY
+from backend.history import history_query
+from backend.missed import CALENDAR_QUERY
+from backend.reports import MEMBER_SUMMARY_QUERY
+
+# SCHEMA HELPERS
+
+def _table_exists(cur, table):
+    if DB_BACKEND == "sqlite":
+        cur.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=%s",
+            (table,)
+        )
+        return cur.fetchone()[0] > 0
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cur.fetchone()[0] > 0
+
+
+def _column_exists(cur, table, column):
+    if DB_BACKEND == "sqlite":
+        cur.execute("SELECT COUNT(*) FROM pragma_table_info(%s) WHERE name=%s", (table, column))
+        return cur.fetchone()[0] > 0
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+          AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cur.fetchone()[0] > 0
+
+
+def _index_exists(cur, table, index):
+    if DB_BACKEND == "sqlite":
+        cur.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND tbl_name=%s AND name=%s",
+            (table, index)
+        )
+        return cur.fetchone()[0] > 0
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = %s AND index_name = %s
+    """, (table, index))
+    return cur.fetchone()[0] > 0
+
+
+def _create_index(cur, table, index, columns):
+    if not _index_exists(cur, table, index):
+        cur.execute(f"CREATE INDEX {index} ON {table} ({', '.join(columns)})")
+
+
+def _create_table(cur, table, ddl):
+    """Returns True when the table was created by this call"""
+    if _table_exists(cur, table):
+        return False
+    cur.execute(ddl)
+    return True
+
+# MIGRATIONS
+
+def _001_hot_path_indexes(cur):
+    """
+    Covering indexes for the queries in backend/ and pages/.
+    """
+    # Active member lists (sorted by name), counts, payable list
+    _create_index(cur, "members", "idx_members_shg_status",
+                  ["shg_id", "status", "first_name"])
+    # Active loan lists and counts
+    _create_index(cur, "loans", "idx_loans_shg_status",
+                  ["shg_id", "status", "loan_amount"])
+    # Dashboard members -> active loans join
+    _create_index(cur, "loans", "idx_loans_member_status",
+                  ["member_id", "status"])
+    # Repaid / interest sums per loan
+    _create_index(cur, "loan_payments", "idx_loan_payments_loan_type",
+                  ["loan_id", "payment_type", "amount"])
+    # Recent history (ORDER BY created_at DESC LIMIT n)
+    _create_index(cur, "transactions", "idx_transactions_shg_created",
+                  ["shg_id", "created_at"])
+    # Deposit totals and month calendars
+    _create_index(cur, "deposits", "idx_deposits_shg_period",
+                  ["shg_id", "deposit_year", "deposit_month", "amount"])
+
+
+def _002_sms_outbox_and_balances(cur):
+    """
+    Tables added after the first release: SMS outbox and the
+    running balance counters (backfilled from the ledger).
+    """
+    _create_table(cur, "sms_outbox", """
+        CREATE TABLE sms_outbox (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            shg_id INT NOT NULL,
+            member_id INT,
+            mobile VARCHAR(10),
+            message TEXT,
+            status ENUM('pending','sending','sent','failed') DEFAULT 'pending',
+            attempts INT DEFAULT 0,
+            next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            locked_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_sms_outbox_due (status, next_attempt_at),
+            FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+        )
+    """)
+
+    created = _create_table(cur, "shg_balances", """
+        CREATE TABLE shg_balances (
+            shg_id INT PRIMARY KEY,
+            total_savings BIGINT NOT NULL DEFAULT 0,
+            total_loan_given BIGINT NOT NULL DEFAULT 0,
+            principal_repaid BIGINT NOT NULL DEFAULT 0,
+            interest_collected BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+        )
+    """)
+    if created:
+        # Backfill from the ledger (columns as of this migration)
+        cur.execute("""
+            INSERT INTO shg_balances (
+                shg_id, total_savings, total_loan_given,
+                principal_repaid, interest_collected
+            )
+        """ + RAW_TOTALS_QUERY)
+
+
+def _003_data_version(cur):
+    """
+    Per-SHG data version used as the page cache key.
+    """
+    if not _column_exists(cur, "shg_balances", "data_version"):
+        cur.execute("""
+            ALTER TABLE shg_balances
+            ADD COLUMN data_version BIGINT NOT NULL DEFAULT 0
+            AFTER interest_collected
+        """)
+
+
+def _004_monthly_totals(cur):
+    """
+    Monthly rollup for date-range reports (backfilled from the ledger).
+    """
+    created = _create_table(cur, "shg_monthly_totals", """
+        CREATE TABLE shg_monthly_totals (
+            shg_id INT NOT NULL,
+            year INT NOT NULL,
+            month INT NOT NULL,
+            deposits BIGINT NOT NULL DEFAULT 0,
+            loans_disbursed BIGINT NOT NULL DEFAULT 0,
+            principal_repaid BIGINT NOT NULL DEFAULT 0,
+            interest_collected BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (shg_id, year, month),
+            FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+        )
+    """)
+    if created:
+        cur.execute("""
+            INSERT INTO shg_monthly_totals (
+                shg_id, year, month, deposits, loans_disbursed,
+                principal_repaid, interest_collected
+            )
+        """ + RAW_MONTHLY_QUERY + " GROUP BY shg_id, y, m")
+
+
+def _005_member_status_history(cur):
+    """
+    When members left or came back (for missed-deposit detection).
+    Members who left before this existed get one 'left' entry, dated
+    the month after their last deposit (or their join date).
+    """
+    created = _create_table(cur, "member_status_history", """
+        CREATE TABLE member_status_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            member_id INT NOT NULL,
+            status ENUM('active','left') NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_member_status_history (member_id, changed_at),
+            FOREIGN KEY (member_id) REFERENCES members(id)
+        )
+    """)
+    if created:
+        cur.execute("""
+            INSERT INTO member_status_history (member_id, status, changed_at)
+            SELECT
+                m.id,
+                'left',
+                IFNULL(
+                    MAKEDATE(MAX(d.deposit_year * 12 + d.deposit_month - 1) DIV 12, 1)
+                        + INTERVAL MAX(d.deposit_year * 12 + d.deposit_month - 1) MOD 12 + 1 MONTH,
+                    IFNULL(m.join_date, DATE(m.created_at))
+                )
+            FROM members m
+            LEFT JOIN deposits d ON d.member_id = m.id
+            WHERE m.status = 'left'
+            GROUP BY m.id, m.join_date, m.created_at
+        """)
+
+
+def _006_history_keyset_indexes(cur):
+    """
+    Indexes for keyset-paginated history (backend/history.py).
+    idx_transactions_shg_created already ends in the primary key.
+    """
+    _create_index(cur, "transactions", "idx_transactions_member_created",
+                  ["member_id", "created_at", "id"])
+    _create_index(cur, "transactions", "idx_transactions_shg_type_created",
+                  ["shg_id", "txn_type", "created_at", "id"])
+
+
+def _007_legacy_flag_and_references(cur):
+    """
+    transactions.is_legacy (entries from before the app was used) and
+    an index for looking up the passbook entry of a deposit / loan /
+    payment by reference_id. Older rows keep reference_id NULL.
+    """
+    if not _column_exists(cur, "transactions", "is_legacy"):
+        cur.execute("""
+            ALTER TABLE transactions
+            ADD COLUMN is_legacy BOOLEAN NOT NULL DEFAULT FALSE
+            AFTER created_by
+        """)
+    _create_index(cur, "transactions", "idx_transactions_reference",
+                  ["txn_type", "reference_id"])
+
+
+def _008_import_checkpoints(cur):
+    """
+    Rows committed per imported ledger file (backend/importer.py),
+    so an interrupted import resumes where it stopped.
+    """
+    _create_table(cur, "import_checkpoints", """
+        CREATE TABLE import_checkpoints (
+            shg_id INT NOT NULL,
+            import_key CHAR(16) NOT NULL,
+            rows_done INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (shg_id, import_key),
+            FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+        )
+    """)
+
+
+def _009_loan_states_index(cur):
+    """
+    Loans of an SHG with one status in id order: the loan states query
+    groups and sorts without a temporary table (MySQL filesort, SQLite
+    TEMP B-TREE).
+    """
+    _create_index(cur, "loans", "idx_loans_shg_status_id",
+                  ["shg_id", "status", "id"])
+
+
+def _010_sqlite_entry_timestamps(cur):
+    """
+    SQLite only: backdated passbook entries stored created_at as a bare
+    date, which sorts before every time of that day and broke keyset
+    paging. Store them as midnight, like MySQL (see backend.dialect).
+    """
+    if DB_BACKEND == "sqlite":
+        cur.execute("""
+            UPDATE transactions
+            SET created_at = datetime(created_at)
+            WHERE length(created_at) = 10
+        """)
+
+
+
+def _011_member_name_index(cur):
+    """
+    Members of an SHG in name order, whatever their status: the member
+    summary (reports) is read without a sort.
+    """
+    _create_index(cur, "members", "idx_members_shg_name",
+                  ["shg_id", "first_name", "last_name"])
+
+
+MIGRATIONS = [
+    (1, "hot_path_indexes", _001_hot_path_indexes),
+    (2, "sms_outbox_and_balances", _002_sms_outbox_and_balances),
+    (3, "data_version", _003_data_version),
+    (4, "monthly_totals", _004_monthly_totals),
+    (5, "member_status_history", _005_member_status_history),
+    (6, "history_keyset_indexes", _006_history_keyset_indexes),
+    (7, "legacy_flag_and_references", _007_legacy_flag_and_references),
+    (8, "import_checkpoints", _008_import_checkpoints),
+    (9, "loan_states_index", _009_loan_states_index),
+    (10, "sqlite_entry_timestamps", _010_sqlite_entry_timestamps),
+    (11, "member_name_index", _011_member_name_index),
+]
+
+# RUNNER
+
+def _ensure_version_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def get_applied_versions() -> set:
+    with transaction() as cur:
+        _ensure_version_table(cur)
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
+
+
+def migrate(target=None) -> list:
+    """
+    Apply pending migrations in order, up to `target` (default: all).
+    Each migration runs and is recorded in its own transaction.
+    Note that MySQL commits DDL implicitly; the existence checks make
+    a half-applied migration safe to re-run.
+    Returns the list of versions applied.
+    """
+    if DB_BACKEND == "sqlite":
+        from backend.sqlite_db import init_schema
+
+        if init_schema(SQLITE_PATH):
+            return _record_all(target)
+
+    applied = get_applied_versions()
+    done = []
+    for version, name, apply in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        with transaction() as cur:
+            apply(cur)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name)
+            )
+        done.append(version)
+    return done
+
+def _record_all(target=None) -> list:
+    """Mark migrations as applied (a schema created at the latest version)"""
+    versions = [(v, name) for v, name, _ in MIGRATIONS if target is None or v <= target]
+    with transaction() as cur:
+        cur.executemany(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            versions
+        )
+    return [v for v, _ in versions]
+
+# HOT QUERY PLAN CHECK
+# The queries the pages run on each rerun, taken from the modules that
+# run them, with the tables that must be read through an index. Run
+# against a seeded database: on near-empty tables MySQL may prefer a
+# scan regardless of indexes.
+
+# A cursor past every seeded row: the plan of page 2 onwards
+_HISTORY_CURSOR = (datetime(2100, 1, 1), 2 ** 31 - 1)
+
+
+def hot_queries(shg_id) -> list:
+    """[(name, sql, params)] for one SHG"""
+    this_year = (date.today().year * 12 + 1, date.today().year * 12 + 12)
+    return [
+        ("dashboard metrics", METRICS_QUERY, (shg_id,)),
+        ("active members", ACTIVE_MEMBERS_QUERY, (shg_id,)),
+        ("loan states", LOAN_STATES_QUERY.format(
+            where="l.shg_id=%s AND l.status=%s"
+        ), (shg_id, "active")),
+        ("loan accruals", ACCRUAL_QUERY.format(where="l.shg_id=%s"), (shg_id,)),
+        ("missed deposit calendar", CALENDAR_QUERY.format(
+            member_filter="m.shg_id=%s", deposit_filter="d.shg_id=%s"
+        ), (shg_id,) * 3),
+        ("member summary", MEMBER_SUMMARY_QUERY.format(
+            deposit_filter="shg_id=%s", loan_filter="l.shg_id=%s", member_filter="m.shg_id=%s"
+        ), (shg_id,) * 4),
+        ("period totals", PERIOD_TOTALS_QUERY.format(shg_filter="shg_id=%s"),
+         (shg_id, *this_year)),
+        ("history page", *history_query(shg_id, cursor=_HISTORY_CURSOR)),
+        ("passbook page", *_passbook_query(shg_id)),
+    ]
+
+
+def _passbook_query(shg_id):
+    """One member's passbook page (the SHG's first member)"""
+    with transaction() as cur:
+        cur.execute("SELECT IFNULL(MIN(id), 0) FROM members WHERE shg_id=%s", (shg_id,))
+        member_id = cur.fetchone()[0]
+    return history_query(shg_id, member_id=member_id, cursor=_HISTORY_CURSOR)
+
+
+def explain_hot_queries(shg_id) -> list:
+    """
+    EXPLAIN each hot query for one SHG.
+    Returns one entry per plan row; `ok` is False for a full table
+    scan, a full index scan or a filesort.
+    """
+    if DB_BACKEND == "sqlite":
+        return _explain_sqlite(shg_id)
+
+    report = []
+    with transaction() as cur:
+        for name, query, params in hot_queries(shg_id):
+            cur.execute("EXPLAIN " + query, params)
+            columns = [c[0] for c in cur.description]
+            for row in cur.fetchall():
+                plan = dict(zip(columns, row))
+                extra = plan.get("Extra") or ""
+                table = plan.get("table") or ""
+                report.append({
+                    "query": name,
+                    "table": plan.get("table"),
+                    "type": plan.get("type"),
+                    "key": plan.get("key"),
+                    "rows": plan.get("rows"),
+                    # <derivedN> / <unionN,M>: reads a result built above
+                    "ok": (table.startswith("<") or plan.get("type") not in ("ALL", "index"))
+                          and "filesort" not in extra,
+                })
+    return report
+
+
+_SQLITE_SORT = re.compile(r"TEMP B-TREE FOR .*ORDER BY")
+
+
+def _explain_sqlite(shg_id) -> list:
+    """
+    The same check from EXPLAIN QUERY PLAN: a SCAN of a table, with or
+    without an index, reads all of it; a TEMP B-TREE FOR (any part of
+    the) ORDER BY is a filesort.
+    """
+    report = []
+    with transaction() as cur:
+        for name, query, params in hot_queries(shg_id):
+            cur.execute("EXPLAIN QUERY PLAN " + query, params)
+            for row in cur.fetchall():
+                detail = row[-1]
+                words = detail.split()
+                scan = words[0] == "SCAN" and not words[1].startswith("(")  # subquery results
+                report.append({
+                    "query": name,
+                    "table": words[1] if words[0] in ("SCAN", "SEARCH") else None,
+                    "type": words[0],
+                    "key": detail.split(" INDEX ", 1)[1].split()[0] if " INDEX " in detail
+                           else "PRIMARY" if "PRIMARY KEY" in detail else None,
+                    "rows": None,
+                    "ok": not scan and not _SQLITE_SORT.search(detail),
+                })
+    return report
+
+# COMMAND LINE
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+
+    if command == "upgrade":
+        applied = migrate()
+        print(f"Applied: {applied}" if applied else "Database is up to date")
+
+    elif command == "status":
+        applied = get_applied_versions()
+        for version, name, _ in MIGRATIONS:
+            state = "applied" if version in applied else "pending"
+            print(f"{version:03d} {name:<30} {state}")
+
+    elif command == "explain" and len(sys.argv) > 2:
+        report = explain_hot_queries(int(sys.argv[2]))
+        for r in report:
+            flag = "ok  " if r["ok"] else "SCAN"
+            print(f"{flag} {r['query']:<22} {r['table'] or '-':<14} "
+                  f"type={r['type']} key={r['key']} rows={r['rows']}")
+        sys.exit(0 if all(r["ok"] for r in report) else 1)
+
+    else:
+        sys.exit("usage: python -m backend.migrations [upgrade|status|explain <shg_id>]")
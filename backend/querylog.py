@@ -0,0 +1,320 @@
+"""
+backend/querylog.py
+-------------------
+Query instrumentation: which statements run, how long they take and
+who runs them, per server process and per page rerun.
+
+backend.db wraps every pooled connection (QUERY_LOG=on, the default).
+Each statement is recorded under its fingerprint (the SQL with values,
+placeholders and repeated IN / VALUES lists collapsed, so the same query
+with other arguments counts once) with calls, total / max time, rows
+fetched and the backend function that ran it.
+
+Pages call start_rerun("members") after their auth check and
+finish_rerun() at the end; statements and pool checkouts in between add
+up to one rerun. A rerun cut short by st.rerun() / st.switch_page() is
+closed by the next start_rerun() on the same session thread.
+
+Statements slower than SLOW_QUERY_MS, and reruns over
+RERUN_QUERY_BUDGET statements, are logged as warnings: to the file
+SLOW_QUERY_LOG when it is set, otherwise to stderr.
+
+Cost per statement is one clock pair, a cached fingerprint lookup, a
+short frame walk and a dict update under a lock.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from backend.config import get_setting
+
+QUERY_LOG = get_setting("QUERY_LOG", "on").lower() not in ("off", "0", "false", "no")
+SLOW_QUERY_MS = float(get_setting("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = get_setting("SLOW_QUERY_LOG")  # file path; unset: stderr
+RERUN_QUERY_BUDGET = int(get_setting("RERUN_QUERY_BUDGET", "30"))  # statements per page rerun
+RECENT_RERUNS = 200  # finished reruns kept for get_rerun_stats()
+
+# FINGERPRINTS
+
+_FINGERPRINT_RULES = [
+    (r"'(?:[^'\\]|\\.)*'", "?"),                       # string literals
+    (r"\b\d+(?:\.\d+)?\b", "?"),                       # numbers
+    (r"%s", "?"),
+    (r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(...)"),          # IN (?, ?, ?) / VALUES (?, ?)
+    (r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+", "(...)"),    # multi-row VALUES
+    (r"\s+", " "),
+]
+_FINGERPRINT_RULES = [(re.compile(pattern), repl) for pattern, repl in _FINGERPRINT_RULES]
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Normalised statement text: same query, other values -> same fingerprint"""
+    for pattern, repl in _FINGERPRINT_RULES:
+        sql = pattern.sub(repl, sql)
+    return sql.strip()
+
+# CALLERS
+# The first frame outside the database layer names the statement's owner
+
+_SKIP_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "db.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_db.py"),
+}
+_caller_names = {}
+
+
+def _caller_name(code, module):
+    name = _caller_names.get(code)
+    if name is None:
+        if module == "__main__":  # Streamlit page scripts
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        name = _caller_names[code] = f"{module}.{code.co_name}"
+    return name
+
+
+def _caller():
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename not in _SKIP_FILES and not code.co_filename.endswith("contextlib.py"):
+            return _caller_name(code, frame.f_globals.get("__name__", "?"))
+        frame = frame.f_back
+    return "?"
+
+# SLOW QUERY LOG
+
+_slow_logger = None
+_slow_lock = threading.Lock()
+
+
+def _slow_log():
+    global _slow_logger
+    if _slow_logger is None:
+        with _slow_lock:
+            if _slow_logger is None:
+                logger = logging.getLogger("backend.querylog.slow")
+                logger.setLevel(logging.WARNING)
+                if SLOW_QUERY_LOG:
+                    os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+                    handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+                    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                    logger.addHandler(handler)
+                _slow_logger = logger
+    return _slow_logger
+
+# AGGREGATES
+
+_stats = {}   # fingerprint -> entry
+_stats_lock = threading.Lock()
+_reruns = deque(maxlen=RECENT_RERUNS)
+_local = threading.local()
+
+
+def _new_entry():
+    return {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "callers": {}}
+
+
+def _record(sql, elapsed_ms, rowcount):
+    """Add one statement; returns the entries its fetched rows count towards"""
+    fp = fingerprint(sql)
+    caller = _caller()
+    rerun = getattr(_local, "rerun", None)
+    with _stats_lock:
+        entry = _stats.get(fp)
+        if entry is None:
+            entry = _stats[fp] = _new_entry()
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["callers"][caller] = entry["callers"].get(caller, 0) + 1
+        if rerun is not None:
+            rerun["queries"] += 1
+            rerun["db_ms"] += elapsed_ms
+    if elapsed_ms >= SLOW_QUERY_MS:
+        page = rerun["page"] if rerun is not None else "-"
+        rows = rowcount if rowcount is not None and rowcount >= 0 else "?"
+        _slow_log().warning(
+            f"slow query {elapsed_ms:.1f} ms rows={rows} page={page} caller={caller} | {fp}"
+        )
+    return entry, rerun
+
+
+def _add_rows(entry, rerun, count):
+    if count:
+        with _stats_lock:
+            entry["rows"] += count
+            if rerun is not None:
+                rerun["rows"] += count
+
+
+def record_checkout():
+    """Called by the pool for every connection handed out"""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun["connections"] += 1
+
+# INSTRUMENTED CONNECTIONS
+
+class _Cursor:
+    def __init__(self, cur):
+        self._cur = cur
+        self._entry = None
+        self._rerun = None
+
+    def _done(self, sql, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._entry, self._rerun = _record(sql, elapsed_ms, getattr(self._cur, "rowcount", None))
+
+    def execute(self, sql, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cur.execute(sql, *args, **kwargs)
+        finally:
+            self._done(sql, started)
+
+    def executemany(self, sql, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cur.executemany(sql, *args, **kwargs)
+        finally:
+            self._done(sql, started)
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if row is not None and self._entry is not None:
+            _add_rows(self._entry, self._rerun, 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cur.fetchmany(*args, **kwargs)
+        if self._entry is not None:
+            _add_rows(self._entry, self._rerun, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        if self._entry is not None:
+            _add_rows(self._entry, self._rerun, len(rows))
+        return rows
+
+    def __iter__(self):
+        entry, rerun, count = self._entry, self._rerun, 0
+        try:
+            for row in self._cur:
+                count += 1
+                yield row
+        finally:
+            if entry is not None:
+                _add_rows(entry, rerun, count)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class _Connection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return _Cursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrumented(connect):
+    """Wrap a connect() function so its connections record statements"""
+    if not QUERY_LOG:
+        return connect
+    return lambda: _Connection(connect())
+
+# PAGE RERUNS
+
+def start_rerun(page):
+    """Begin counting a page rerun on this thread (closes an unfinished one)"""
+    if getattr(_local, "rerun", None) is not None:
+        finish_rerun(completed=False)
+    _local.rerun = {
+        "page": page,
+        "started": time.time(),
+        "_t0": time.perf_counter(),
+        "queries": 0,
+        "connections": 0,
+        "rows": 0,
+        "db_ms": 0.0,
+    }
+
+
+def finish_rerun(completed=True):
+    """Close this thread's rerun; returns its totals (None if none was open)"""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    # An interrupted rerun ends at its last statement: only DB totals count
+    elapsed_ms = (time.perf_counter() - rerun.pop("_t0")) * 1000
+    rerun["wall_ms"] = elapsed_ms if completed else None
+    rerun["over_budget"] = rerun["queries"] > RERUN_QUERY_BUDGET
+    with _stats_lock:
+        _reruns.append(rerun)
+    if rerun["over_budget"]:
+        _slow_log().warning(
+            f"rerun over budget page={rerun['page']} queries={rerun['queries']} "
+            f"(budget {RERUN_QUERY_BUDGET}) connections={rerun['connections']} "
+            f"db={rerun['db_ms']:.1f} ms"
+        )
+    return rerun
+
+# REPORTING
+
+def get_query_stats(limit=20) -> list:
+    """Top fingerprints by total time: [{"fingerprint", "calls", "total_ms", ...}]"""
+    with _stats_lock:
+        rows = [
+            {
+                "fingerprint": fp,
+                "calls": e["calls"],
+                "total_ms": e["total_ms"],
+                "mean_ms": e["total_ms"] / e["calls"],
+                "max_ms": e["max_ms"],
+                "rows": e["rows"],
+                "caller": max(e["callers"], key=e["callers"].get),
+            }
+            for fp, e in _stats.items()
+        ]
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows[:limit]
+
+
+def get_rerun_stats() -> dict:
+    """{page: {"reruns", "queries", "connections", "rows", "db_ms", "max_queries", "over_budget"}}
+    averaged over the recent reruns of each page"""
+    with _stats_lock:
+        reruns = list(_reruns)
+    pages = {}
+    for r in reruns:
+        pages.setdefault(r["page"], []).append(r)
+    return {
+        page: {
+            "reruns": len(rs),
+            "queries": sum(r["queries"] for r in rs) / len(rs),
+            "connections": sum(r["connections"] for r in rs) / len(rs),
+            "rows": sum(r["rows"] for r in rs) / len(rs),
+            "db_ms": sum(r["db_ms"] for r in rs) / len(rs),
+            "max_queries": max(r["queries"] for r in rs),
+            "over_budget": sum(r["over_budget"] for r in rs),
+        }
+        for page, rs in pages.items()
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+        _reruns.clear()
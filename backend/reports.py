@@ -0,0 +1,231 @@
+"""
+backend/reports.py
+------------------
+Data layer for the PDF report.
+Each table in the report comes from one grouped query, so building a
+report costs the same handful of queries for 20 members or 2,000.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from backend.db import transaction, dict_rows
+from backend.calculations import get_loan_states
+from backend.balances import MONTHLY_COLUMNS, get_period_totals, get_period_totals_by_shg
+from backend.missed import find_missed_deposits
+
+
+@dataclass(frozen=True)
+class ReportData:
+    shg_id: int
+    shg_name: str
+    village: str
+    period_from: str
+    period_to: str
+    summary: dict          # savings, loan, cash, period (totals in range or None)
+    member_summary: tuple  # of dicts: name, deposit, loan, repaid, balance, missed
+    loan_summary: tuple    # of dicts: name, amount, interest, status
+    shg_number: str = ""
+
+# MEMBER-WISE SUMMARY
+
+MEMBER_SUMMARY_QUERY = """
+    SELECT
+        m.id AS member_id,
+        m.shg_id,
+        m.first_name,
+        m.last_name,
+        m.status,
+        IFNULL(d.deposit, 0) AS deposit,
+        IFNULL(lo.loan, 0) AS loan,
+        IFNULL(rp.repaid, 0) AS repaid
+    FROM members m
+    LEFT JOIN (
+        SELECT member_id, SUM(amount) AS deposit
+        FROM deposits
+        WHERE {deposit_filter}
+        GROUP BY member_id
+    ) d ON d.member_id = m.id
+    LEFT JOIN (
+        SELECT member_id, SUM(loan_amount) AS loan
+        FROM loans l
+        WHERE {loan_filter}
+        GROUP BY member_id
+    ) lo ON lo.member_id = m.id
+    LEFT JOIN (
+        SELECT l.member_id, SUM(p.amount) AS repaid
+        FROM loans l
+        JOIN loan_payments p
+            ON p.loan_id = l.id AND p.payment_type='principal'
+        WHERE {loan_filter}
+        GROUP BY l.member_id
+    ) rp ON rp.member_id = m.id
+    WHERE {member_filter}
+    ORDER BY m.shg_id, m.first_name, m.last_name
+"""
+
+
+def get_member_summary(shg_id=None, cur=None) -> list:
+    """
+    Deposit, loan, principal repaid and loan balance per member,
+    for one SHG or every SHG (shg_id=None).
+    """
+    if shg_id is None:
+        query = MEMBER_SUMMARY_QUERY.format(
+            deposit_filter="1=1", loan_filter="1=1", member_filter="1=1"
+        )
+        params = ()
+    else:
+        query = MEMBER_SUMMARY_QUERY.format(
+            deposit_filter="shg_id=%s",
+            loan_filter="l.shg_id=%s",
+            member_filter="m.shg_id=%s"
+        )
+        params = (shg_id, shg_id, shg_id, shg_id)
+
+    with transaction(cur) as cur:
+        cur.execute(query, params)
+        rows = dict_rows(cur)
+
+    for r in rows:
+        r["name"] = f"{r['first_name']} {r['last_name'] or ''}".strip()
+        r["deposit"] = int(r["deposit"])
+        r["loan"] = int(r["loan"])
+        r["repaid"] = int(r["repaid"])
+        r["balance"] = r["loan"] - r["repaid"]
+    return rows
+
+# LOAN SUMMARY
+
+def get_loan_summary(shg_id=None, cur=None) -> list:
+    """
+    Amount, interest paid and status per loan (active and closed).
+    """
+    return [
+        {
+            "loan_id": l["loan_id"],
+            "shg_id": l["shg_id"],
+            "name": f"{l['first_name']} {l['last_name'] or ''}".strip(),
+            "amount": l["principal"],
+            "interest": l["interest_paid"],
+            "status": l["status"],
+        }
+        for l in get_loan_states(shg_id, cur=cur)
+    ]
+
+# FULL REPORT
+
+REPORT_HEADER_QUERY = """
+    SELECT
+        s.id,
+        s.shg_number,
+        s.shg_name,
+        s.village,
+        IFNULL(b.total_savings, 0),
+        IFNULL(b.total_loan_given, 0)
+    FROM shg_groups s
+    LEFT JOIN shg_balances b ON b.shg_id = s.id
+"""
+
+
+def build_report_data(shg_id, period_from, period_to, cur=None) -> ReportData:
+    """
+    Everything the PDF needs, read on one connection.
+    period_from / period_to are dates (or preformatted strings,
+    in which case there are no period totals).
+    """
+    with transaction(cur) as cur:
+        cur.execute(REPORT_HEADER_QUERY + " WHERE s.id=%s", (shg_id,))
+        header = cur.fetchone()
+
+        member_summary = get_member_summary(shg_id, cur)
+        loan_summary = get_loan_summary(shg_id, cur)
+        _add_missed(member_summary, find_missed_deposits(
+            shg_id, through=_date_or_none(period_to), cur=cur
+        ))
+        period = (
+            get_period_totals(shg_id, period_from, period_to, cur)
+            if _is_date(period_from) and _is_date(period_to) else None
+        )
+
+    return _report_data(
+        header, member_summary, loan_summary, period, period_from, period_to
+    )
+
+
+def build_all_report_data(period_from, period_to, cur=None) -> list:
+    """
+    ReportData for every active SHG, from the same grouped queries as
+    a single report (run once for all SHGs, then split by shg_id), so
+    the query count does not grow with the SHG count.
+    """
+    with transaction(cur) as cur:
+        cur.execute(REPORT_HEADER_QUERY + " WHERE s.is_active = 1 ORDER BY s.id")
+        headers = cur.fetchall()
+
+        member_rows = get_member_summary(None, cur)
+        _add_missed(member_rows, find_missed_deposits(
+            None, through=_date_or_none(period_to), cur=cur
+        ))
+        members_by_shg = defaultdict(list)
+        for row in member_rows:
+            members_by_shg[row["shg_id"]].append(row)
+
+        loans_by_shg = defaultdict(list)
+        for row in get_loan_summary(None, cur):
+            loans_by_shg[row["shg_id"]].append(row)
+
+        periods = (
+            get_period_totals_by_shg(period_from, period_to, cur)
+            if _is_date(period_from) and _is_date(period_to) else None
+        )
+
+    return [
+        _report_data(
+            header,
+            members_by_shg.get(header[0], []),
+            loans_by_shg.get(header[0], []),
+            None if periods is None
+            else periods.get(header[0], dict.fromkeys(MONTHLY_COLUMNS, 0)),
+            period_from,
+            period_to
+        )
+        for header in headers
+    ]
+
+
+def _report_data(header, member_summary, loan_summary, period, period_from, period_to):
+    shg_id, shg_number, shg_name, village, savings, loan = header
+    return ReportData(
+        shg_id=shg_id,
+        shg_name=shg_name,
+        village=village or "",
+        period_from=_format_date(period_from),
+        period_to=_format_date(period_to),
+        summary={
+            "savings": int(savings),
+            "loan": int(loan),
+            "cash": int(savings) - int(loan),
+            "period": period,
+        },
+        member_summary=tuple(member_summary),
+        loan_summary=tuple(loan_summary),
+        shg_number=shg_number,
+    )
+
+
+def _add_missed(member_rows, missed):
+    """Missed deposit months (up to the period end) on each member row"""
+    counts = missed.counts()
+    for r in member_rows:
+        r["missed"] = counts.get(r["member_id"], 0)
+
+
+def _is_date(value):
+    return hasattr(value, "year") and hasattr(value, "month")
+
+
+def _date_or_none(value):
+    return value if _is_date(value) else None
+
+
+def _format_date(value):
+    return value.strftime("%d %b %Y") if hasattr(value, "strftime") else str(value)
@@ -2,25 +2,68 @@
 backend/sms.py
 --------------
 SMS sending logic using Fast2SMS.
+Messages are queued in sms_outbox and delivered by a background
+dispatcher, so pages never wait on the SMS gateway.
 All SMS messages are logged for transparency.
 """
-import os
-import requests
-from dotenv import load_dotenv
-from backend.db import get_db_connection
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend.config import get_setting
+from backend.db import transaction
 
-# Load environment variables
-load_dotenv()
-
-FAST2SMS_API_KEY = os.getenv("FAST2SMS_API_KEY")
+FAST2SMS_API_KEY = get_setting("FAST2SMS_API_KEY")
 FAST2SMS_URL = "https://www.fast2sms.com/dev/bulkV2"
 
+# DISPATCHER SETTINGS (override in .env)
+SMS_GATEWAY_URL = get_setting("SMS_GATEWAY_URL", FAST2SMS_URL)
+SMS_WORKERS = int(get_setting("SMS_WORKERS", "4"))
+SMS_BATCH_SIZE = int(get_setting("SMS_BATCH_SIZE", "20"))
+SMS_MAX_ATTEMPTS = int(get_setting("SMS_MAX_ATTEMPTS", "5"))
+SMS_RETRY_DELAY = int(get_setting("SMS_RETRY_DELAY", "30"))  # seconds, doubles per attempt
+SMS_POLL_INTERVAL = float(get_setting("SMS_POLL_INTERVAL", "2"))
+SMS_LOCK_TIMEOUT = 300  # seconds before a stuck 'sending' row is retried
+
+logger = logging.getLogger(__name__)
+
 # CORE SMS FUNCTION
 
 def send_sms(shg_id, member_id, mobile, message):
     """
-    Send SMS using Fast2SMS and log result.
+    Queue an SMS for background delivery.
+    Returns immediately; the dispatcher sends and logs it.
+    """
+    enqueue_sms_many([(shg_id, member_id, mobile, message)])
+    return True
+
+
+def enqueue_sms_many(messages, cur=None):
+    """
+    Queue many SMS in one INSERT.
+    messages: iterable of (shg_id, member_id, mobile, message)
+    """
+    messages = list(messages)
+    if not messages:
+        return 0
+
+    with transaction(cur) as cur:
+        cur.execute(f"""
+            INSERT INTO sms_outbox (
+                shg_id, member_id, mobile, message
+            )
+            VALUES {", ".join(["(%s, %s, %s, %s)"] * len(messages))}
+        """, [v for row in messages for v in row])
+
+    ensure_dispatcher()
+    return len(messages)
+
+
+def deliver_sms(mobile, message, gateway_url=None):
+    """
+    Post one SMS to the gateway. Returns True when accepted.
     """
+    import requests  # only the dispatcher threads need it
 
     payload = {
         "route": "q",
@@ -35,36 +78,197 @@ def send_sms(shg_id, member_id, mobile, message):
 
     try:
         response = requests.post(
-            FAST2SMS_URL,
+            gateway_url or SMS_GATEWAY_URL,
             json=payload,
             headers=headers,
             timeout=10
         )
-        status = "sent" if response.status_code == 200 else "failed"
+        return response.status_code == 200
     except Exception:
-        status = "failed"
-
-    # Log SMS
-    log_sms(shg_id, member_id, mobile, message, status)
-
-    return status == "sent"
+        return False
 
 # SMS LOGGING
 
 def log_sms(shg_id, member_id, mobile, message, status):
-    conn = get_db_connection()
-    cur = conn.cursor()
+    log_sms_many([(shg_id, member_id, mobile, message, status)])
+
+
+def log_sms_many(rows, cur=None):
+    """
+    rows: iterable of (shg_id, member_id, mobile, message, status)
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    with transaction(cur) as cur:
+        cur.execute(f"""
+            INSERT INTO sms_logs (
+                shg_id, member_id, mobile, message, status
+            )
+            VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))}
+        """, [v for row in rows for v in row])
+
+# BACKGROUND DISPATCHER
+
+class SmsDispatcher:
+    """
+    Drains sms_outbox in the background.
+    - Claims up to `batch_size` due messages at a time
+    - Sends them with at most `workers` requests in flight
+    - Failed sends are retried with exponential backoff
+    - Final outcomes are written to sms_logs in one INSERT per batch
+
+    Several dispatchers (one per server process) can run at once;
+    rows are claimed with SKIP LOCKED so each SMS is sent once.
+    """
 
-    cur.execute("""
-        INSERT INTO sms_logs (
-            shg_id, member_id, mobile, message, status
+    def __init__(
+        self,
+        gateway_url=None,
+        workers=SMS_WORKERS,
+        batch_size=SMS_BATCH_SIZE,
+        max_attempts=SMS_MAX_ATTEMPTS,
+        retry_delay=SMS_RETRY_DELAY,
+        poll_interval=SMS_POLL_INTERVAL
+    ):
+        self.gateway_url = gateway_url or SMS_GATEWAY_URL
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="sms"
         )
-        VALUES (%s, %s, %s, %s, %s)
-    """, (shg_id, member_id, mobile, message, status))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
 
-    conn.commit()
-    cur.close()
-    conn.close()
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="sms-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception:
+                logger.exception("SMS dispatch failed")
+                sent = 0
+            if not sent:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self):
+        with transaction() as cur:
+            cur.execute("""
+                SELECT id, shg_id, member_id, mobile, message, attempts
+                FROM sms_outbox
+                WHERE (status='pending' AND next_attempt_at <= NOW())
+                   OR (status='sending'
+                       AND locked_at < NOW() - INTERVAL %s SECOND)
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (SMS_LOCK_TIMEOUT, self.batch_size))
+            rows = cur.fetchall()
+
+            if rows:
+                cur.execute(f"""
+                    UPDATE sms_outbox
+                    SET status='sending', locked_at=NOW()
+                    WHERE id IN ({", ".join(["%s"] * len(rows))})
+                """, [row[0] for row in rows])
+        return rows
+
+    def drain_once(self):
+        """
+        Send one batch. Returns the number of messages attempted.
+        """
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        results = list(self._executor.map(
+            lambda row: deliver_sms(row[3], row[4], self.gateway_url),
+            rows
+        ))
+
+        done, retry, logs = [], [], []
+        for row, ok in zip(rows, results):
+            outbox_id, shg_id, member_id, mobile, message, attempts = row
+            attempts += 1
+            if ok or attempts >= self.max_attempts:
+                status = "sent" if ok else "failed"
+                done.append((status, attempts, outbox_id))
+                logs.append((shg_id, member_id, mobile, message, status))
+            else:
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                retry.append((attempts, delay, outbox_id))
+
+        with transaction() as cur:
+            if done:
+                cur.executemany("""
+                    UPDATE sms_outbox
+                    SET status=%s, attempts=%s, locked_at=NULL
+                    WHERE id=%s
+                """, done)
+            if retry:
+                cur.executemany("""
+                    UPDATE sms_outbox
+                    SET status='pending',
+                        attempts=%s,
+                        next_attempt_at=NOW() + INTERVAL %s SECOND,
+                        locked_at=NULL
+                    WHERE id=%s
+                """, retry)
+            log_sms_many(logs, cur)
+
+        return len(rows)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_dispatcher(gateway_url=None, **options):
+    """
+    Start the process-wide dispatcher (no-op if already running).
+    Pass gateway_url to send to a different endpoint, e.g. a local
+    stand-in server during testing.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = SmsDispatcher(gateway_url, **options)
+        _dispatcher.start()
+    return _dispatcher
+
+
+def ensure_dispatcher():
+    start_dispatcher().wake()
+
+
+def stop_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.stop()
+            _dispatcher = None
 
 # MESSAGE TEMPLATES (FIXED)
 
@@ -100,3 +304,18 @@ def loan_closed_sms(member_name, loan_amount):
 
 कर्ज स्थिती: बंद
 """.strip()
+
+
+# STANDALONE DISPATCHER
+# python -m backend.sms [gateway_url]
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    start_dispatcher(sys.argv[1] if len(sys.argv) > 1 else None)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        stop_dispatcher()
@@ -0,0 +1,158 @@
+"""
+backend/sqlite_db.py
+--------------------
+Embedded SQLite storage for single-laptop installs (DB_BACKEND=sqlite).
+
+connect() returns a connection with the part of the mysql.connector
+API the app uses (cursor(buffered=, dictionary=), commit, rollback,
+start_transaction, ping, in_transaction), so backend.db's pool and
+every query run unchanged. Statements go through backend.dialect.
+
+Transactions behave like MySQL's (autocommit off): one starts with the
+first statement. It takes SQLite's write lock up front (BEGIN
+IMMEDIATE) when that statement writes or is a SELECT ... FOR UPDATE,
+which is what FOR UPDATE protects on MySQL. The database runs in WAL
+mode, so readers never wait for the writer.
+"""
+import sqlite3
+from decimal import Decimal
+from pathlib import Path
+from datetime import date, datetime
+from backend.config import get_setting
+from backend.dialect import (
+    to_sqlite, is_write, SQL_FUNCTIONS,
+    adapt_date, adapt_datetime, convert_date, convert_timestamp,
+)
+
+SQLITE_BUSY_TIMEOUT = float(get_setting("SQLITE_BUSY_TIMEOUT", "10"))  # seconds
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database" / "schema_sqlite.sql"
+
+sqlite3.register_adapter(date, adapt_date)
+sqlite3.register_adapter(datetime, adapt_datetime)
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("DATE", convert_date)
+sqlite3.register_converter("TIMESTAMP", convert_timestamp)
+
+
+class SQLiteCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cur = connection._conn.cursor()
+        self._dictionary = dictionary
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self._connection._begin(sql)
+        statement = to_sqlite(sql)
+        self._cur.execute(statement, tuple(params or ()))
+        self._set_lastrowid(statement)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._connection._begin(sql)
+        self._cur.executemany(to_sqlite(sql), [tuple(p) for p in seq_of_params])
+        return self
+
+    def _set_lastrowid(self, statement):
+        # MySQL reports the FIRST id of a multi-row INSERT, SQLite the
+        # last; the ids of one INSERT are consecutive in both
+        lastrowid = self._cur.lastrowid
+        if lastrowid and self._cur.rowcount > 1 and statement.lstrip()[:6].upper() == "INSERT":
+            lastrowid -= self._cur.rowcount - 1
+        self.lastrowid = lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([c[0] for c in self._cur.description], row))
+
+    def fetchone(self):
+        return self._row(self._cur.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(r) for r in self._cur.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._cur.fetchall()]
+
+    def __iter__(self):
+        return (self._row(r) for r in self._cur)
+
+    def close(self):
+        self._cur.close()
+
+
+class SQLiteConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(
+            path,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,      # transactions are started by _begin
+            check_same_thread=False,   # pooled: used by one thread at a time
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        for name, (arity, fn) in SQL_FUNCTIONS.items():
+            self._conn.create_function(name, arity, fn, deterministic=True)
+
+    def _begin(self, sql):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE" if is_write(sql) else "BEGIN")
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def cursor(self, buffered=None, dictionary=False, **_):
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def start_transaction(self, consistent_snapshot=False, readonly=False, **_):
+        # A WAL read transaction already sees one consistent snapshot
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+
+    def rollback(self):
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1").fetchone()
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path) -> SQLiteConnection:
+    return SQLiteConnection(path)
+
+
+def init_schema(path) -> bool:
+    """
+    Create the tables from database/schema_sqlite.sql in an empty
+    database. Returns True when the schema was created by this call.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='shg_groups'"
+        ).fetchone()[0]
+        if exists:
+            return False
+        conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+        return True
+    finally:
+        conn.close()
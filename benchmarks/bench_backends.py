@@ -0,0 +1,58 @@
+"""
+benchmarks/bench_backends.py
+----------------------------
+Page latency on MySQL vs embedded SQLite.
+
+    python -m benchmarks.bench_backends [tier ...]     # default: small medium
+
+Runs the benchmark suite (benchmarks/suite.py) once per storage backend,
+each in its own process since DB_BACKEND is read at import, and prints
+the page data-loading cases side by side. MySQL uses the DB_* settings
+from .env; SQLite uses BENCH_SQLITE_PATH (default bench_shg.db, created
+on first use). Both must be scratch databases (see seed.py).
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from backend.config import get_setting
+
+BACKENDS = ("mysql", "sqlite")
+DEFAULT_TIERS = ["small", "medium"]
+
+
+def run_suite(backend, tiers) -> dict:
+    env = dict(os.environ, DB_BACKEND=backend)
+    if backend == "sqlite":
+        env["SQLITE_PATH"] = get_setting("BENCH_SQLITE_PATH", "bench_shg.db")
+        subprocess.run([sys.executable, "-m", "backend.migrations"], env=env, check=True)
+
+    fd, path = tempfile.mkstemp(suffix=f"_{backend}.json")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "run", path, *tiers],
+            env=env, check=True, stdout=subprocess.DEVNULL
+        )
+        with open(path) as f:
+            return json.load(f)["results"]
+    finally:
+        os.remove(path)
+
+
+def main(tiers):
+    results = {backend: run_suite(backend, tiers) for backend in BACKENDS}
+    for tier in tiers:
+        print(f"== {tier}")
+        print(f"{'case':<38} {'mysql ms':>10} {'sqlite ms':>10} {'ratio':>7}")
+        for name, mysql in results["mysql"][tier].items():
+            if not name.startswith("page:"):
+                continue
+            sqlite = results["sqlite"][tier][name]
+            ratio = sqlite["ms"] / mysql["ms"] if mysql["ms"] else float("nan")
+            print(f"{name:<38} {mysql['ms']:>10.2f} {sqlite['ms']:>10.2f} {ratio:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_TIERS)
@@ -0,0 +1,34 @@
+"""
+benchmarks/bench_charts.py
+--------------------------
+Dashboard chart memory over many reruns.
+
+    python -m benchmarks.bench_charts [reruns]
+
+Simulates dashboard reruns where the totals change every few reruns
+(more distinct values than the cache holds, so entries get evicted)
+and prints cache, figure and RSS metrics as it goes. Open figures
+should stay at 0 and RSS should level off once the cache is full.
+"""
+import sys
+import time
+from backend.charts import donut_png, chart_stats, CHART_CACHE_SIZE
+
+
+def main(reruns=5000):
+    distinct = CHART_CACHE_SIZE * 2
+    started = time.perf_counter()
+    for i in range(reruns):
+        value = (i // 3) % distinct  # same numbers for a few reruns, then new ones
+        donut_png(10000 + value * 100, 5000 + value * 50)
+        if (i + 1) % 500 == 0:
+            s = chart_stats()
+            rss = f"{s['rss_bytes'] / 2**20:7.1f} MiB" if s["rss_bytes"] else "n/a"
+            print(f"{i + 1:>6} reruns  hits {s['hits']:>6}  misses {s['misses']:>5}  "
+                  f"cached {s['cached']:>4}  open figures {s['open_figures']}  rss {rss}")
+    elapsed = time.perf_counter() - started
+    print(f"{reruns} reruns in {elapsed:.1f}s ({elapsed / reruns * 1000:.2f} ms/rerun)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
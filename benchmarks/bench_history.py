@@ -0,0 +1,66 @@
+"""
+benchmarks/bench_history.py
+---------------------------
+History page time by depth: keyset cursor vs OFFSET.
+
+    python -m benchmarks.bench_history [members] [years]
+
+Walks every page of a seeded SHG's history with get_history and
+prints the fetch time at increasing depths, next to the same page
+read with LIMIT/OFFSET. Keyset times should stay flat; OFFSET times
+grow with the depth.
+"""
+import statistics
+import sys
+import time
+from backend.db import transaction
+from backend.history import get_history, HISTORY_PAGE_SIZE
+from benchmarks.seed import seed_shg
+
+DEPTHS = [1, 10, 100, 500, 1000, 2000]
+
+
+def _offset_page(shg_id, page):
+    with transaction() as cur:
+        cur.execute("""
+            SELECT t.id, t.created_at, t.member_id, m.first_name, m.last_name,
+                   t.txn_type, t.amount, t.reference_id
+            FROM transactions t
+            LEFT JOIN members m ON m.id = t.member_id
+            WHERE t.shg_id=%s
+            ORDER BY t.created_at DESC, t.id DESC
+            LIMIT %s OFFSET %s
+        """, (shg_id, HISTORY_PAGE_SIZE, (page - 1) * HISTORY_PAGE_SIZE))
+        return cur.fetchall()
+
+
+def _timed(fn, runs=5):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main(members=500, years=10):
+    shg_id = seed_shg(members, years=years)
+
+    # Walk all pages once, keeping the cursor that starts each one
+    cursors = [None]
+    while True:
+        page = get_history(shg_id, cursor=cursors[-1])
+        if page.next_cursor is None:
+            break
+        cursors.append(page.next_cursor)
+    print(f"{members} members x {years} years: {len(cursors)} pages of {HISTORY_PAGE_SIZE}")
+
+    for depth in [d for d in DEPTHS if d <= len(cursors)]:
+        keyset = _timed(lambda: get_history(shg_id, cursor=cursors[depth - 1]))
+        offset = _timed(lambda: _offset_page(shg_id, depth))
+        print(f"page {depth:>5}  keyset {keyset * 1000:7.2f} ms  "
+              f"offset {offset * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,77 @@
+"""
+benchmarks/bench_import.py
+--------------------------
+Bulk ledger import throughput.
+
+    python -m benchmarks.bench_import [rows] [members]
+
+Seeds an SHG (members only, one year of deposits), writes a CSV of
+`rows` older entries for it (monthly deposits going back in time, with
+a loan and its repayments for every tenth member) and imports it with
+import_ledger, printing rows per second and the process's peak memory.
+"""
+import csv
+import os
+import sys
+import tempfile
+import resource
+from datetime import date
+from backend.importer import import_ledger, IMPORT_BATCH_SIZE
+from benchmarks.seed import seed_shg
+
+HEADER = ["date", "type", "first_name", "last_name", "mobile", "amount",
+          "interest_rate", "payment_type", "loan_ref", "month", "year"]
+
+
+def write_ledger(path, rows, members):
+    """CSV of `rows` entries dated before the seeded year, oldest first"""
+    months_back = rows // members + 24
+    start = date.today().year * 12 + date.today().month - 1 - 12 - months_back
+    written, loans = 0, set()
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow(HEADER)
+        for index in range(start, start + months_back):
+            y, m = divmod(index, 12)
+            m += 1
+            for i in range(members):
+                if written >= rows:
+                    return written
+                mobile = str(9000000000 + i)
+                ref = f"L{i}-{y}"
+                if i % 10 == 0 and index % 12 == 0:
+                    out.writerow([date(y, m, 10), "loan", "", "", mobile, 10000, 2,
+                                  "", ref, "", ""])
+                    loans.add(ref)
+                elif ref in loans and index % 12 in (4, 8):
+                    out.writerow([date(y, m, 15), "repayment", "", "", mobile, 5000, "",
+                                  "principal", ref, "", ""])
+                else:
+                    out.writerow([date(y, m, 5), "deposit", "", "", mobile, 500, "",
+                                  "", "", m, y])
+                written += 1
+    return written
+
+
+def main(rows=100_000, members=1000):
+    shg_id = seed_shg(members, years=1, loan_ratio=0)
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        written = write_ledger(path, rows, members)
+        print(f"{written} rows for {members} members, batches of {IMPORT_BATCH_SIZE}")
+
+        stats = import_ledger(shg_id, path)
+    finally:
+        os.remove(path)
+
+    print(f"imported {stats['deposit']} deposits, {stats['loan']} loans, "
+          f"{stats['repayment']} repayments ({stats['error_count']} errors, "
+          f"{stats['duplicates']} duplicates)")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+    print(f"{stats['elapsed']:.2f} s  {stats['rows_per_second']:.0f} rows/s  "
+          f"peak RSS {peak:.0f} MB (seeding included)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,98 @@
+"""
+benchmarks/bench_missed.py
+--------------------------
+Missed-deposit detection at 5,000 members x 10 years.
+
+    python -m benchmarks.bench_missed             # seeded scratch database
+    python -m benchmarks.bench_missed synthetic   # matrix build only, no database
+
+The database run times the calendar query and the numpy matrix build
+separately (find_missed_deposits = one query + one build). The
+synthetic run builds the same calendar in memory, so the vectorized
+pass can be timed anywhere.
+"""
+import statistics
+import sys
+import time
+from datetime import date
+import numpy as np
+from backend.db import transaction
+from backend.missed import (
+    CALENDAR_QUERY, MEMBER, DEPOSIT, build_missed, month_index
+)
+
+MEMBERS = 5000
+YEARS = 10
+MISS_RATIO = 0.05
+RUNS = 5
+
+
+def _median_time(fn, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def synthetic_calendar(members=MEMBERS, years=YEARS, miss_ratio=MISS_RATIO, seed=0):
+    """CALENDAR_QUERY-shaped rows: every member joined `years` ago"""
+    rng = np.random.default_rng(seed)
+    last = month_index(date.today()) - 1
+    first = last - years * 12 + 1
+    ids = np.arange(1, members + 1)
+
+    member_rows = np.column_stack([
+        np.full(members, MEMBER), ids, np.full(members, first),
+        np.ones(members), np.full(members, 500)
+    ])
+    member_of, month = np.meshgrid(ids, np.arange(first, last + 1), indexing="ij")
+    paid = rng.random(member_of.shape) >= miss_ratio
+    deposit_rows = np.column_stack([
+        np.full(paid.sum(), DEPOSIT), member_of[paid], month[paid],
+        np.ones(paid.sum()), np.full(paid.sum(), 500)
+    ])
+    return np.vstack([member_rows, deposit_rows]).astype(np.int64), int((~paid).sum())
+
+
+def run_synthetic():
+    calendar, expected = synthetic_calendar()
+    rows = [tuple(r) for r in calendar.tolist()]  # as the driver returns them
+    missed = build_missed(rows)
+    assert sum(missed.counts().values()) == expected
+
+    build = _median_time(lambda: build_missed(rows))
+    print(f"{MEMBERS} members x {YEARS} years, {len(rows):,} calendar rows")
+    print(f"matrix build {build * 1000:8.1f} ms  ({expected:,} missed months)")
+
+
+def run_database():
+    from benchmarks.seed import seed_shg
+
+    shg_id = seed_shg(MEMBERS, years=YEARS, miss_ratio=MISS_RATIO)
+    query = CALENDAR_QUERY.format(
+        member_filter="m.shg_id=%s", deposit_filter="d.shg_id=%s"
+    )
+
+    def fetch():
+        with transaction() as cur:
+            cur.execute(query, (shg_id, shg_id, shg_id))
+            return cur.fetchall()
+
+    rows = fetch()
+    fetch_time = _median_time(fetch)
+    build = _median_time(lambda: build_missed(rows))
+    missed = build_missed(rows)
+
+    print(f"{MEMBERS} members x {YEARS} years, {len(rows):,} calendar rows")
+    print(f"query        {fetch_time * 1000:8.1f} ms")
+    print(f"matrix build {build * 1000:8.1f} ms  "
+          f"({sum(missed.counts().values()):,} missed months)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "synthetic":
+        run_synthetic()
+    else:
+        run_database()
@@ -0,0 +1,61 @@
+"""
+benchmarks/bench_report.py
+--------------------------
+Report build time from 20 to 2,000 members.
+
+    python -m benchmarks.bench_report
+
+build_report_data issues the same three grouped queries whatever the
+member count: no per-member round trips, so its time stays close to
+flat and grows only with the rows MySQL aggregates. Rendering the PDF
+grows with the number of table rows and is reported separately.
+"""
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+from backend.reports import build_report_data
+from pdf.generator import render_report
+from benchmarks.seed import seed_shg
+
+TIERS = [20, 200, 2000]
+RUNS = 5
+
+
+def _median_time(fn, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    today = date.today()
+    results = []
+    for members in TIERS:
+        shg_id = seed_shg(members, years=1)
+        build = _median_time(
+            lambda: build_report_data(shg_id, today.replace(day=1), today)
+        )
+
+        report = build_report_data(shg_id, today.replace(day=1), today)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+            path = tmp.name
+        started = time.perf_counter()
+        render_report(path, report)
+        render = time.perf_counter() - started
+        os.unlink(path)
+
+        results.append((members, build, render))
+        print(f"{members:>6} members  build {build * 1000:8.1f} ms  "
+              f"render {render * 1000:8.1f} ms")
+
+    ratio = results[-1][1] / results[0][1]
+    print(f"build time {TIERS[-1]} vs {TIERS[0]} members: x{ratio:.1f}")
+
+
+if __name__ == "__main__":
+    main()
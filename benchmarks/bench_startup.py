@@ -0,0 +1,107 @@
+"""
+benchmarks/bench_startup.py
+---------------------------
+Cold-start import cost of each entry page.
+
+    python -m benchmarks.bench_startup [budget_ms]
+
+For app.py and every page, the module-level imports are read from the
+source and timed in a fresh interpreter (streamlit itself is imported
+first and not counted: the server has it loaded already). The slowest
+modules are listed from `python -X importtime`. Exits non-zero when a
+page exceeds the budget (COLD_START_BUDGET_MS, default 250 ms).
+"""
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+ENTRY_PAGES = ["app.py", *sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py"))]
+DEFAULT_BUDGET_MS = 250
+
+_PROBE = """
+import json, sys, time
+try:
+    import streamlit
+except ImportError:
+    pass
+modules = json.loads(sys.argv[1])
+started = time.perf_counter()
+for name in modules:
+    __import__(name)
+print(json.dumps({"ms": (time.perf_counter() - started) * 1000}))
+"""
+
+
+def page_imports(path):
+    """Modules imported at module level (not inside functions)"""
+    modules = []
+    pending = [ast.parse((ROOT / path).read_text(encoding="utf-8"))]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+        pending += [
+            child for child in ast.iter_child_nodes(node)
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda))
+        ]
+    return [m for m in dict.fromkeys(modules) if m.split(".")[0] != "streamlit"]
+
+
+def _probe(modules):
+    """
+    Import modules in a fresh interpreter. Returns (ms, {module: cumulative us})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, json.dumps(modules)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = json.loads(result.stdout.strip().splitlines()[-1])["ms"]
+
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative[parts[2].strip()] = int(parts[1])
+    return total, cumulative
+
+
+def measure(path, baseline):
+    """Import time of one page, and its slowest modules beyond the baseline"""
+    modules = page_imports(path)
+    total, cumulative = _probe(modules)
+    slowest = sorted(
+        ((us, name) for name, us in cumulative.items() if name not in baseline),
+        reverse=True
+    )
+    return total, modules, slowest[:5]
+
+
+def main(budget_ms):
+    # Modules loaded before timing starts (interpreter start-up, streamlit)
+    _, baseline = _probe([])
+    over = []
+    for path in ENTRY_PAGES:
+        total, modules, slowest = measure(path, baseline)
+        flag = "ok  " if total <= budget_ms else "OVER"
+        print(f"{flag} {path:<22} {total:7.1f} ms  ({len(modules)} imports)")
+        for cumulative_us, name in slowest:
+            print(f"       {cumulative_us / 1000:7.1f} ms  {name}")
+        if total > budget_ms:
+            over.append(path)
+
+    print(f"budget {budget_ms} ms: " + ("all pages within budget" if not over else f"over: {', '.join(over)}"))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else float(
+        os.getenv("COLD_START_BUDGET_MS", DEFAULT_BUDGET_MS)
+    )
+    sys.exit(main(budget))
@@ -0,0 +1,152 @@
+"""
+benchmarks/seed.py
+------------------
+Synthetic SHG data for the benchmarks.
+
+Rows are written straight into the database configured in .env, so
+point DB_NAME (or SQLITE_PATH with DB_BACKEND=sqlite) at a scratch
+database: seeding refuses to run unless the name contains "bench" or
+"test".
+"""
+import os
+import random
+import time
+from datetime import date, datetime
+from backend.db import transaction, DB_BACKEND, SQLITE_PATH
+from backend.balances import rebuild_balances
+
+CHUNK = 1000
+
+
+def check_scratch_db():
+    setting = "SQLITE_PATH" if DB_BACKEND == "sqlite" else "DB_NAME"
+    name = SQLITE_PATH if DB_BACKEND == "sqlite" else os.getenv("DB_NAME", "")
+    if "bench" not in name and "test" not in name:
+        raise SystemExit(
+            f"Refusing to seed '{name}': set {setting} to a scratch database "
+            "whose name contains 'bench' or 'test'."
+        )
+
+
+def insert_many(cur, table, columns, rows):
+    """Multi-row INSERT in chunks of CHUNK rows"""
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    for i in range(0, len(rows), CHUNK):
+        chunk = rows[i:i + CHUNK]
+        cur.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES {', '.join([row_sql] * len(chunk))}",
+            [v for row in chunk for v in row]
+        )
+
+
+def _months_back(today, count):
+    """The last `count` (year, month) pairs, oldest first"""
+    index = today.year * 12 + today.month - 1
+    return [divmod(i, 12) for i in range(index - count + 1, index + 1)]
+
+
+def seed_shg(members=20, years=1, loan_ratio=0.3, miss_ratio=0.05, seed=0) -> int:
+    """
+    Create one SHG with `members` members and `years` of history:
+    monthly deposits (a few missed), loans for `loan_ratio` of the
+    members with monthly interest and some principal repayments, and
+    the matching passbook entries. Returns the new shg_id.
+    """
+    check_scratch_db()
+    rnd = random.Random(seed)
+    months = [(y, m + 1) for y, m in _months_back(date.today(), years * 12)]
+
+    with transaction() as cur:
+        number = f"BENCH-{members}x{years}-{time.time_ns()}"
+        cur.execute("""
+            INSERT INTO shg_groups (
+                shg_number, shg_name, village,
+                president_username, president_password
+            )
+            VALUES (%s, %s, %s, %s, %s)
+        """, (number, f"Bench {members}x{years}", "Benchpur", number, "bench"))
+        shg_id = cur.lastrowid
+
+        first_year, first_month = months[0]
+        insert_many(cur, "members",
+                    ["shg_id", "first_name", "last_name", "mobile",
+                     "monthly_deposit", "join_date"],
+                    [(shg_id, f"Member{i}", "Bench", str(9000000000 + i),
+                      500, date(first_year, first_month, 1))
+                     for i in range(members)])
+        cur.execute("SELECT id FROM members WHERE shg_id=%s ORDER BY id", (shg_id,))
+        member_ids = [row[0] for row in cur.fetchall()]
+
+        deposits, txns = [], []
+        for member_id in member_ids:
+            for y, m in months:
+                if rnd.random() < miss_ratio:
+                    continue
+                deposits.append((shg_id, member_id, 500, m, y))
+                txns.append((shg_id, member_id, "deposit", 500, "president",
+                             datetime(y, m, 5, 10, 0, 0)))
+        insert_many(cur, "deposits",
+                    ["shg_id", "member_id", "amount", "deposit_month", "deposit_year"],
+                    deposits)
+
+        borrowers = rnd.sample(member_ids, int(len(member_ids) * loan_ratio))
+        loans = []
+        for member_id in borrowers:
+            y, m = months[rnd.randrange(len(months))]
+            loans.append((shg_id, member_id, rnd.choice([5000, 10000, 20000]),
+                          2, date(y, m, 10), "active"))
+        insert_many(cur, "loans",
+                    ["shg_id", "member_id", "loan_amount", "interest_rate",
+                     "loan_date", "status"],
+                    loans)
+        cur.execute("""
+            SELECT id, member_id, loan_amount, loan_date
+            FROM loans WHERE shg_id=%s ORDER BY id
+        """, (shg_id,))
+        loan_rows = cur.fetchall()
+
+        payments, closed = [], []
+        for loan_id, member_id, amount, loan_date in loan_rows:
+            txns.append((shg_id, member_id, "loan_given", amount, "president",
+                         datetime.combine(loan_date, datetime.min.time())))
+            outstanding = amount
+            start = months.index((loan_date.year, loan_date.month))
+            for y, m in months[start + 1:]:
+                paid_on = date(y, m, 15)
+                interest = outstanding * 2 // 100
+                payments.append((loan_id, "interest", interest, paid_on))
+                txns.append((shg_id, member_id, "loan_payment", interest,
+                             "president", datetime(y, m, 15, 11, 0, 0)))
+                if rnd.random() < 0.2:
+                    principal = min(outstanding, amount // 4)
+                    outstanding -= principal
+                    payments.append((loan_id, "principal", principal, paid_on))
+                    txns.append((shg_id, member_id, "loan_payment", principal,
+                                 "president", datetime(y, m, 15, 11, 5, 0)))
+                if outstanding == 0:
+                    closed.append((paid_on, loan_id))
+                    break
+
+        insert_many(cur, "loan_payments",
+                    ["loan_id", "payment_type", "amount", "payment_date"],
+                    payments)
+        if closed:
+            cur.executemany("""
+                UPDATE loans SET status='closed', closed_date=%s WHERE id=%s
+            """, closed)
+        insert_many(cur, "transactions",
+                    ["shg_id", "member_id", "txn_type", "amount",
+                     "created_by", "created_at"],
+                    txns)
+
+    rebuild_balances(shg_id)
+    return shg_id
+
+
+if __name__ == "__main__":
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    y = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    print(f"Seeded SHG id {seed_shg(n, y)} ({n} members, {y} years)")
@@ -0,0 +1,301 @@
+"""
+benchmarks/suite.py
+-------------------
+Backend benchmark suite at several SHG sizes.
+
+    python -m benchmarks.suite run results.json [small medium large]
+    python -m benchmarks.suite compare baseline.json results.json
+
+`run` seeds one SHG per tier in the scratch database (see seed.py) and
+calls every backend read and write a page can trigger, plus each page's
+data loading as a whole. For every case it records the median time,
+the statements executed and the pool checkouts (connections) per call,
+prints a table and saves JSON:
+
+    {"meta": {...}, "results": {tier: {case: {"ms", "queries", "connections"}}}}
+
+`compare` exits 1 when a case in the second file is slower than the
+baseline by more than BENCH_MAX_SLOWDOWN (and BENCH_MIN_MS), or issues
+more queries or connections per call.
+
+Not covered: PDF rendering and charts (bench_report, bench_charts),
+SMS delivery, and the importer (bench_import).
+"""
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from backend import db
+from backend.config import get_setting
+from backend import (
+    accrual, api, auth, balances, cache, calculations, dashboard,
+    export, history, migrations, missed, reports,
+)
+from benchmarks.seed import seed_shg
+
+TIERS = {
+    "small": (20, 1),       # members, years of history
+    "medium": (200, 5),
+    "large": (2000, 10),
+}
+RUNS = 5
+BENCH_MAX_SLOWDOWN = float(get_setting("BENCH_MAX_SLOWDOWN", "1.5"))
+BENCH_MIN_MS = float(get_setting("BENCH_MIN_MS", "2"))  # ignore slowdowns below this
+
+# QUERY AND CONNECTION COUNTING
+
+_queries = 0
+
+
+class _CountingCursor:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, *args, **kwargs):
+        global _queries
+        _queries += 1
+        return self._cur.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        global _queries
+        _queries += 1
+        return self._cur.executemany(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class _CountingConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def install_counters():
+    """Replace the module pool with one whose connections count statements"""
+    db._pool = db.ConnectionPool(connect=lambda: _CountingConnection(db._connect()))
+
+
+def measure(fn, runs=RUNS) -> dict:
+    """Median time of `runs` calls after one warm-up, with per-call counts"""
+    fn()
+    times, counts = [], None
+    for _ in range(runs):
+        queries, checkouts = _queries, db.get_pool_stats()["checkouts"]
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+        if counts is None:
+            counts = (_queries - queries, db.get_pool_stats()["checkouts"] - checkouts)
+    return {
+        "ms": round(statistics.median(times) * 1000, 3),
+        "queries": counts[0],
+        "connections": counts[1],
+    }
+
+# CASES
+
+def _context(members, years):
+    """Seed one SHG and pick ids to call the backend with"""
+    shg_id = seed_shg(members, years=years)
+    with db.transaction() as cur:
+        cur.execute("SELECT shg_number FROM shg_groups WHERE id=%s", (shg_id,))
+        shg_number = cur.fetchone()[0]
+        cur.execute(
+            "SELECT id, first_name, last_name, mobile FROM members WHERE shg_id=%s ORDER BY id",
+            (shg_id,)
+        )
+        member_rows = cur.fetchall()
+        cur.execute(
+            "SELECT id FROM loans WHERE shg_id=%s AND status='active' ORDER BY id LIMIT 1",
+            (shg_id,)
+        )
+        loan = cur.fetchone()
+
+    today = date.today()
+    return {
+        "shg_id": shg_id,
+        "shg_number": shg_number,
+        "member": member_rows[0],
+        "member_ids": [r[0] for r in member_rows],
+        "loan_id": loan[0] if loan else None,
+        "period_from": date(today.year - years + 1, 1, 1),
+        "period_to": today,
+    }
+
+
+def _members_page(shg_id):
+    # Mirrors the data loading of pages/members.py
+    cache.get_data_version(shg_id)
+    with db.transaction() as cur:
+        cur.execute("""
+            SELECT id, first_name, last_name, mobile, monthly_deposit
+            FROM members WHERE shg_id=%s AND status='active' ORDER BY first_name
+        """, (shg_id,))
+        cur.fetchall()
+    calculations.get_loan_states(shg_id, status="active")
+    missed.get_missed_summary(shg_id)
+    history.get_history(shg_id)
+    calculations.get_loan_states(shg_id, status="closed")
+
+
+def cases(ctx) -> dict:
+    """{name: zero-argument callable}"""
+    shg_id, loan_id = ctx["shg_id"], ctx["loan_id"]
+    member_id, first, last, mobile = ctx["member"]
+    period = (ctx["period_from"], ctx["period_to"])
+    years = itertools.count(2200)  # far-future deposit months never collide
+    export_path = os.path.join(tempfile.gettempdir(), f"bench_export_{shg_id}.zip")
+
+    def give_and_repay():
+        new_loan = api.give_loan(shg_id, member_id, 1000, 2)
+        api.repay_loan(new_loan, 20, "interest")
+
+    reads = {
+        "auth.shg_exists": lambda: auth.shg_exists(ctx["shg_number"]),
+        "auth.get_shg_id (uncached)": lambda: auth.get_shg_id.__wrapped__(ctx["shg_number"]),
+        "auth.president_login": lambda: auth.president_login(
+            ctx["shg_number"], ctx["shg_number"], "bench"),
+        "auth.member_login": lambda: auth.member_login(ctx["shg_number"], first, last, mobile),
+        "cache.get_data_version": lambda: cache.get_data_version(shg_id),
+        "calculations.get_total_savings": lambda: calculations.get_total_savings(shg_id),
+        "calculations.get_wallet_balance": lambda: calculations.get_wallet_balance(shg_id),
+        "calculations.get_loan_states": lambda: calculations.get_loan_states(shg_id),
+        "balances.get_balance": lambda: balances.get_balance(shg_id),
+        "balances.get_period_totals": lambda: balances.get_period_totals(shg_id, *period),
+        "balances.get_period_totals_by_shg": lambda: balances.get_period_totals_by_shg(*period),
+        "balances.verify_balances": lambda: balances.verify_balances(shg_id),
+        "accrual.get_loan_accruals": lambda: accrual.get_loan_accruals(shg_id),
+        "dashboard.get_dashboard_snapshot": lambda: dashboard.get_dashboard_snapshot(shg_id),
+        "history.get_history": lambda: history.get_history(shg_id),
+        "history.get_history (member)": lambda: history.get_history(shg_id, member_id=member_id),
+        "missed.find_missed_deposits": lambda: missed.find_missed_deposits(shg_id),
+        "missed.get_missed_summary": lambda: missed.get_missed_summary(shg_id),
+        "reports.get_member_summary": lambda: reports.get_member_summary(shg_id),
+        "reports.get_loan_summary": lambda: reports.get_loan_summary(shg_id),
+        "reports.build_report_data": lambda: reports.build_report_data(shg_id, *period),
+        "migrations.explain_hot_queries": lambda: migrations.explain_hot_queries(shg_id),
+        "export.export_ledger": lambda: export.export_ledger(export_path, shg_id),
+    }
+    if loan_id is not None:
+        reads.update({
+            "calculations.get_loan_state": lambda: calculations.get_loan_state(loan_id),
+            "calculations.get_loan_outstanding": lambda: calculations.get_loan_outstanding(loan_id),
+            "calculations.is_loan_fully_paid": lambda: calculations.is_loan_fully_paid(loan_id),
+        })
+
+    writes = {
+        "api.add_deposit": lambda: api.add_deposit(shg_id, member_id, 500, 1, next(years)),
+        "api.add_deposits_bulk (20)": lambda: api.add_deposits_bulk(
+            shg_id, [(m, 500) for m in ctx["member_ids"][:20]], 1, next(years)),
+        "api.give_loan + repay_loan": give_and_repay,
+        "api.update_member": lambda: api.update_member(member_id, first, last, mobile, 500),
+        "api.deactivate + activate_member": lambda: (
+            api.deactivate_member(member_id), api.activate_member(member_id)),
+        "balances.rebuild_balances": lambda: balances.rebuild_balances(shg_id),
+    }
+
+    pages = {
+        "page: login": lambda: auth.president_login(
+            ctx["shg_number"], ctx["shg_number"], "bench"),
+        "page: dashboard": lambda: (
+            cache.get_data_version(shg_id),
+            dashboard.get_dashboard_snapshot(shg_id),
+            missed.get_missed_summary(shg_id)),
+        "page: members": lambda: _members_page(shg_id),
+        "page: reports": lambda: (
+            calculations.get_total_savings(shg_id),
+            calculations.get_total_loan_given(shg_id),
+            calculations.get_wallet_balance(shg_id),
+            balances.get_period_totals(shg_id, *period)),
+        "page: passbook": lambda: history.get_history(shg_id, member_id=member_id),
+    }
+    return {**reads, **writes, **pages}
+
+# RUN / COMPARE
+
+def run(tiers=None) -> dict:
+    install_counters()
+    results = {}
+    for tier in tiers or TIERS:
+        members, years = TIERS[tier]
+        print(f"== {tier}: {members} members x {years} years")
+        ctx = _context(members, years)
+        results[tier] = {}
+        for name, fn in cases(ctx).items():
+            result = measure(fn)
+            results[tier][name] = result
+            print(f"{name:<38} {result['ms']:>10.2f} ms {result['queries']:>4} q "
+                  f"{result['connections']:>3} conn")
+    return {
+        "meta": {
+            "when": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "tiers": {t: TIERS[t] for t in results},
+            "runs": RUNS,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, max_slowdown=BENCH_MAX_SLOWDOWN, min_ms=BENCH_MIN_MS) -> list:
+    """Regressions of `current` against `baseline` as readable lines"""
+    problems = []
+    for tier, tier_cases in current["results"].items():
+        for name, now in tier_cases.items():
+            before = baseline["results"].get(tier, {}).get(name)
+            if before is None:
+                continue
+            label = f"{tier} / {name}"
+            if now["ms"] > before["ms"] * max_slowdown and now["ms"] - before["ms"] > min_ms:
+                problems.append(f"{label}: {before['ms']:.2f} -> {now['ms']:.2f} ms")
+            if now["queries"] > before["queries"]:
+                problems.append(f"{label}: {before['queries']} -> {now['queries']} queries")
+            if now["connections"] > before["connections"]:
+                problems.append(
+                    f"{label}: {before['connections']} -> {now['connections']} connections"
+                )
+    return problems
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    usage = ("usage: python -m benchmarks.suite run results.json [tier ...]\n"
+             "       python -m benchmarks.suite compare baseline.json results.json")
+    if len(sys.argv) < 3 or sys.argv[1] not in ("run", "compare"):
+        sys.exit(usage)
+
+    if sys.argv[1] == "run":
+        unknown = [t for t in sys.argv[3:] if t not in TIERS]
+        if unknown:
+            sys.exit(f"Unknown tier(s) {', '.join(unknown)}; choose from {', '.join(TIERS)}")
+        with open(sys.argv[2], "w") as f:
+            json.dump(run(sys.argv[3:]), f, indent=2)
+        print(f"Saved {sys.argv[2]}")
+    else:
+        if len(sys.argv) < 4:
+            sys.exit(usage)
+        regressions = compare(_load(sys.argv[2]), _load(sys.argv[3]))
+        for line in regressions:
+            print(line)
+        print(f"{len(regressions)} regression(s) "
+              f"(limit {BENCH_MAX_SLOWDOWN}x and +{BENCH_MIN_MS} ms)")
+        sys.exit(1 if regressions else 0)
@@ -38,6 +38,8 @@ CREATE TABLE members (
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    INDEX idx_members_shg_status (shg_id, status, first_name),
+    INDEX idx_members_shg_name (shg_id, first_name, last_name),
     FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
 );
 
@@ -59,7 +61,8 @@ CREATE TABLE deposits (
     FOREIGN KEY (shg_id) REFERENCES shg_groups(id),
     FOREIGN KEY (member_id) REFERENCES members(id),
 
-    UNIQUE (member_id, deposit_month, deposit_year)
+    UNIQUE (member_id, deposit_month, deposit_year),
+    INDEX idx_deposits_shg_period (shg_id, deposit_year, deposit_month, amount)
 );
 
 
@@ -80,6 +83,9 @@ CREATE TABLE loans (
     remarks VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    INDEX idx_loans_shg_status (shg_id, status, loan_amount),
+    INDEX idx_loans_shg_status_id (shg_id, status, id),
+    INDEX idx_loans_member_status (member_id, status),
     FOREIGN KEY (shg_id) REFERENCES shg_groups(id),
     FOREIGN KEY (member_id) REFERENCES members(id)
 );
@@ -98,6 +104,7 @@ CREATE TABLE loan_payments (
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    INDEX idx_loan_payments_loan_type (loan_id, payment_type, amount),
     FOREIGN KEY (loan_id) REFERENCES loans(id)
 );
 
@@ -113,8 +120,13 @@ CREATE TABLE transactions (
     amount INT NOT NULL,
 
     created_by ENUM('president','admin') NOT NULL,
+    is_legacy BOOLEAN NOT NULL DEFAULT FALSE,  -- entered after the fact (Legacy tab)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    INDEX idx_transactions_shg_created (shg_id, created_at),
+    INDEX idx_transactions_reference (txn_type, reference_id),
+    INDEX idx_transactions_member_created (member_id, created_at, id),
+    INDEX idx_transactions_shg_type_created (shg_id, txn_type, created_at, id),
     FOREIGN KEY (shg_id) REFERENCES shg_groups(id),
     FOREIGN KEY (member_id) REFERENCES members(id)
 );
@@ -154,3 +166,99 @@ CREATE TABLE audit_logs (
     performed_by VARCHAR(100),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- # 🟢 STEP 11: SMS OUTBOX (QUEUED, SENT IN BACKGROUND)
+
+CREATE TABLE sms_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    shg_id INT NOT NULL,
+    member_id INT,
+
+    mobile VARCHAR(10),
+    message TEXT,
+    status ENUM('pending','sending','sent','failed') DEFAULT 'pending',
+    attempts INT DEFAULT 0,
+
+    next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    locked_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_sms_outbox_due (status, next_attempt_at),
+    FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+);
+
+-- # 🟢 STEP 12: SHG BALANCES (RUNNING TOTALS)
+-- Updated with every deposit / loan / repayment.
+-- Rebuild from the ledger: python -m backend.balances rebuild
+
+CREATE TABLE shg_balances (
+    shg_id INT PRIMARY KEY,
+
+    total_savings BIGINT NOT NULL DEFAULT 0,
+    total_loan_given BIGINT NOT NULL DEFAULT 0,
+    principal_repaid BIGINT NOT NULL DEFAULT 0,
+    interest_collected BIGINT NOT NULL DEFAULT 0,
+
+    -- bumped by every write; part of the page cache keys
+    data_version BIGINT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+);
+
+-- # 🟢 STEP 13: MONTHLY TOTALS (DATE-RANGE REPORTS)
+-- One row per SHG and month, updated with the running totals above.
+-- Deposits count in the month they are for.
+
+CREATE TABLE shg_monthly_totals (
+    shg_id INT NOT NULL,
+    year INT NOT NULL,
+    month INT NOT NULL,
+
+    deposits BIGINT NOT NULL DEFAULT 0,
+    loans_disbursed BIGINT NOT NULL DEFAULT 0,
+    principal_repaid BIGINT NOT NULL DEFAULT 0,
+    interest_collected BIGINT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (shg_id, year, month),
+    FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+);
+
+-- # 🟢 STEP 14: MEMBER STATUS HISTORY
+-- One row per deactivation / reactivation (missed-deposit detection)
+
+CREATE TABLE member_status_history (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    member_id INT NOT NULL,
+
+    status ENUM('active','left') NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_member_status_history (member_id, changed_at),
+    FOREIGN KEY (member_id) REFERENCES members(id)
+);
+
+-- # 🟢 STEP 15: IMPORT CHECKPOINTS
+-- Rows committed per imported ledger file (resumable bulk import)
+
+CREATE TABLE import_checkpoints (
+    shg_id INT NOT NULL,
+    import_key CHAR(16) NOT NULL,
+
+    rows_done INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (shg_id, import_key),
+    FOREIGN KEY (shg_id) REFERENCES shg_groups(id)
+);
+
+-- # 🟢 STEP 16: MIGRATION HISTORY
+-- A fresh database already has every migration's changes.
+-- Run `python -m backend.migrations` once to record them.
+
+CREATE TABLE schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
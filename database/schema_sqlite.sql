@@ -0,0 +1,231 @@
+-- # 🟢 SQLITE SCHEMA (DB_BACKEND=sqlite)
+-- The same tables as schema.sql, at the latest migration, for the
+-- embedded single-laptop install. Created automatically by:
+--     python -m backend.migrations
+--
+-- Differences from MySQL:
+--   ENUM                  -> TEXT with a CHECK
+--   AUTO_INCREMENT        -> INTEGER PRIMARY KEY AUTOINCREMENT (ids are never reused)
+--   CURRENT_TIMESTAMP     -> local time, as MySQL stores it
+--   ON UPDATE timestamps  -> not maintained
+--   utf8mb4_unicode_ci    -> COLLATE NOCASE on names and logins
+--   inline INDEX          -> CREATE INDEX
+
+-- # 🟢 SHG GROUPS (CORE TABLE)
+
+CREATE TABLE IF NOT EXISTS shg_groups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_number VARCHAR(50) NOT NULL UNIQUE COLLATE NOCASE,
+    shg_name VARCHAR(150) NOT NULL,
+    village VARCHAR(150),
+
+    president_username VARCHAR(100) UNIQUE COLLATE NOCASE,
+    president_password VARCHAR(255),
+
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- # 🟢 MEMBERS (VIEW-ONLY USERS)
+
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+
+    first_name VARCHAR(100) NOT NULL COLLATE NOCASE,
+    last_name VARCHAR(100) COLLATE NOCASE,
+    mobile VARCHAR(10) NOT NULL,
+
+    monthly_deposit INT DEFAULT 500,
+    status TEXT DEFAULT 'active' CHECK (status IN ('active','left')),
+    join_date DATE,
+
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_members_shg_status ON members (shg_id, status, first_name);
+CREATE INDEX IF NOT EXISTS idx_members_shg_name ON members (shg_id, first_name, last_name);
+
+-- # 🟢 DEPOSITS (MONTHLY SAVINGS)
+
+CREATE TABLE IF NOT EXISTS deposits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    member_id INT NOT NULL REFERENCES members(id),
+
+    amount INT NOT NULL,
+    deposit_month INT NOT NULL,
+    deposit_year INT NOT NULL,
+
+    remarks VARCHAR(255),
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+
+    UNIQUE (member_id, deposit_month, deposit_year)
+);
+CREATE INDEX IF NOT EXISTS idx_deposits_shg_period ON deposits (shg_id, deposit_year, deposit_month, amount);
+
+-- # 🟢 LOANS (NO DURATION MODEL)
+
+CREATE TABLE IF NOT EXISTS loans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    member_id INT NOT NULL REFERENCES members(id),
+
+    loan_amount INT NOT NULL,
+    interest_rate FLOAT DEFAULT 0,
+    loan_date DATE NOT NULL,
+
+    status TEXT DEFAULT 'active' CHECK (status IN ('active','closed')),
+    closed_date DATE,
+
+    remarks VARCHAR(255),
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_loans_shg_status ON loans (shg_id, status, loan_amount);
+CREATE INDEX IF NOT EXISTS idx_loans_shg_status_id ON loans (shg_id, status, id);
+CREATE INDEX IF NOT EXISTS idx_loans_member_status ON loans (member_id, status);
+
+-- # 🟢 LOAN PAYMENTS (INTEREST + PRINCIPAL)
+
+CREATE TABLE IF NOT EXISTS loan_payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    loan_id INT NOT NULL REFERENCES loans(id),
+
+    payment_type TEXT NOT NULL CHECK (payment_type IN ('interest','principal')),
+    amount INT NOT NULL,
+    payment_date DATE DEFAULT (date('now', 'localtime')),
+
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_loan_payments_loan_type ON loan_payments (loan_id, payment_type, amount);
+
+-- # 🟢 TRANSACTION LOG (TRUST & AUDIT)
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    member_id INT REFERENCES members(id),
+
+    txn_type TEXT NOT NULL CHECK (txn_type IN ('deposit','loan_given','loan_payment')),
+    reference_id INT,
+    amount INT NOT NULL,
+
+    created_by TEXT NOT NULL CHECK (created_by IN ('president','admin')),
+    is_legacy BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_shg_created ON transactions (shg_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_reference ON transactions (txn_type, reference_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_member_created ON transactions (member_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_transactions_shg_type_created ON transactions (shg_id, txn_type, created_at, id);
+
+-- # 🟢 SMS LOG (FOR VERIFICATION)
+
+CREATE TABLE IF NOT EXISTS sms_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    member_id INT,
+
+    mobile VARCHAR(10),
+    message TEXT,
+    status TEXT DEFAULT 'sent' CHECK (status IN ('sent','failed')),
+
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- # 🟢 ADMIN USERS
+
+CREATE TABLE IF NOT EXISTS admins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(100) UNIQUE COLLATE NOCASE,
+    password VARCHAR(255),
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- # 🟢 SYSTEM AUDIT LOG
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT,
+    action TEXT,
+    performed_by VARCHAR(100),
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- # 🟢 SMS OUTBOX (QUEUED, SENT IN BACKGROUND)
+
+CREATE TABLE IF NOT EXISTS sms_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    member_id INT,
+
+    mobile VARCHAR(10),
+    message TEXT,
+    status TEXT DEFAULT 'pending' CHECK (status IN ('pending','sending','sent','failed')),
+    attempts INT DEFAULT 0,
+
+    next_attempt_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    locked_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_sms_outbox_due ON sms_outbox (status, next_attempt_at);
+
+-- # 🟢 SHG BALANCES (RUNNING TOTALS)
+
+CREATE TABLE IF NOT EXISTS shg_balances (
+    shg_id INT PRIMARY KEY REFERENCES shg_groups(id),
+
+    total_savings BIGINT NOT NULL DEFAULT 0,
+    total_loan_given BIGINT NOT NULL DEFAULT 0,
+    principal_repaid BIGINT NOT NULL DEFAULT 0,
+    interest_collected BIGINT NOT NULL DEFAULT 0,
+
+    data_version BIGINT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- # 🟢 MONTHLY TOTALS (DATE-RANGE REPORTS)
+
+CREATE TABLE IF NOT EXISTS shg_monthly_totals (
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    year INT NOT NULL,
+    month INT NOT NULL,
+
+    deposits BIGINT NOT NULL DEFAULT 0,
+    loans_disbursed BIGINT NOT NULL DEFAULT 0,
+    principal_repaid BIGINT NOT NULL DEFAULT 0,
+    interest_collected BIGINT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (shg_id, year, month)
+);
+
+-- # 🟢 MEMBER STATUS HISTORY
+
+CREATE TABLE IF NOT EXISTS member_status_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INT NOT NULL REFERENCES members(id),
+
+    status TEXT NOT NULL CHECK (status IN ('active','left')),
+    changed_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_member_status_history ON member_status_history (member_id, changed_at);
+
+-- # 🟢 IMPORT CHECKPOINTS
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    shg_id INT NOT NULL REFERENCES shg_groups(id),
+    import_key CHAR(16) NOT NULL,
+
+    rows_done INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+
+    PRIMARY KEY (shg_id, import_key)
+);
+
+-- # 🟢 MIGRATION HISTORY
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
@@ -0,0 +1,214 @@
+import streamlit as st
+from datetime import date
+from pdf.jobs import submit_batch_job, submit_export_job, get_job
+from backend.db import transaction
+from backend.querylog import (
+    start_rerun, finish_rerun, get_query_stats, get_rerun_stats, reset_stats,
+    SLOW_QUERY_MS, SLOW_QUERY_LOG, RERUN_QUERY_BUDGET,
+)
+
+# 1. PAGE CONFIG & AUTH SHIELD
+st.set_page_config(layout="wide", page_title="SHG Admin")
+
+if "logged_in" not in st.session_state or st.session_state.role != "admin":
+    st.switch_page("app.py")
+    st.stop()
+
+start_rerun("admin")  # counts this rerun's queries (backend.querylog)
+
+# 2. BILINGUAL DICTIONARY
+if "lang" not in st.session_state:
+    st.session_state.lang = "मराठी"
+
+LANG = {
+    "मराठी": {
+        "title": "प्रशासक - सर्व बचत गट", "period": "📅 अहवाल कालावधी निवडा",
+        "from": "पासून", "to": "पर्यंत", "batch_sec": "📦 सर्व गटांचे PDF अहवाल (ZIP)",
+        "batch_btn": "सर्व अहवाल तयार करा", "download": "📥 ZIP डाउनलोड करा",
+        "export_sec": "🗄️ संपूर्ण खातेवही निर्यात", "export_shg": "बचत गट",
+        "all_shgs": "सर्व बचत गट", "format": "स्वरूप", "export_btn": "निर्यात करा",
+        "query_sec": "⏱️ डेटाबेस क्वेरी आकडेवारी", "query_pages": "प्रत्येक पान रीरनमागे",
+        "query_top": "एकूण वेळेनुसार सर्वाधिक क्वेरी", "query_reset": "आकडेवारी रीसेट करा",
+        "query_none": "अजून कोणतीही क्वेरी नोंदलेली नाही."
+    },
+    "English": {
+        "title": "Admin - All SHGs", "period": "📅 Select Report Period",
+        "from": "From", "to": "To", "batch_sec": "📦 PDF Reports for All SHGs (ZIP)",
+        "batch_btn": "Generate All Reports", "download": "📥 Download ZIP",
+        "export_sec": "🗄️ Full Ledger Export", "export_shg": "SHG",
+        "all_shgs": "All SHGs", "format": "Format", "export_btn": "Export",
+        "query_sec": "⏱️ Database Query Statistics", "query_pages": "Per page rerun",
+        "query_top": "Top queries by total time", "query_reset": "Reset statistics",
+        "query_none": "No queries recorded yet."
+    }
+}
+t = LANG[st.session_state.lang]
+
+# 3. HEADER
+col_h1, col_h2 = st.columns([3, 1])
+with col_h1:
+    st.markdown(f"<h1 style='font-weight:100; margin:0;'>{t['title']}</h1>", unsafe_allow_html=True)
+with col_h2:
+    st.session_state.lang = st.selectbox("🌐", ["मराठी", "English"],
+                                         index=0 if st.session_state.lang == "मराठी" else 1,
+                                         label_visibility="collapsed")
+
+st.divider()
+
+# 4. BATCH REPORTS
+st.markdown(f"### {t['period']}")
+d_col1, d_col2 = st.columns(2)
+with d_col1:
+    from_date = st.date_input(t["from"], value=date.today().replace(day=1))
+with d_col2:
+    to_date = st.date_input(t["to"], value=date.today())
+
+st.markdown(f"### {t['batch_sec']}")
+job = get_job(st.session_state.get("batch_job"))
+polling = job is not None and job["status"] in ("queued", "running")
+
+if st.button(t["batch_btn"], use_container_width=True, type="primary", disabled=polling):
+    st.session_state.batch_job = submit_batch_job(from_date, to_date)
+    st.session_state.batch_file_name = f"SHG_Reports_{from_date}_{to_date}.zip"
+    st.rerun()
+
+# Batch runs in the background; poll its progress until it is done
+@st.fragment(run_every=1 if polling else None)
+def batch_job_panel():
+    job = get_job(st.session_state.get("batch_job"))
+    if job is None:
+        return
+    p = job["progress"]
+    if job["status"] in ("queued", "running"):
+        if p["total"] is None:
+            st.info(f"⏳ Loading data for all SHGs... {job['elapsed']:.0f}s")
+        else:
+            st.progress(
+                (p["done"] + p["failed"]) / max(p["total"], 1),
+                text=f"{p['done'] + p['failed']} / {p['total']} reports "
+                     f"({p['failed']} failed) · {job['elapsed']:.0f}s"
+            )
+    elif polling:
+        st.rerun()  # finished: a full rerun stops the polling timer
+    elif job["status"] == "failed":
+        st.error(f"Batch failed: {job['error']}")
+    else:
+        stats = job["stats"]
+        st.success(
+            f"{stats['done']} / {stats['total']} reports in {stats['elapsed']:.1f}s "
+            f"({stats['per_second']:.1f} reports/s, data loaded in {stats['fetch_seconds']:.1f}s)"
+        )
+        if stats["failures"]:
+            st.warning(f"{stats['failed']} report(s) failed (listed in FAILED.txt inside the ZIP)")
+            st.dataframe(stats["failures"], use_container_width=True, hide_index=True)
+        with open(job["file_path"], "rb") as f:
+            st.download_button(
+                label=t["download"],
+                data=f.read(),
+                file_name=st.session_state.batch_file_name,
+                mime="application/zip",
+                use_container_width=True
+            )
+
+batch_job_panel()
+
+# 5. LEDGER EXPORT (deposits, loans, payments, transactions)
+st.markdown(f"### {t['export_sec']}")
+shg_choices = {t["all_shgs"]: None}
+with transaction() as cur:
+    cur.execute("SELECT id, shg_number, shg_name FROM shg_groups ORDER BY shg_number")
+    shg_choices.update({f"{number} - {name}": sid for sid, number, name in cur.fetchall()})
+
+e_col1, e_col2 = st.columns([3, 1])
+with e_col1:
+    export_shg = st.selectbox(t["export_shg"], list(shg_choices.keys()))
+with e_col2:
+    export_fmt = st.radio(t["format"], ["csv", "parquet"], horizontal=True,
+                          format_func=lambda f: "CSV (gzip)" if f == "csv" else "Parquet")
+
+export_job = get_job(st.session_state.get("export_job"))
+exporting = export_job is not None and export_job["status"] == "running"
+
+if st.button(t["export_btn"], use_container_width=True, disabled=exporting):
+    shg_choice = shg_choices[export_shg]
+    st.session_state.export_job = submit_export_job(shg_choice, export_fmt)
+    st.session_state.export_file_name = (
+        f"SHG_Ledger_{'all' if shg_choice is None else shg_choice}_{date.today()}_{export_fmt}.zip"
+    )
+    st.rerun()
+
+@st.fragment(run_every=1 if exporting else None)
+def export_job_panel():
+    job = get_job(st.session_state.get("export_job"))
+    if job is None:
+        return
+    if job["status"] == "running":
+        p = job["progress"]
+        st.info(f"⏳ {p['table'] or '...'}: {p['rows']} rows · {job['elapsed']:.0f}s")
+    elif exporting:
+        st.rerun()
+    elif job["status"] == "failed":
+        st.error(f"Export failed: {job['error']}")
+    else:
+        stats = job["stats"]
+        st.success(
+            f"{sum(stats['rows'].values())} rows, {stats['bytes'] / 1e6:.1f} MB "
+            f"in {stats['elapsed']:.1f}s"
+        )
+        st.dataframe([{"Table": table, "Rows": count} for table, count in stats["rows"].items()],
+                     use_container_width=True, hide_index=True)
+        with open(job["file_path"], "rb") as f:
+            st.download_button(
+                label=t["download"],
+                data=f,
+                file_name=st.session_state.export_file_name,
+                mime="application/zip",
+                use_container_width=True
+            )
+
+export_job_panel()
+
+# 6. QUERY STATISTICS (this server process, since start or reset)
+st.markdown(f"### {t['query_sec']}")
+st.caption(f"Slow queries (≥ {SLOW_QUERY_MS:.0f} ms) and reruns over {RERUN_QUERY_BUDGET} "
+           f"queries are logged to {SLOW_QUERY_LOG or 'the server output (set SLOW_QUERY_LOG for a file)'}")
+
+rerun_stats = get_rerun_stats()
+if rerun_stats:
+    st.markdown(f"**{t['query_pages']}**")
+    st.dataframe([
+        {
+            "Page": page, "Reruns": s["reruns"], "Queries (avg)": round(s["queries"], 1),
+            "Queries (max)": s["max_queries"], "Connections (avg)": round(s["connections"], 1),
+            "Rows (avg)": round(s["rows"]), "DB ms (avg)": round(s["db_ms"], 1),
+            "Over budget": s["over_budget"],
+        }
+        for page, s in sorted(rerun_stats.items())
+    ], use_container_width=True, hide_index=True)
+
+top_queries = get_query_stats()
+if top_queries:
+    st.markdown(f"**{t['query_top']}**")
+    st.dataframe([
+        {
+            "Query": q["fingerprint"], "Calls": q["calls"], "Total ms": round(q["total_ms"], 1),
+            "Mean ms": round(q["mean_ms"], 2), "Max ms": round(q["max_ms"], 1),
+            "Rows": q["rows"], "Called from": q["caller"],
+        }
+        for q in top_queries
+    ], use_container_width=True, hide_index=True)
+elif not rerun_stats:
+    st.info(t["query_none"])
+
+if st.button(t["query_reset"], use_container_width=True):
+    reset_stats()
+    st.rerun()
+
+# 7. NAVIGATION FOOTER
+st.write("")
+st.divider()
+if st.button("🔓 Logout", use_container_width=True):
+    st.session_state.clear()
+    st.switch_page("app.py")
+
+finish_rerun()
@@ -1,5 +1,4 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 
 # 1. SESSION SHIELD
 
@@ -19,35 +18,42 @@ if not shg_id:
 
 # 2. DATA IMPORTS
 
-from backend.calculations import (
-    get_total_savings,
-    get_total_loan_given,
-    get_wallet_balance
-)
-from backend.db import get_db_connection
-
-@st.cache_data(ttl=60)
-def fetch_dashboard_stats(shg_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM members WHERE shg_id=%s AND status='active'", (shg_id,))
-    members = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM loans WHERE shg_id=%s AND status='active'", (shg_id,))
-    loans = cur.fetchone()[0]
-    cur.execute("SELECT shg_name, shg_number FROM shg_groups WHERE id=%s", (shg_id,))
-    details = cur.fetchone()
-    cur.close()
-    conn.close()
-    return members, loans, details
-
-active_members, active_loans, shg_details = fetch_dashboard_stats(shg_id)
-
-total_savings = get_total_savings(shg_id)
-total_loan_given = get_total_loan_given(shg_id)
-wallet_balance = get_wallet_balance(shg_id)
-
-shg_name = shg_details[0] if shg_details else "SHG"
-shg_number = shg_details[1] if shg_details else "N/A"
+from backend.dashboard import get_dashboard_snapshot
+from backend.charts import donut_png
+from backend.cache import CACHE_TTL, get_data_version, record_cache_call, record_cache_miss
+from backend.missed import get_missed_summary
+from datetime import date
+from backend.querylog import start_rerun, finish_rerun
+
+start_rerun("dashboard")  # counts this rerun's queries (backend.querylog)
+
+# Keyed on the SHG's data version: any write makes the next rerun fresh.
+# Also keyed on the month: interest accrues monthly
+@st.cache_data(ttl=CACHE_TTL)
+def load_snapshot(shg_id, data_version, month):
+    record_cache_miss("dashboard")
+    return get_dashboard_snapshot(shg_id)
+
+# Also keyed on the month: a new month can make a deposit missed
+@st.cache_data(ttl=CACHE_TTL)
+def load_missed(shg_id, data_version, month):
+    record_cache_miss("missed")
+    return get_missed_summary(shg_id)
+
+data_version = get_data_version(shg_id)
+record_cache_call("dashboard")
+this_month = date.today().strftime("%Y-%m")
+snap = load_snapshot(shg_id, data_version, this_month)
+record_cache_call("missed")
+missed = load_missed(shg_id, data_version, this_month)
+if role == "member":
+    missed = [r for r in missed if r["member_id"] == st.session_state.get("member_id")]
+
+total_savings = snap.total_savings
+total_loan_given = snap.total_loan_given
+wallet_balance = snap.wallet_balance
+shg_name = st.session_state.shg_name
+shg_number = st.session_state.shg_no
 
 # 3. LANGUAGE
 
@@ -58,12 +64,14 @@ LANG = {
     "मराठी": {
         "sav": "एकूण बचत", "loan": "एकूण कर्ज", "avail": "शिल्लक",
         "members": "सभासद", "loans": "सक्रिय कर्ज",
-        "manage": "👥 सभासद", "report": "📄 अहवाल", "logout": "🔓 लॉगआउट", "next_p":"पुढील हप्ता"
+        "manage": "👥 सभासद", "report": "📄 अहवाल", "logout": "🔓 लॉगआउट", "next_p":"पुढील हप्ता", "arrears": "थकीत व्याज",
+        "passbook": "📒 पासबुक", "missed": "चुकलेली बचत", "months": "महिने", "due": "बाकी रक्कम", "none_missed": "एकही हप्ता चुकलेला नाही"
     },
     "English": {
         "sav": "Savings", "loan": "Loans", "avail": "Balance",
         "members": "Members", "loans": "Active Loans",
-        "manage": "👥 Members", "report": "📄 Reports", "logout": "🔓 Logout", "next_p":"Next Payable"
+        "manage": "👥 Members", "report": "📄 Reports", "logout": "🔓 Logout", "next_p":"Next Payable", "arrears": "Interest Arrears",
+        "passbook": "📒 Passbook", "missed": "Missed Deposits", "months": "Months", "due": "Amount Due", "none_missed": "No missed deposits"
     }
 }
 t = LANG[st.session_state.lang]
@@ -132,8 +140,8 @@ m1, m2, m3, m4, m5 = st.columns(5)
 m1.metric(t["sav"], f"₹{total_savings:,}")
 m2.metric(t["loan"], f"₹{total_loan_given:,}")
 m3.metric(t["avail"], f"₹{wallet_balance:,}")
-m4.metric(t["members"], active_members + 1)
-m5.metric(t["loans"], active_loans)
+m4.metric(t["members"], snap.active_members + 1)
+m5.metric(t["loans"], snap.active_loans)
 
 st.divider()
 
@@ -142,53 +150,20 @@ st.divider()
 chart_l, chart_r = st.columns([1.2, 1])
 
 with chart_l:
-    fig, ax = plt.subplots(figsize=(4, 4))
-    fig.patch.set_facecolor("none")
-
-    ax.pie(
-        [total_savings, total_loan_given],
-        colors=["#6366f1", "#f43f5e"],
-        autopct="%1.0f%%",
-        startangle=100,
-        pctdistance=0.75,
-        wedgeprops={"width": 0.35, "edgecolor": "none"}
-    )
-    ax.axis("equal")
-    st.pyplot(fig)
+    # Cached PNG: matplotlib only runs when the totals change
+    st.image(donut_png(total_savings, total_loan_given))
 
 with chart_r:
     st.markdown(f"### 📅 {t['next_p']}")
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT 
-            m.first_name,
-            m.last_name,
-            m.monthly_deposit,
-            IFNULL(l.loan_amount, 0) AS loan_amount,
-            IFNULL(l.interest_rate, 0) AS interest_rate
-        FROM members m
-        LEFT JOIN loans l 
-            ON l.member_id = m.id AND l.status='active'
-        WHERE m.shg_id=%s AND m.status='active'
-    """, (shg_id,))
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    table_data = []
-
-    for r in rows:
-        interest = int(r["loan_amount"] * r["interest_rate"] / 100)
-        payable = r["monthly_deposit"] + interest
-
-        table_data.append({
-            f"{t['members']}": f"{r['first_name']} {r['last_name']}",
-            f"₹ {t['next_p']}": payable
-        })
+    table_data = [
+        {
+            f"{t['members']}": r.name,
+            f"₹ {t['arrears']}": r.arrears,
+            f"₹ {t['next_p']}": r.payable
+        }
+        for r in snap.payables
+    ]
 
     st.dataframe(
         table_data,
@@ -197,6 +172,26 @@ with chart_r:
         height=400
     )
 
+# 7b. MISSED DEPOSITS (up to last month)
+
+st.markdown(f"### ⚠️ {t['missed']}")
+if not missed:
+    st.caption(t["none_missed"])
+else:
+    st.dataframe(
+        [
+            {
+                t["members"]: r["name"],
+                t["missed"]: r["missed"],
+                f"₹ {t['due']}": r["amount_due"],
+                t["months"]: r["months_text"],
+            }
+            for r in missed
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
 st.divider()
 
 # 8. NAVIGATION
@@ -206,6 +201,8 @@ with n1:
     if role == "president":
         if st.button(t["manage"], use_container_width=True):
             st.switch_page("pages/members.py")
+    elif st.button(t["passbook"], use_container_width=True):
+        st.switch_page("pages/passbook.py")
 with n2:
     if st.button(t["report"], use_container_width=True):
         st.switch_page("pages/reports.py")
@@ -213,3 +210,5 @@ with n3:
     if st.button(t["logout"], use_container_width=True):
         st.session_state.clear()
         st.switch_page("app.py")
+
+finish_rerun()
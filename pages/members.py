@@ -2,13 +2,18 @@ import streamlit as st
 from datetime import datetime
 
 # Import Backend Logic
-from backend.api import add_member, add_deposit, give_loan, repay_loan, activate_member,deactivate_member, update_member
-from backend.sms import send_sms, deposit_sms, loan_given_sms, loan_closed_sms
+from backend.api import add_member, add_deposits_bulk, give_loan, repay_loan, activate_member,deactivate_member, update_member
+from backend.sms import send_sms, enqueue_sms_many, deposit_sms, loan_given_sms, loan_closed_sms
 from backend.calculations import (
     calculate_monthly_interest, calculate_monthly_payable, 
-    get_wallet_balance, is_loan_fully_paid
+    get_wallet_balance, is_loan_fully_paid, get_loan_states
 )
-from backend.db import get_db_connection
+from backend.db import transaction, dict_rows
+from backend.cache import CACHE_TTL, get_data_version, record_cache_call, record_cache_miss
+from backend.missed import get_missed_summary
+from backend.history import get_history, TXN_TYPES
+from backend.importer import import_ledger
+from backend.querylog import start_rerun, finish_rerun
 
 # 1. PAGE CONFIGURATION & AUTH
 st.set_page_config(layout="wide", page_title="SHG Management Portal")
@@ -17,6 +22,8 @@ if "logged_in" not in st.session_state or st.session_state.role != "president":
     st.switch_page("app.py")
     st.stop()
 
+start_rerun("members")  # counts this rerun's queries (backend.querylog)
+
 shg_id = st.session_state.shg_id
 
 # 2. BILINGUAL DICTIONARY
@@ -108,23 +115,33 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # 4. DATA FETCHING HELPERS
-def get_members():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, first_name, last_name, mobile, monthly_deposit FROM members WHERE shg_id=%s AND status='active' ORDER BY first_name", (shg_id,))
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return rows
+# Cached per SHG data version: every write in backend.api bumps it
+@st.cache_data(ttl=CACHE_TTL)
+def get_members(shg_id, data_version):
+    record_cache_miss("members")
+    with transaction() as cur:
+        cur.execute("SELECT id, first_name, last_name, mobile, monthly_deposit FROM members WHERE shg_id=%s AND status='active' ORDER BY first_name", (shg_id,))
+        return dict_rows(cur)
+
+@st.cache_data(ttl=CACHE_TTL)
+def get_loans(shg_id, data_version, status):
+    record_cache_miss("loans")
+    return get_loan_states(shg_id, status=status)
+
+# Also keyed on the month: a new month can make a deposit missed
+@st.cache_data(ttl=CACHE_TTL)
+def get_missed(shg_id, data_version, month):
+    record_cache_miss("missed")
+    return {r["member_id"]: r for r in get_missed_summary(shg_id)}
+
+data_version = get_data_version(shg_id)
 
 def get_active_loans():
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT l.id, m.first_name, l.loan_amount, l.interest_rate FROM loans l JOIN members m ON m.id = l.member_id WHERE l.shg_id=%s AND l.status='active'", (shg_id,))
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return rows
-
-members = get_members()
+    record_cache_call("loans")
+    return get_loans(shg_id, data_version, "active")
+
+record_cache_call("members")
+members = get_members(shg_id, data_version)
 member_map = {f"{m['first_name']} {m['last_name']}": m for m in members}
 
 # 5. HEADER SECTION
@@ -155,7 +172,16 @@ with tab1:
                 st.rerun()
     with m_right:
         st.markdown('<p class="section-head">👥 Active List / सक्रिय यादी</p>', unsafe_allow_html=True)
-        st.dataframe(members, use_container_width=True, hide_index=True)
+        record_cache_call("missed")
+        missed = get_missed(shg_id, data_version, datetime.now().strftime("%Y-%m"))
+        st.dataframe([
+            {
+                **m,
+                "missed": missed[m["id"]]["missed"] if m["id"] in missed else 0,
+                "missed_months": missed[m["id"]]["months_text"] if m["id"] in missed else "",
+            }
+            for m in members
+        ], use_container_width=True, hide_index=True)
 
 # --- TAB 2: MONTHLY DEPOSIT ---
 with tab2:
@@ -163,11 +189,21 @@ with tab2:
     sel_members = st.multiselect("Select Members / सभासद निवडा", list(member_map.keys()))
     if st.button(t["submit"], use_container_width=True, type="primary"):
         month, year = datetime.now().month, datetime.now().year
-        for name in sel_members:
-            m = member_map[name]
-            add_deposit(shg_id, m["id"], m["monthly_deposit"], month, year)
-            send_sms(shg_id, m["id"], m["mobile"], deposit_sms(name, m["monthly_deposit"], get_wallet_balance(shg_id)))
-        st.success(f"{len(sel_members)} deposits recorded!")
+        batch = add_deposits_bulk(
+            shg_id,
+            [(member_map[name]["id"], member_map[name]["monthly_deposit"]) for name in sel_members],
+            month, year
+        )
+        recorded = [name for name in sel_members if batch["results"][member_map[name]["id"]] == "recorded"]
+        skipped = [name for name in sel_members if name not in recorded]
+        enqueue_sms_many(
+            (shg_id, member_map[name]["id"], member_map[name]["mobile"],
+             deposit_sms(name, member_map[name]["monthly_deposit"], batch["balance"]))
+            for name in recorded
+        )
+        st.success(f"{len(recorded)} deposits recorded!")
+        if skipped:
+            st.warning(f"Already deposited this month: {', '.join(skipped)}")
 
 # --- TAB 3: LOAN SYSTEM ---
 with tab3:
@@ -188,26 +224,73 @@ with tab3:
         act_loans = get_active_loans()
         if not act_loans: st.info("No active loans")
         else:
-            l_lbls = {f"{l['first_name']} - ₹{l['loan_amount']}": l for l in act_loans}
+            l_lbls = {f"{l['first_name']} - ₹{l['principal']} (#{l['loan_id']}, due ₹{l['outstanding']})": l for l in act_loans}
             sel_l = st.selectbox("Choose Loan", list(l_lbls.keys()))
             p_type = st.radio("Type", ["interest", "principal"], horizontal=True)
             p_amt = st.number_input("Payment Amount", step=100)
             if st.button(t["repay"], use_container_width=True):
-                repay_loan(l_lbls[sel_l]["id"], p_amt, p_type)
+                repay_loan(l_lbls[sel_l]["loan_id"], p_amt, p_type)
                 st.rerun()
 
 # --- TAB 4: HISTORY & AUDIT ---
 with tab4:
-    h_top, h_bot = st.columns(2)
+    h_top, h_bot = st.container(), st.container()
     with h_top:
-        st.markdown('<p class="section-head">📜 Recent Transactions / अलीकडील व्यवहार</p>', unsafe_allow_html=True)
-        conn = get_db_connection(); cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT created_at, txn_type, amount FROM transactions WHERE shg_id=%s ORDER BY created_at DESC LIMIT 50", (shg_id,))
-        st.dataframe(cur.fetchall(), use_container_width=True)
-        cur.close(); conn.close()
+        st.markdown('<p class="section-head">📜 Transactions / व्यवहार</p>', unsafe_allow_html=True)
+        f1, f2, f3, f4 = st.columns(4)
+        h_member = f1.selectbox("Member", ["All"] + list(member_map.keys()), key="h_mem")
+        h_type = f2.selectbox("Type", ["All", *TXN_TYPES], key="h_type")
+        h_from = f3.date_input("From", value=None, key="h_from")
+        h_to = f4.date_input("To", value=None, key="h_to")
+        filters = (
+            None if h_member == "All" else member_map[h_member]["id"],
+            None if h_type == "All" else h_type,
+            h_from, h_to
+        )
+
+        # Keyset pager: a stack of page-start cursors, reset when filters change
+        if st.session_state.get("history_filters") != filters:
+            st.session_state.history_filters = filters
+            st.session_state.history_cursors = [None]
+        cursors = st.session_state.history_cursors
+        page = get_history(shg_id, *filters, cursor=cursors[-1])
+
+        st.dataframe([
+            {
+                "Date": r["created_at"],
+                "Member": r["name"],
+                "Type": r["txn_type"],
+                "Amount": r["amount"],
+                "Legacy": bool(r["is_legacy"]),
+            }
+            for r in page.rows
+        ], use_container_width=True, hide_index=True)
+
+        p1, p2, p3 = st.columns(3)
+        if p1.button("← Newer", disabled=len(cursors) == 1, key="h_newer", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+        p2.caption(f"Page {len(cursors)}")
+        if p3.button("Older →", disabled=page.next_cursor is None, key="h_older", use_container_width=True):
+            cursors.append(page.next_cursor)
+            st.rerun()
     with h_bot:
         st.markdown('<p class="section-head">📁 Closed Loans / पूर्ण झालेले कर्ज</p>', unsafe_allow_html=True)
-        st.info("Historical data of closed loans is visible here.")
+        record_cache_call("loans")
+        closed_loans = get_loans(shg_id, data_version, "closed")
+        if not closed_loans:
+            st.info("Historical data of closed loans is visible here.")
+        else:
+            st.dataframe([
+                {
+                    "Member": f"{l['first_name']} {l['last_name']}",
+                    "Amount": l["principal"],
+                    "Interest Paid": l["interest_paid"],
+                    "Loan Date": l["loan_date"],
+                    "Closed": l["closed_date"],
+                }
+                for l in closed_loans
+            ], use_container_width=True, hide_index=True)
 
 # --- TAB 5: LEGACY / TIME MACHINE ---
 with tab5:
@@ -221,6 +304,7 @@ with tab5:
             legacy_month = st.selectbox("Month", list(range(1, 13)), format_func=lambda x: datetime(1900, x, 1).strftime('%B'))
         with c2:
             legacy_year = st.selectbox("Year", list(range(2000, datetime.now().year + 1)), index=len(list(range(2000, datetime.now().year + 1)))-1)
+    legacy_date = datetime(legacy_year, legacy_month, 1).date()
 
     st.divider()
 
@@ -230,17 +314,18 @@ with tab5:
         st.markdown("### 💰 Past Deposits")
         legacy_members = st.multiselect("Select Members", list(member_map.keys()), key="legacy_members")
         if st.button("Save Past Deposits", use_container_width=True):
-            for name in legacy_members:
-                m = member_map[name]
-                add_deposit(shg_id, m["id"], m["monthly_deposit"], legacy_month, legacy_year)
-                
-                conn = get_db_connection()
-                cur = conn.cursor()
-                cur.execute("UPDATE transactions SET is_legacy=1 WHERE shg_id=%s AND member_id=%s ORDER BY created_at DESC LIMIT 1", (shg_id, m["id"]))
-                conn.commit()
-                cur.close(); conn.close()
+            batch = add_deposits_bulk(
+                shg_id,
+                [(member_map[name]["id"], member_map[name]["monthly_deposit"]) for name in legacy_members],
+                legacy_month, legacy_year,
+                entry_date=legacy_date, legacy=True
+            )
+            skipped = [name for name in legacy_members if batch["results"][member_map[name]["id"]] == "duplicate"]
             st.success("Past deposits saved as Legacy")
-            st.rerun()
+            if skipped:
+                st.warning(f"Already deposited for that month: {', '.join(skipped)}")
+            else:
+                st.rerun()
 
     with leg_col2:
         st.markdown("### 💸 Past Loan")
@@ -250,14 +335,7 @@ with tab5:
         
         if st.button("Save Past Loan", use_container_width=True):
             m = member_map[l_mem_name]
-            loan_id = give_loan(shg_id, m["id"], l_amt_val, l_int_val)
-            
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("UPDATE loans SET loan_date=STR_TO_DATE(%s,'%%Y-%%m-%%d') WHERE id=%s", (f"{legacy_year}-{legacy_month}-01", loan_id))
-            cur.execute("UPDATE transactions SET is_legacy=1 WHERE shg_id=%s AND member_id=%s ORDER BY created_at DESC LIMIT 1", (shg_id, m["id"]))
-            conn.commit()
-            cur.close(); conn.close()
+            give_loan(shg_id, m["id"], l_amt_val, l_int_val, entry_date=legacy_date, legacy=True)
             st.success("Past loan saved as Legacy")
             st.rerun()
 
@@ -265,38 +343,61 @@ with tab5:
     st.markdown("### 🔁 Past Loan Repayment")
     active_loans_leg = get_active_loans()
     if active_loans_leg:
-        loan_map_leg = {f"{l['first_name']} - ₹{l['loan_amount']}": l for l in active_loans_leg}
+        loan_map_leg = {f"{l['first_name']} - ₹{l['principal']} (#{l['loan_id']}, due ₹{l['outstanding']})": l for l in active_loans_leg}
         leg_repay_sel = st.selectbox("Select Loan", list(loan_map_leg.keys()), key="leg_repay_box")
         leg_pay_type = st.radio("Type", ["interest", "principal"], horizontal=True, key="leg_repay_type")
         leg_pay_amt = st.number_input("Amount", step=100, key="leg_pay_amt")
         
         if st.button("Save Past Repayment", use_container_width=True):
             loan_obj = loan_map_leg[leg_repay_sel]
-            repay_loan(loan_obj["id"], leg_pay_amt, leg_pay_type)
-            
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("UPDATE transactions SET is_legacy=1 WHERE shg_id=%s AND member_id=%s ORDER BY created_at DESC LIMIT 1", (shg_id, loan_obj["id"]))
-            conn.commit()
-            cur.close(); conn.close()
+            repay_loan(loan_obj["loan_id"], leg_pay_amt, leg_pay_type, entry_date=legacy_date, legacy=True)
             st.success("Past repayment saved as Legacy")
             st.rerun()
 
+    st.divider()
+    st.markdown("### 📒 Import Old Register (CSV / Excel)")
+    st.caption("Columns: date, type (deposit / loan / repayment), first_name, last_name, mobile, "
+               "amount, interest_rate, payment_type, loan_ref, month, year. "
+               "Uploading the same file again continues an interrupted import.")
+    ledger_file = st.file_uploader("Register file", type=["csv", "xlsx"], key="legacy_import_file")
+    if ledger_file is not None and st.button("Import Register", use_container_width=True):
+        bar = st.progress(0.0)
+
+        def show_progress(rows_done, stats):
+            total = stats["total"] or rows_done
+            bar.progress(min(rows_done / max(total, 1), 1.0),
+                         text=f"{rows_done} / {total} rows ({stats['error_count']} errors)")
+
+        try:
+            result = import_ledger(shg_id, ledger_file, progress=show_progress)
+        except Exception as e:
+            st.error(f"Import failed: {e}")
+        else:
+            bar.progress(1.0, text=f"{result['rows']} rows in {result['elapsed']:.1f}s")
+            st.success(
+                f"Imported {result['deposit']} deposits, {result['loan']} loans, "
+                f"{result['repayment']} repayments as Legacy"
+                + (f" (resumed after row {result['resumed_from']})" if result["resumed_from"] else "")
+            )
+            if result["duplicates"]:
+                st.warning(f"{result['duplicates']} deposits were already recorded and were skipped")
+            if result["error_count"]:
+                st.error(f"{result['error_count']} rows could not be imported")
+                st.dataframe([{"Row": row, "Problem": message} for row, message in result["errors"]],
+                             use_container_width=True, hide_index=True)
+
             
 with tab6:
     st.subheader(t["edit_header"])
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT id, first_name, last_name, mobile, monthly_deposit, status
-        FROM members
-        WHERE shg_id=%s
-        ORDER BY first_name
-    """, (shg_id,))
-    all_members = cur.fetchall()
-    cur.close()
-    conn.close()
+    with transaction() as cur:
+        cur.execute("""
+            SELECT id, first_name, last_name, mobile, monthly_deposit, status
+            FROM members
+            WHERE shg_id=%s
+            ORDER BY first_name
+        """, (shg_id,))
+        all_members = dict_rows(cur)
 
     if not all_members:
         st.info("No members found")
@@ -368,4 +469,6 @@ with f1:
 with f2:
     if st.button(t["logout"], use_container_width=True):
         st.session_state.clear()
-        st.switch_page("app.py")
\ No newline at end of file
+        st.switch_page("app.py")
+
+finish_rerun()
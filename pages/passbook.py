@@ -0,0 +1,95 @@
+import streamlit as st
+from backend.history import get_history
+from backend.db import transaction
+from backend.querylog import start_rerun, finish_rerun
+
+# 1. PAGE CONFIG & AUTH SHIELD
+st.set_page_config(layout="centered", page_title="SHG Passbook")
+
+if "logged_in" not in st.session_state or st.session_state.role not in ("president", "member"):
+    st.switch_page("app.py")
+    st.stop()
+
+start_rerun("passbook")  # counts this rerun's queries (backend.querylog)
+
+shg_id = st.session_state.shg_id
+role = st.session_state.role
+
+# 2. BILINGUAL DICTIONARY
+if "lang" not in st.session_state:
+    st.session_state.lang = "मराठी"
+
+LANG = {
+    "मराठी": {
+        "title": "पासबुक", "member": "सभासद", "date": "दिनांक", "type": "प्रकार",
+        "amount": "रक्कम", "newer": "← नवीन", "older": "जुने →", "page": "पान",
+        "empty": "अजून कोणताही व्यवहार नाही", "back": "⬅️ डॅशबोर्ड",
+        "deposit": "बचत जमा", "loan_given": "कर्ज दिले", "loan_payment": "कर्ज परतफेड"
+    },
+    "English": {
+        "title": "Passbook", "member": "Member", "date": "Date", "type": "Type",
+        "amount": "Amount", "newer": "← Newer", "older": "Older →", "page": "Page",
+        "empty": "No transactions yet", "back": "⬅️ Dashboard",
+        "deposit": "Deposit", "loan_given": "Loan Given", "loan_payment": "Loan Repayment"
+    }
+}
+t = LANG[st.session_state.lang]
+
+# 3. WHOSE PASSBOOK
+if role == "member":
+    member_id = st.session_state.member_id
+else:
+    with transaction() as cur:
+        cur.execute(
+            "SELECT id, first_name, last_name FROM members WHERE shg_id=%s ORDER BY first_name",
+            (shg_id,)
+        )
+        choices = {f"{first} {last or ''}".strip(): mid for mid, first, last in cur.fetchall()}
+    if not choices:
+        st.info(t["empty"])
+        st.stop()
+    member_id = choices[st.selectbox(t["member"], list(choices.keys()))]
+
+# 4. HEADER
+col_h1, col_h2 = st.columns([3, 1])
+with col_h1:
+    st.markdown(f"<h1 style='font-weight:100; margin:0;'>📒 {t['title']}</h1>", unsafe_allow_html=True)
+with col_h2:
+    st.session_state.lang = st.selectbox("🌐", ["मराठी", "English"],
+                                         index=0 if st.session_state.lang == "मराठी" else 1,
+                                         label_visibility="collapsed")
+
+# 5. ENTRIES (keyset pages, newest first)
+if st.session_state.get("passbook_member") != member_id:
+    st.session_state.passbook_member = member_id
+    st.session_state.passbook_cursors = [None]
+cursors = st.session_state.passbook_cursors
+page = get_history(shg_id, member_id=member_id, cursor=cursors[-1])
+
+if not page.rows and len(cursors) == 1:
+    st.info(t["empty"])
+else:
+    st.dataframe([
+        {
+            t["date"]: r["created_at"].strftime("%d %b %Y"),
+            t["type"]: t.get(r["txn_type"], r["txn_type"]),
+            f"₹ {t['amount']}": r["amount"],
+        }
+        for r in page.rows
+    ], use_container_width=True, hide_index=True)
+
+    p1, p2, p3 = st.columns(3)
+    if p1.button(t["newer"], disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+    p2.caption(f"{t['page']} {len(cursors)}")
+    if p3.button(t["older"], disabled=page.next_cursor is None, use_container_width=True):
+        cursors.append(page.next_cursor)
+        st.rerun()
+
+# 6. NAVIGATION
+st.divider()
+if st.button(t["back"], use_container_width=True):
+    st.switch_page("pages/dashboard.py")
+
+finish_rerun()
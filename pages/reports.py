@@ -1,9 +1,9 @@
 import streamlit as st
-import tempfile
 from datetime import date
 from backend.calculations import get_total_savings, get_total_loan_given, get_wallet_balance
-from backend.db import get_db_connection
-from pdf.generator import generate_shg_report
+from backend.balances import get_period_totals
+from pdf.jobs import submit_report_job, get_job
+from backend.querylog import start_rerun, finish_rerun
 
 # 1. PAGE CONFIG & AUTH SHIELD
 st.set_page_config(layout="wide", page_title="SHG Reports")
@@ -12,6 +12,8 @@ if "logged_in" not in st.session_state or st.session_state.role != "president":
     st.switch_page("app.py")
     st.stop()
 
+start_rerun("reports")  # counts this rerun's queries (backend.querylog)
+
 shg_id = st.session_state.shg_id
 shg_no = st.session_state.get("shg_no", "N/A")
 
@@ -26,7 +28,8 @@ LANG = {
         "pdf_btn": "अहवाल तयार करा", "wa_sec": "📲 WhatsApp संदेश (कॉपी करा)",
         "info": "खालील संदेश निवडा आणि तुमच्या बचत गट ग्रुपवर पाठवा.",
         "back": "⬅️ डॅशबोर्ड", "wa_head": "महिला बचत गट अहवाल", "wa_total_sav": "एकूण बचत",
-        "wa_total_loan": "एकूण कर्ज दिले", "wa_wallet": "उपलब्ध रक्कम", "wa_sign": "– अध्यक्ष", "group":"गट", "t_period":" कालावधी", "msg":"हा अहवाल सिस्टमद्वारे तयार केला आहे.", "note":"नोंद"
+        "wa_total_loan": "एकूण कर्ज दिले", "wa_wallet": "उपलब्ध रक्कम", "wa_sign": "– अध्यक्ष", "group":"गट", "t_period":" कालावधी",
+        "wa_in_period": "या कालावधीत", "wa_dep": "जमा बचत", "wa_loans": "दिलेले कर्ज", "wa_repaid": "कर्ज परतफेड", "wa_interest": "व्याज जमा", "wa_overall": "आजपर्यंत एकूण", "msg":"हा अहवाल सिस्टमद्वारे तयार केला आहे.", "note":"नोंद"
     },
     "English": {
         "title": "Reports & Messaging", "period": "📅 Select Report Period",
@@ -34,7 +37,8 @@ LANG = {
         "pdf_btn": "Generate PDF", "wa_sec": "📲 WhatsApp Templates",
         "info": "Copy the message below and paste it into your SHG WhatsApp group.",
         "back": "⬅️ Dashboard", "wa_head": "SHG Progress Report", "wa_total_sav": "Total Savings",
-        "wa_total_loan": "Total Loan Disbursed", "wa_wallet": "Available Funds", "wa_sign": "– President", "group":"Group", "t_period":"Period", "note":"Note", "msg":"This Message is Generated By The System."
+        "wa_total_loan": "Total Loan Disbursed", "wa_wallet": "Available Funds", "wa_sign": "– President", "group":"Group", "t_period":"Period",
+        "wa_in_period": "In This Period", "wa_dep": "Deposits", "wa_loans": "Loans Disbursed", "wa_repaid": "Principal Repaid", "wa_interest": "Interest Collected", "wa_overall": "Overall To Date", "note":"Note", "msg":"This Message is Generated By The System."
     }
 }
 t = LANG[st.session_state.lang]
@@ -58,26 +62,13 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # 4. DATA FETCHING
-def get_shg_info(shg_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT shg_name, village FROM shg_groups WHERE id=%s", (shg_id,))
-    row = cur.fetchone()
-    cur.close(); conn.close()
-    return row
-
-shg_name, village = get_shg_info(shg_id)
+shg_name = st.session_state.shg_name
+village = st.session_state.village
 
-# --- SAFETY SHIELD: MATH VALIDATION ---
 raw_total_savings = get_total_savings(shg_id)
 raw_total_loan = get_total_loan_given(shg_id)
 raw_wallet = get_wallet_balance(shg_id)
 
-# PDF safe values (Pie charts cannot take negative numbers)
-pdf_safe_savings = max(0, raw_total_savings)
-pdf_safe_loan = max(0, raw_total_loan)
-pdf_safe_wallet = max(0, raw_wallet)
-
 # 5. HEADER
 col_h1, col_h2 = st.columns([3, 1])
 with col_h1:
@@ -106,30 +97,44 @@ with c1:
     st.write("")
     st.markdown(f"### {t['pdf_sec']}")
     if st.button(t["pdf_btn"], use_container_width=True, type="primary"):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            pdf_path = tmp.name
-        
-        # We pass the validated safe values to the generator to avoid Matplotlib errors
-        generate_shg_report(
-            shg_id=shg_id,
-            shg_name=f"{shg_name} ({village})",
-            period_text=period_text,
-            output_path=pdf_path
-        )
-        
-        with open(pdf_path, "rb") as f:
-            st.download_button(
-                label="📥 Download PDF Now",
-                data=f,
-                file_name=f"Report_{shg_no}_{from_date}.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
+        st.session_state.report_job = submit_report_job(shg_id, from_date, to_date)
+        st.session_state.report_file_name = f"Report_{shg_no}_{from_date}.pdf"
+
+    # Report runs on the background pool; poll until it is ready
+    job = get_job(st.session_state.get("report_job"))
+    polling = job is not None and job["status"] in ("queued", "running")
+
+    @st.fragment(run_every=1 if polling else None)
+    def report_job_panel():
+        job = get_job(st.session_state.get("report_job"))
+        if job is None:
+            return
+        if job["status"] in ("queued", "running"):
+            st.info(f"⏳ Report {job['status']}... {job['elapsed']:.0f}s")
+        elif polling:
+            st.rerun()  # finished: a full rerun stops the polling timer
+        elif job["status"] == "failed":
+            st.error(f"Report failed: {job['error']}")
+        else:
+            with open(job["file_path"], "rb") as f:
+                st.download_button(
+                    label="📥 Download PDF Now",
+                    data=f.read(),
+                    file_name=st.session_state.report_file_name,
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+            st.caption(f"Ready in {job['elapsed']:.1f}s")
+
+    report_job_panel()
 
 with c2:
     st.markdown(f"### {t['wa_sec']}")
     st.info(t["info"])
     
+    # Period figures come from the monthly rollup (whole months)
+    period = get_period_totals(shg_id, from_date, to_date)
+
     # Message Logic (Uses raw values to show the user exactly what is in the DB)
     wa_msg = f"""
 ✨ {t['wa_head']} ✨
@@ -137,6 +142,13 @@ with c2:
 📍 {t['group']} : {shg_name}
 📅 {t['t_period']} : {period_text}
 ━━━━━━━━━━━━━━━━━━━
+🗓️ {t['wa_in_period']}
+💰 {t['wa_dep']}: ₹{period['deposits']:,}
+💸 {t['wa_loans']}: ₹{period['loans_disbursed']:,}
+↩️ {t['wa_repaid']}: ₹{period['principal_repaid']:,}
+📈 {t['wa_interest']}: ₹{period['interest_collected']:,}
+━━━━━━━━━━━━━━━━━━━
+📊 {t['wa_overall']}
 💰 {t['wa_total_sav']}: ₹{raw_total_savings:,}
 💸 {t['wa_total_loan']}: ₹{raw_total_loan:,}
 🏦 {t['wa_wallet']}: ₹{raw_wallet:,}
@@ -145,7 +157,7 @@ with c2:
 {t['wa_sign']}
     """.strip()
 
-    st.text_area("Copy Message Below:", wa_msg, height=280)
+    st.text_area("Copy Message Below:", wa_msg, height=400)
     st.caption("Tip: Select all (Ctrl+A), Copy (Ctrl+C), and Paste in WhatsApp.")
 
 # 7. NAVIGATION FOOTER
@@ -158,4 +170,6 @@ with f_col1:
 with f_col2:
     if st.button("🔓 Logout", use_container_width=True):
         st.session_state.clear()
-        st.switch_page("app.py")
\ No newline at end of file
+        st.switch_page("app.py")
+
+finish_rerun()
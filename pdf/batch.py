@@ -0,0 +1,146 @@
+"""
+pdf/batch.py
+------------
+Reports for every active SHG in one zip archive (admin).
+
+    python -m pdf.batch <from YYYY-MM-DD> <to YYYY-MM-DD> [out.zip] [workers]
+
+Data for all SHGs is read up front with build_all_report_data (a
+fixed number of grouped queries), then PDFs are rendered on a process
+pool and written into the archive as they complete. Only a few
+rendered PDFs are held in memory at once.
+"""
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from backend.config import get_setting
+
+BATCH_WORKERS = int(get_setting("REPORT_BATCH_WORKERS", str(os.cpu_count() or 2)))
+IN_FLIGHT_PER_WORKER = 2  # queued renders per worker; bounds memory use
+
+# WORKER SIDE
+
+def _render_pdf_bytes(report) -> bytes:
+    """Runs in a worker process"""
+    from pdf.generator import render_report
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        path = tmp.name
+    try:
+        render_report(path, report)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+# BATCH
+
+def report_file_name(report) -> str:
+    """Name of a report inside the archive, e.g. SHG101_Sakhi_Gat.pdf"""
+    label = f"{report.shg_number or report.shg_id}_{report.shg_name}"
+    return re.sub(r"[^\w.-]+", "_", label).strip("_") + ".pdf"
+
+
+def generate_batch(zip_path, period_from, period_to, workers=None, progress=None) -> dict:
+    """
+    Render the report of every active SHG into zip_path.
+
+    progress(done, failed, total) is called after each report.
+    A failed SHG does not stop the batch; failures are listed in the
+    returned stats and in FAILED.txt inside the archive.
+
+    Returns stats: total, done, failed, failures (shg_id, shg_name,
+    error), fetch_seconds, render_seconds, elapsed, per_second
+    """
+    from backend.reports import build_all_report_data
+
+    started = time.perf_counter()
+    reports = build_all_report_data(period_from, period_to)
+    fetched = time.perf_counter()
+
+    workers = workers or BATCH_WORKERS
+    total = len(reports)
+    done = 0
+    failures = []
+    pending = {}
+    queue = iter(reports)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor, zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as archive:
+
+        def submit_next():
+            report = next(queue, None)
+            if report is not None:
+                pending[executor.submit(_render_pdf_bytes, report)] = report
+
+        for _ in range(workers * IN_FLIGHT_PER_WORKER):
+            submit_next()
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                report = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    archive.writestr(report_file_name(report), future.result())
+                    done += 1
+                else:
+                    failures.append({
+                        "shg_id": report.shg_id,
+                        "shg_name": report.shg_name,
+                        "error": str(error) or type(error).__name__,
+                    })
+                submit_next()
+                if progress:
+                    progress(done, len(failures), total)
+
+        if failures:
+            archive.writestr("FAILED.txt", "\n".join(
+                f"{f['shg_id']}\t{f['shg_name']}\t{f['error']}" for f in failures
+            ) + "\n")
+
+    finished_at = time.perf_counter()
+    elapsed = finished_at - started
+    return {
+        "total": total,
+        "done": done,
+        "failed": len(failures),
+        "failures": failures,
+        "fetch_seconds": fetched - started,
+        "render_seconds": finished_at - fetched,
+        "elapsed": elapsed,
+        "per_second": done / elapsed if elapsed else 0.0,
+    }
+
+# COMMAND LINE
+
+if __name__ == "__main__":
+    import sys
+    from datetime import date
+
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m pdf.batch <from YYYY-MM-DD> <to YYYY-MM-DD> [out.zip] [workers]")
+
+    period_from = date.fromisoformat(sys.argv[1])
+    period_to = date.fromisoformat(sys.argv[2])
+    out = sys.argv[3] if len(sys.argv) > 3 else f"reports_{period_from}_{period_to}.zip"
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    def show(done, failed, total):
+        print(f"\r{done + failed}/{total} reports ({failed} failed)", end="", flush=True)
+
+    stats = generate_batch(out, period_from, period_to, workers, progress=show)
+    print()
+    for f in stats["failures"]:
+        print(f"FAILED SHG {f['shg_id']} {f['shg_name']}: {f['error']}")
+    print(
+        f"{stats['done']}/{stats['total']} reports in {stats['elapsed']:.1f}s "
+        f"(data {stats['fetch_seconds']:.1f}s, {stats['per_second']:.1f} reports/s) -> {out}"
+    )
+    sys.exit(1 if stats["failed"] else 0)
@@ -1,12 +1,3 @@
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-)
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-
-import matplotlib.pyplot as plt
 import tempfile
 import os
 from datetime import datetime
@@ -26,6 +17,17 @@ def generate_shg_report(
     """
     Generates a complete SHG PDF report.
     """
+    # Heavy imports on first use, so importing this module stays cheap
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    )
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
 
     # PDF SETUP
     doc = SimpleDocTemplate(
@@ -64,14 +66,23 @@ def generate_shg_report(
     elements.append(Paragraph("<b>Financial Summary</b>", styles["Heading2"]))
     elements.append(Spacer(1, 8))
 
-    summary_table = Table(
-        [
-            ["Total Savings", f"₹ {summary['savings']}"],
-            ["Total Loan Given", f"₹ {summary['loan']}"],
-            ["Available Cash", f"₹ {summary['cash']}"],
-        ],
-        colWidths=[3.5 * inch, 2 * inch]
-    )
+    summary_rows = [
+        ["Total Savings", f"₹ {summary['savings']}"],
+        ["Total Loan Given", f"₹ {summary['loan']}"],
+        ["Available Cash", f"₹ {summary['cash']}"],
+    ]
+
+    # Activity within the report period (whole months)
+    period = summary.get("period")
+    if period:
+        summary_rows += [
+            ["Deposits in Period", f"₹ {period['deposits']}"],
+            ["Loans Disbursed in Period", f"₹ {period['loans_disbursed']}"],
+            ["Principal Repaid in Period", f"₹ {period['principal_repaid']}"],
+            ["Interest Collected in Period", f"₹ {period['interest_collected']}"],
+        ]
+
+    summary_table = Table(summary_rows, colWidths=[3.5 * inch, 2 * inch])
 
     summary_table.setStyle(TableStyle([
         ("GRID", (0, 0), (-1, -1), 1, colors.black),
@@ -87,9 +98,14 @@ def generate_shg_report(
     elements.append(Paragraph("<b>Financial Overview</b>", styles["Heading2"]))
     elements.append(Spacer(1, 10))
 
+    # Pie charts cannot take negative or all-zero values
+    pie_values = [max(0, summary["savings"]), max(0, summary["loan"])]
+    if not any(pie_values):
+        pie_values = [1, 0]
+
     fig, ax = plt.subplots(figsize=(4, 4))
     ax.pie(
-        [summary["savings"], summary["loan"]],
+        pie_values,
         labels=["Savings", "Loans"],
         autopct="%1.0f%%",
         startangle=140
@@ -107,14 +123,15 @@ def generate_shg_report(
     elements.append(Paragraph("<b>Member-wise Summary</b>", styles["Heading2"]))
     elements.append(Spacer(1, 8))
 
-    member_table_data = [["Member", "Deposit", "Loan", "Repaid", "Balance"]]
+    member_table_data = [["Member", "Deposit", "Loan", "Repaid", "Balance", "Missed Months"]]
     for m in member_summary:
         member_table_data.append([
             m["name"],
             f"₹ {m['deposit']}",
             f"₹ {m['loan']}",
             f"₹ {m['repaid']}",
-            f"₹ {m['balance']}"
+            f"₹ {m['balance']}",
+            m.get("missed", 0)
         ])
 
     member_table = Table(member_table_data, repeatRows=1)
@@ -163,3 +180,22 @@ def generate_shg_report(
     # cleanup temp image
     if os.path.exists(tmp_img.name):
         os.unlink(tmp_img.name)
+
+# STABLE ENTRY POINT
+
+def render_report(file_path, report):
+    """
+    Render a backend.reports.ReportData to a PDF file.
+    Pages and jobs should call this rather than generate_shg_report,
+    so the report data can grow without touching every caller.
+    """
+    generate_shg_report(
+        file_path=file_path,
+        shg_name=report.shg_name,
+        village=report.village,
+        period_from=report.period_from,
+        period_to=report.period_to,
+        summary=report.summary,
+        member_summary=report.member_summary,
+        loan_summary=report.loan_summary
+    )
@@ -0,0 +1,213 @@
+"""
+pdf/jobs.py
+-----------
+PDF reports as background jobs.
+
+Reports are built and rendered on a bounded process pool, so
+matplotlib / ReportLab work never runs on a Streamlit script thread and
+several presidents can generate reports at once. Pages submit a job,
+then poll get_job() until it is done.
+
+Admin batch jobs (every SHG into one zip, see pdf/batch.py) run on a
+thread that drives their own process pool, and report progress here.
+Ledger exports (backend/export.py) run the same way on a thread.
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from backend.config import get_setting
+
+REPORT_WORKERS = int(get_setting("REPORT_WORKERS", "2"))
+JOB_RETENTION = 60 * 60  # seconds a finished job (and its file) is kept
+
+_executor = None
+_jobs = {}
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Process-wide worker pool. Workers are spawned, not forked, so they
+    never share the parent's pooled database sockets.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=REPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _executor
+
+# WORKER SIDE
+
+def _run_report_job(shg_id, period_from, period_to, file_path):
+    """Runs in a worker process. Returns (started, finished) timestamps."""
+    from backend.reports import build_report_data
+    from pdf.generator import render_report
+
+    started = time.time()
+    render_report(file_path, build_report_data(shg_id, period_from, period_to))
+    return started, time.time()
+
+# JOB API
+
+def submit_report_job(shg_id, period_from, period_to) -> str:
+    """Queue a report for one SHG. Returns the job id."""
+    _prune()
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        file_path = tmp.name
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "shg_id": shg_id,
+        "status": "queued",
+        "file_path": file_path,
+        "error": None,
+        "submitted_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    with _lock:
+        _jobs[job_id] = job
+
+    future = get_executor().submit(
+        _run_report_job, shg_id, period_from, period_to, file_path
+    )
+    with _lock:
+        job["_future"] = future
+    future.add_done_callback(lambda f: _finish(job_id, f))
+    return job_id
+
+
+def submit_batch_job(period_from, period_to) -> str:
+    """Queue reports for every active SHG into one zip. Returns the job id."""
+    from pdf.batch import generate_batch
+
+    return _submit(
+        "report-batch", generate_batch, period_from, period_to,
+        progress={"done": 0, "failed": 0, "total": None}
+    )
+
+
+def submit_export_job(shg_id, fmt) -> str:
+    """Queue a ledger export (shg_id=None for all SHGs). Returns the job id."""
+    from backend.export import export_ledger
+
+    return _submit(
+        "ledger-export", export_ledger, shg_id, fmt,
+        shg_id=shg_id, progress={"table": None, "rows": 0}
+    )
+
+# THREAD JOBS (batch, export)
+
+def _submit(kind, target, *args, shg_id=None, progress=None) -> str:
+    """
+    Run target(file_path, *args, progress=callback) on a thread; it
+    writes a zip to file_path and returns the job's stats. The
+    callback's arguments replace the job's progress, named after the
+    keys of the initial `progress` dict. Returns the job id.
+    """
+    _prune()
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
+        file_path = tmp.name
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "shg_id": shg_id,
+        "status": "running",
+        "file_path": file_path,
+        "error": None,
+        "submitted_at": time.time(),
+        "started_at": time.time(),
+        "finished_at": None,
+        "progress": dict(progress or {}),
+        "stats": None,
+    }
+    with _lock:
+        _jobs[job_id] = job
+
+    threading.Thread(
+        target=_run_job,
+        args=(job_id, target, args, file_path),
+        name=f"{kind}-{job_id[:8]}",
+        daemon=True
+    ).start()
+    return job_id
+
+
+def _run_job(job_id, target, args, file_path):
+    def progress(*values):
+        with _lock:
+            job = _jobs[job_id]
+            job["progress"] = dict(zip(job["progress"], values))
+
+    try:
+        stats, error = target(file_path, *args, progress=progress), None
+    except Exception as e:  # `as error` would unbind `error` after the block
+        stats, error = None, str(e) or type(e).__name__
+
+    with _lock:
+        job = _jobs[job_id]
+        job["stats"] = stats
+        job["error"] = error
+        job["status"] = "failed" if error else "done"
+        job["finished_at"] = time.time()
+
+def _finish(job_id, future):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        error = future.exception()
+        if error is not None:
+            job["status"] = "failed"
+            job["error"] = str(error) or type(error).__name__
+            job["finished_at"] = time.time()
+        else:
+            job["started_at"], job["finished_at"] = future.result()
+            job["status"] = "done"
+
+
+def get_job(job_id):
+    """
+    Job status as a dict, or None for an unknown / expired job:
+    id, shg_id, status (queued | running | done | failed), file_path,
+    error, submitted_at, started_at, finished_at, elapsed
+    (batch and export jobs also carry progress and stats)
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        future = job.get("_future")
+        if job["status"] == "queued" and future is not None and future.running():
+            job["status"] = "running"
+        info = {k: v for k, v in job.items() if not k.startswith("_")}
+
+    info["elapsed"] = (info["finished_at"] or time.time()) - info["submitted_at"]
+    return info
+
+
+def _prune():
+    """Forget finished jobs older than JOB_RETENTION and delete their files"""
+    cutoff = time.time() - JOB_RETENTION
+    with _lock:
+        expired = [
+            job for job in _jobs.values()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]
+        for job in expired:
+            del _jobs[job["id"]]
+
+    for job in expired:
+        if os.path.exists(job["file_path"]):
+            os.unlink(job["file_path"])
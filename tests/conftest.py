@@ -0,0 +1,53 @@
+"""
+Shared fixtures. The tests run on the embedded SQLite backend
+(DB_BACKEND=sqlite), in a fresh database file per session, so no
+MySQL server is needed:
+
+    pip install pytest
+    python -m pytest
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Settings are read when backend modules are imported: set them first
+_DB_DIR = tempfile.mkdtemp(prefix="shg_test_")
+os.environ.update({
+    "DB_BACKEND": "sqlite",
+    "SQLITE_PATH": os.path.join(_DB_DIR, "test.db"),
+    "SLOW_QUERY_LOG": "",
+    "SMS_GATEWAY_URL": "http://127.0.0.1:9/",  # never the real gateway
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from backend import api, migrations
+from backend.auth import create_shg, get_shg_id
+from backend.db import transaction
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    migrations.migrate()
+    yield os.environ["SQLITE_PATH"]
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def shg():
+    """A new, empty SHG; returns its id"""
+    number = f"TEST-{time.time_ns()}"
+    create_shg(number, "Test SHG", "Testpur", number, "secret")
+    return get_shg_id(number)
+
+
+@pytest.fixture
+def members(shg):
+    """Three active members of `shg`; returns their ids"""
+    for i in range(3):
+        api.add_member(shg, f"Member{i}", "Test", f"900000000{i}")
+    with transaction() as cur:
+        cur.execute("SELECT id FROM members WHERE shg_id=%s ORDER BY id", (shg,))
+        return [row[0] for row in cur.fetchall()]
@@ -0,0 +1,40 @@
+from datetime import date
+from backend import api
+from backend.accrual import accrue, get_loan_accruals, accrual_rows
+from backend.missed import month_index, month_of
+
+AS_OF = date(2025, 6, 15)
+NOW = month_index(AS_OF)
+
+
+def _row(principal=10000, rate=2, loan_month=NOW - 3, repaid=0, repaid_month_sum=0, interest_paid=0):
+    return (1, 1, 1, principal, rate, loan_month, repaid, repaid_month_sum, interest_paid)
+
+
+def test_simple_interest():
+    result = accrual_rows(accrue([_row()], AS_OF))[0]
+    assert result["months"] == 3
+    assert result["interest_due"] == 600
+    assert result["next_interest"] == 200
+    assert result["next_payable"] == 800
+
+
+def test_principal_repayment_lowers_later_interest():
+    # 5000 repaid last month: 10000 x 3 - 5000 x 1 principal-months
+    row = _row(repaid=5000, repaid_month_sum=5000 * (NOW - 1), interest_paid=200)
+    result = accrual_rows(accrue([row], AS_OF))[0]
+    assert result["interest_due"] == 500
+    assert result["outstanding"] == 5000
+    assert result["arrears"] == 300
+    assert result["next_payable"] == 400
+
+
+def test_loans_from_the_database(shg, members):
+    year, month = month_of(month_index(date.today()) - 2)
+    loan_id = api.give_loan(shg, members[0], 10000, 2, entry_date=date(year, month, 10))
+    api.repay_loan(loan_id, 200, "interest")
+
+    result = accrual_rows(get_loan_accruals(shg))
+    assert [r["loan_id"] for r in result] == [loan_id]
+    assert result[0]["interest_due"] == 400
+    assert result[0]["arrears"] == 200
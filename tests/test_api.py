@@ -0,0 +1,66 @@
+from datetime import date
+import pytest
+from backend import api
+from backend.balances import verify_balances
+from backend.calculations import close_loan_if_paid
+from backend.db import transaction
+
+
+def _deposits(member_id, month, year):
+    with transaction() as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM deposits WHERE member_id=%s AND deposit_month=%s AND deposit_year=%s",
+            (member_id, month, year)
+        )
+        return cur.fetchone()[0]
+
+
+def test_bulk_deposits(shg, members):
+    batch = api.add_deposits_bulk(shg, [(m, 500) for m in members], 1, 2025)
+    assert batch["results"] == {m: "recorded" for m in members}
+    assert batch["balance"] == 1500
+    assert verify_balances(shg) == []
+
+
+def test_bulk_deposits_skip_recorded_months(shg, members):
+    api.add_deposit(shg, members[0], 500, 2, 2025)
+    batch = api.add_deposits_bulk(shg, [(m, 500) for m in members], 2, 2025)
+    assert batch["results"][members[0]] == "duplicate"
+    assert batch["results"][members[1]] == "recorded"
+    assert _deposits(members[0], 2, 2025) == 1
+    assert batch["balance"] == 1500
+
+
+def test_bulk_deposits_member_listed_twice(shg, members):
+    batch = api.add_deposits_bulk(shg, [(members[0], 500), (members[0], 700)], 3, 2025)
+    assert batch["results"] == {members[0]: "recorded"}
+    assert batch["repeated"] == [(members[0], 700)]
+    assert _deposits(members[0], 3, 2025) == 1
+    assert batch["balance"] == 500
+
+
+def test_repay_unknown_loan(shg, members):
+    with pytest.raises(ValueError, match="Unknown loan 999999"):
+        api.repay_loan(999999, 100, "interest")
+    with transaction() as cur:
+        cur.execute("SELECT COUNT(*) FROM loan_payments WHERE loan_id=999999")
+        assert cur.fetchone()[0] == 0
+
+
+def test_backdated_repayment_closes_loan_on_its_date(shg, members):
+    loan_id = api.give_loan(shg, members[0], 1000, 2, entry_date=date(2020, 1, 1), legacy=True)
+    assert api.repay_loan(loan_id, 1000, "principal", entry_date=date(2020, 3, 1), legacy=True)
+    with transaction() as cur:
+        cur.execute("SELECT status, closed_date FROM loans WHERE id=%s", (loan_id,))
+        assert cur.fetchone() == ("closed", date(2020, 3, 1))
+
+
+def test_close_loan_if_paid_takes_the_cursor_second(shg, members):
+    loan_id = api.give_loan(shg, members[0], 1000, 2)
+    with transaction() as cur:
+        cur.execute("""
+            INSERT INTO loan_payments (loan_id, amount, payment_type, payment_date)
+            VALUES (%s, 1000, 'principal', CURDATE())
+        """, (loan_id,))
+        # Sees the uncommitted payment: runs on this transaction's cursor
+        assert close_loan_if_paid(loan_id, cur)
@@ -0,0 +1,22 @@
+from backend.auth import member_login, president_login
+from backend.db import transaction
+
+
+def _shg_number(shg_id):
+    with transaction() as cur:
+        cur.execute("SELECT shg_number FROM shg_groups WHERE id=%s", (shg_id,))
+        return cur.fetchone()[0]
+
+
+def test_member_login(shg, members):
+    session = member_login(_shg_number(shg), "Member0", "Test", "9000000000")
+    assert session["shg_id"] == shg and session["member_id"] == members[0]
+    assert member_login(_shg_number(shg), "Member0", "Test", "1234567890") is None
+
+
+def test_inactive_shg_cannot_log_in(shg, members):
+    number = _shg_number(shg)
+    with transaction() as cur:
+        cur.execute("UPDATE shg_groups SET is_active=0 WHERE id=%s", (shg,))
+    assert member_login(number, "Member0", "Test", "9000000000") is None
+    assert president_login(number, number, "secret") is None
@@ -0,0 +1,73 @@
+from datetime import date
+from backend import api
+from backend.balances import (
+    get_balance, get_period_totals, get_period_totals_by_shg, rebuild_balances, verify_balances,
+)
+from backend.calculations import get_total_savings, get_total_loan_given, get_wallet_balance
+from backend.db import transaction
+
+
+def _ledger(shg, members):
+    api.add_deposits_bulk(shg, [(m, 500) for m in members], 1, 2025)
+    loan_id = api.give_loan(shg, members[0], 1000, 2)
+    api.repay_loan(loan_id, 20, "interest")
+    api.repay_loan(loan_id, 400, "principal")
+
+
+def test_counters_follow_ledger_writes(shg, members):
+    _ledger(shg, members)
+    assert get_balance(shg) == {
+        "total_savings": 1500,
+        "total_loan_given": 1000,
+        "principal_repaid": 400,
+        "interest_collected": 20,
+    }
+    assert get_total_savings(shg) == 1500
+    assert get_total_loan_given(shg) == 1000
+    assert get_wallet_balance(shg) == 500
+    assert verify_balances(shg) == []
+
+
+def test_rebuild_restores_counters(shg, members):
+    _ledger(shg, members)
+    with transaction() as cur:
+        cur.execute("UPDATE shg_balances SET total_savings = 0 WHERE shg_id=%s", (shg,))
+
+    assert verify_balances(shg) == [
+        {"shg_id": shg, "column": "total_savings", "expected": 1500, "stored": 0}
+    ]
+    assert rebuild_balances(shg) == 1
+    assert verify_balances(shg) == []
+    assert get_balance(shg)["total_savings"] == 1500
+
+
+def test_period_totals_from_the_monthly_rollup(shg, members):
+    # Deposits count in the month they are for, loans and payments in the month made
+    api.add_deposit(shg, members[0], 500, 1, 2024, entry_date=date(2024, 3, 5), legacy=True)
+    api.add_deposit(shg, members[1], 500, 2, 2024)
+    loan_id = api.give_loan(shg, members[0], 1000, 2, entry_date=date(2024, 2, 10), legacy=True)
+    api.repay_loan(loan_id, 20, "interest", entry_date=date(2024, 3, 10), legacy=True)
+    api.repay_loan(loan_id, 400, "principal", entry_date=date(2024, 4, 10), legacy=True)
+
+    assert get_period_totals(shg, date(2024, 1, 1), date(2024, 2, 29)) == {
+        "deposits": 1000, "loans_disbursed": 1000, "principal_repaid": 0, "interest_collected": 0,
+    }
+    # Whole months: any day of March counts all of it
+    assert get_period_totals(shg, date(2024, 3, 31), date(2024, 4, 1)) == {
+        "deposits": 0, "loans_disbursed": 0, "principal_repaid": 400, "interest_collected": 20,
+    }
+    by_shg = get_period_totals_by_shg(date(2024, 1, 1), date(2024, 12, 31))
+    assert by_shg[shg] == get_period_totals(shg, date(2024, 1, 1), date(2024, 12, 31))
+
+
+def test_rebuild_restores_the_monthly_rollup(shg, members):
+    api.add_deposit(shg, members[0], 500, 1, 2024)
+    with transaction() as cur:
+        cur.execute("DELETE FROM shg_monthly_totals WHERE shg_id=%s", (shg,))
+
+    assert verify_balances(shg) == [
+        {"shg_id": shg, "column": "2024-01 deposits", "expected": 500, "stored": 0}
+    ]
+    rebuild_balances(shg)
+    assert verify_balances(shg) == []
+    assert get_period_totals(shg, date(2024, 1, 1), date(2024, 1, 31))["deposits"] == 500
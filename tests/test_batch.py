@@ -0,0 +1,47 @@
+import zipfile
+from datetime import date
+import pytest
+from backend import api
+from backend.auth import admin_login
+from backend.db import transaction
+from backend.reports import build_all_report_data, build_report_data
+from pdf.batch import generate_batch, report_file_name
+
+PERIOD = (date(2025, 1, 1), date(2025, 1, 31))
+
+
+def test_all_reports_match_single_reports(shg, members):
+    api.add_deposits_bulk(shg, [(m, 500) for m in members], 1, 2025)
+    api.give_loan(shg, members[0], 1000, 2)
+
+    reports = {r.shg_id: r for r in build_all_report_data(*PERIOD)}
+    assert reports[shg] == build_report_data(shg, *PERIOD)
+
+
+def test_inactive_shgs_are_left_out(shg):
+    with transaction() as cur:
+        cur.execute("UPDATE shg_groups SET is_active=0 WHERE id=%s", (shg,))
+    assert shg not in {r.shg_id for r in build_all_report_data(*PERIOD)}
+
+
+def test_report_file_name(shg):
+    report = build_report_data(shg, *PERIOD)
+    assert report_file_name(report) == f"{report.shg_number}_Test_SHG.pdf"
+
+
+def test_admin_login():
+    with transaction() as cur:
+        cur.execute("INSERT INTO admins (username, password) VALUES ('root-test', 'pw')")
+    assert admin_login("root-test", "pw")
+    assert not admin_login("root-test", "wrong")
+
+
+def test_batch_archive(tmp_path, shg, members):
+    pytest.importorskip("reportlab")
+    path = tmp_path / "reports.zip"
+    stats = generate_batch(str(path), *PERIOD, workers=2)
+    assert stats["failed"] == 0 and stats["done"] == stats["total"]
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+    assert len(names) == stats["total"]
+    assert report_file_name(build_report_data(shg, *PERIOD)) in names
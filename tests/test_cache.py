@@ -0,0 +1,35 @@
+from backend import api
+from backend.auth import create_shg, get_shg_id
+from backend.cache import get_data_version, record_cache_call, record_cache_miss, get_cache_stats
+
+
+def test_every_write_bumps_the_data_version(shg, members):
+    loan_id = api.give_loan(shg, members[0], 1000, 2)
+    writes = [
+        lambda: api.add_deposit(shg, members[0], 500, 1, 2025),
+        lambda: api.add_deposits_bulk(shg, [(members[1], 500)], 1, 2025),
+        lambda: api.give_loan(shg, members[1], 1000, 2),
+        lambda: api.repay_loan(loan_id, 20, "interest"),
+        lambda: api.update_member(members[1], "Renamed", "Test", "9000000001", 600),
+        lambda: api.deactivate_member(members[2]),
+        lambda: api.activate_member(members[2]),
+    ]
+    for write in writes:
+        before = get_data_version(shg)
+        write()
+        assert get_data_version(shg) > before
+
+
+def test_writes_leave_other_shgs_alone(shg, members):
+    create_shg("TEST-OTHER-CACHE", "Other SHG", "Testpur", "TEST-OTHER-CACHE", "secret")
+    other = get_shg_id("TEST-OTHER-CACHE")
+    before = get_data_version(other)
+    api.add_deposit(shg, members[0], 500, 2, 2025)
+    assert get_data_version(other) == before
+
+
+def test_hit_rate():
+    for _ in range(4):
+        record_cache_call("test")
+    record_cache_miss("test")
+    assert get_cache_stats()["test"] == {"calls": 4, "misses": 1, "hit_rate": 0.75}
@@ -0,0 +1,22 @@
+import sys
+from backend.charts import donut_png, chart_stats
+
+
+def test_donut_is_cached_png():
+    donut_png.cache_clear()
+    png = donut_png(1500, 1000)
+    assert png.startswith(b"\x89PNG")
+    assert donut_png(1500, 1000) is png
+    stats = chart_stats()
+    assert (stats["hits"], stats["misses"], stats["cached"]) == (1, 1, 1)
+
+
+def test_donut_accepts_empty_and_negative_values():
+    assert donut_png(0, 0).startswith(b"\x89PNG")
+    assert donut_png(-200, 100).startswith(b"\x89PNG")
+
+
+def test_no_pyplot_figures():
+    donut_png(123, 45)
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    assert pyplot is None or pyplot.get_fignums() == []
@@ -0,0 +1,81 @@
+import gc
+import pytest
+from backend import db, querylog
+from backend.auth import create_shg, shg_exists
+from backend.db import ConnectionPool, transaction
+
+
+@pytest.fixture
+def small_pool():
+    """Swap in a two-connection pool that gives up waiting after 1s"""
+    previous = db._pool
+    db._pool = ConnectionPool(size=2, timeout=1, connect=querylog.instrumented(db._connect))
+    yield db._pool
+    db._pool = previous
+
+
+def test_failed_writes_return_their_connections(small_pool, shg):
+    create_shg("TEST-DUP-A", "A", "X", "dup_president", "pw")
+    for i in range(small_pool.size + 1):
+        with pytest.raises(Exception, match="UNIQUE"):
+            create_shg(f"TEST-DUP-B{i}", "B", "X", "dup_president", "pw")
+
+    assert small_pool.stats()["in_use"] == 0
+    assert shg_exists("TEST-DUP-A")
+
+
+def test_dropped_connection_is_released(small_pool, members):
+    conn = db.get_db_connection()
+    cur = conn.cursor()
+    cur.execute("UPDATE members SET monthly_deposit=600 WHERE id=%s", (members[0],))
+    cur.close()
+    del cur, conn  # never closed: the write is rolled back and the slot freed
+    gc.collect()
+
+    assert small_pool.stats()["in_use"] == 0
+    with transaction() as cur:  # the SQLite write lock is gone too
+        cur.execute("UPDATE members SET monthly_deposit=700 WHERE id=%s", (members[1],))
+        cur.execute("SELECT monthly_deposit FROM members WHERE id=%s", (members[0],))
+        assert cur.fetchone()[0] == 500
+
+
+class _FakeConnection:
+    in_transaction = False
+
+    def __init__(self, alive=True):
+        self.alive = alive
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("gone")
+
+    def close(self):
+        pass
+
+
+def test_dead_connection_is_replaced():
+    pool = ConnectionPool(size=1, timeout=1, connect=_FakeConnection)
+    dead = _FakeConnection(alive=False)
+    pool._opened = 1
+    pool._idle.put(dead)
+
+    conn = pool.acquire()
+    assert conn._conn is not dead and conn._conn.alive
+    assert pool.stats()["reconnects"] == 1
+    conn.close()
+
+
+def test_reconnect_never_hands_out_none():
+    pool = ConnectionPool(size=1, timeout=0.2, connect=_FakeConnection)
+    pool._opened = 1
+    pool._idle.put(_FakeConnection(alive=False))
+
+    discard = pool._discard
+
+    def discard_and_lose_the_slot(conn):
+        discard(conn)
+        pool._opened += 1  # another thread opens a connection in between
+
+    pool._discard = discard_and_lose_the_slot
+    with pytest.raises(TimeoutError):
+        pool.acquire()
@@ -0,0 +1,53 @@
+from datetime import date
+from backend.dialect import to_sqlite, is_write
+from backend.db import transaction
+
+
+def test_placeholders():
+    assert to_sqlite("SELECT id FROM members WHERE shg_id=%s AND status=%s") == \
+        "SELECT id FROM members WHERE shg_id=? AND status=?"
+
+
+def test_upsert():
+    sql = to_sqlite(
+        "INSERT INTO t (k, v) VALUES (%s, %s) ON DUPLICATE KEY UPDATE v = VALUES(v)"
+    )
+    assert sql == "INSERT INTO t (k, v) VALUES (?, ?) ON CONFLICT DO UPDATE SET v = excluded.v"
+
+
+def test_locking_read():
+    assert to_sqlite("SELECT id FROM loans WHERE id=%s FOR UPDATE").strip() == \
+        "SELECT id FROM loans WHERE id=?"
+    assert "SKIP" not in to_sqlite("SELECT id FROM sms_outbox FOR UPDATE SKIP LOCKED")
+
+
+def test_dates_and_if():
+    assert to_sqlite("SELECT CURDATE()") == "SELECT date('now', 'localtime')"
+    assert to_sqlite("SELECT NOW() - INTERVAL %s SECOND") == \
+        "SELECT datetime('now', 'localtime', '-' || ? || ' seconds')"
+    assert to_sqlite("SELECT IF(a, 1, 2)") == "SELECT IIF(a, 1, 2)"
+
+
+def test_backdated_timestamps_are_stored_as_datetimes():
+    assert to_sqlite("VALUES (%s, IFNULL(%s, CURRENT_TIMESTAMP))") == \
+        "VALUES (?, IFNULL(datetime(?), datetime('now', 'localtime')))"
+    with transaction() as cur:
+        cur.execute("SELECT IFNULL(%s, CURRENT_TIMESTAMP)", (date(2020, 1, 1),))
+        assert cur.fetchone()[0] == "2020-01-01 00:00:00"
+
+
+def test_is_write():
+    assert not is_write("SELECT 1")
+    assert not is_write("  WITH x AS (SELECT 1) SELECT * FROM x")
+    assert is_write("SELECT id FROM loans FOR UPDATE")
+    assert is_write("INSERT INTO t VALUES (1)")
+    assert is_write("UPDATE t SET a=1")
+
+
+def test_registered_functions():
+    with transaction() as cur:
+        cur.execute(
+            "SELECT YEAR(%s), MONTH(%s), LEAST(3, 1, 2), GREATEST(1, NULL), IFNULL(NULL, 5)",
+            (date(2024, 7, 9), date(2024, 7, 9))
+        )
+        assert cur.fetchone() == (2024, 7, 1, None, 5)
@@ -0,0 +1,108 @@
+import pytest
+from backend.db import transaction
+from backend.history import get_history
+from backend.importer import import_ledger
+
+HEADER = "date,type,first_name,last_name,mobile,amount,interest_rate,payment_type,loan_ref,month,year\n"
+ROWS = [
+    "2023-01-05,deposit,Member0,Test,,500,,,,,",
+    "2023-01-05,deposit,Member1,Test,,500,,,,,",
+    "2023-01-10,loan,Member0,Test,,5000,2,,L1,,",
+    "05/02/2023,deposit,Member0,Test,,500,,,,,",
+    "2023-02-15,repayment,Member0,Test,,100,,interest,L1,,",
+    "2023-03-15,repayment,Member0,Test,,5000,,principal,L1,,",
+    "2023-03-15,deposit,Nobody,Here,,500,,,,,",
+]
+
+
+def _ledger(tmp_path, rows=ROWS):
+    path = tmp_path / "register.csv"
+    path.write_text(HEADER + "\n".join(rows) + "\n")
+    return str(path)
+
+
+def _counts(shg_id):
+    with transaction() as cur:
+        cur.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM deposits WHERE shg_id=%s),
+                (SELECT COUNT(*) FROM loans WHERE shg_id=%s AND status='closed'),
+                (SELECT COUNT(*) FROM loan_payments p JOIN loans l ON l.id = p.loan_id
+                 WHERE l.shg_id=%s),
+                (SELECT COUNT(*) FROM transactions WHERE shg_id=%s AND is_legacy)
+        """, (shg_id,) * 4)
+        return cur.fetchone()
+
+
+def test_import(tmp_path, shg, members):
+    stats = import_ledger(shg, _ledger(tmp_path), batch_size=2)
+    assert (stats["deposit"], stats["loan"], stats["repayment"]) == (3, 1, 2)
+    assert stats["error_count"] == 1 and stats["errors"][0][0] == 7
+    # deposits, closed loans, payments, passbook entries
+    assert _counts(shg) == (3, 1, 2, 6)
+
+
+def test_history_pages_through_imported_entries(tmp_path, shg, members):
+    # Several entries per day: the cursor must move past each of them
+    import_ledger(shg, _ledger(tmp_path), batch_size=10)
+    ids, cursor = [], None
+    for _ in range(10):
+        page = get_history(shg, cursor=cursor, limit=1)
+        ids += [row["id"] for row in page.rows]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(ids) == len(set(ids)) == 6
+
+
+def test_resume_after_interruption(tmp_path, shg, members):
+    path = _ledger(tmp_path)
+
+    def stop_after_two_batches(rows_done, stats):
+        if rows_done == 4:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_ledger(shg, path, batch_size=2, progress=stop_after_two_batches)
+    assert _counts(shg) == (3, 0, 0, 4)
+
+    stats = import_ledger(shg, path, batch_size=2)
+    assert stats["resumed_from"] == 4
+    assert stats["rows"] == 3
+    assert stats["repayment"] == 2  # found the loan written by the first run
+    assert _counts(shg) == (3, 1, 2, 6)
+
+    again = import_ledger(shg, path, batch_size=2)
+    assert again["rows"] == 0
+    assert _counts(shg) == (3, 1, 2, 6)
+
+
+def test_passbook_references_the_payments(tmp_path, shg, members):
+    import_ledger(shg, _ledger(tmp_path), batch_size=10)
+    with transaction() as cur:
+        cur.execute("""
+            SELECT t.amount, p.amount, p.payment_type
+            FROM transactions t
+            JOIN loan_payments p ON p.id = t.reference_id
+            WHERE t.shg_id=%s AND t.txn_type='loan_payment'
+            ORDER BY t.id
+        """, (shg,))
+        assert cur.fetchall() == [(100, 100, "interest"), (5000, 5000, "principal")]
+
+
+def test_repeated_loan_ref_is_rejected(tmp_path, shg, members):
+    rows = [
+        "2023-01-10,loan,Member0,Test,,5000,2,,L1,,",
+        "2023-01-11,loan,Member1,Test,,3000,2,,L1,,",
+        "2023-02-15,repayment,Member0,Test,,100,,interest,L1,,",
+    ]
+    stats = import_ledger(shg, _ledger(tmp_path, rows), batch_size=10)
+    assert stats["loan"] == 1 and stats["repayment"] == 1
+    assert stats["errors"] == [(2, "loan_ref 'L1' is already used by an earlier loan")]
+
+    with transaction() as cur:
+        cur.execute("""
+            SELECT l.member_id FROM loan_payments p JOIN loans l ON l.id = p.loan_id
+            WHERE l.shg_id=%s
+        """, (shg,))
+        assert cur.fetchall() == [(members[0],)]
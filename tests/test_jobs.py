@@ -0,0 +1,31 @@
+import time
+import zipfile
+from backend import api
+from pdf.jobs import submit_export_job, get_job
+
+
+def _wait(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_export_job(shg, members):
+    api.add_deposits_bulk(shg, [(m, 500) for m in members], 1, 2025)
+    job = _wait(submit_export_job(shg, "csv"))
+    assert job["status"] == "done", job["error"]
+    assert job["stats"]["rows"]["deposits"] == 3
+    assert job["progress"] == {"table": "transactions", "rows": 3}
+    with zipfile.ZipFile(job["file_path"]) as zf:
+        assert "deposits.csv.gz" in zf.namelist()
+
+
+def test_failed_job(shg):
+    job = _wait(submit_export_job(shg, "xml"))
+    assert job["status"] == "failed"
+    assert "xml" in job["error"]
+    assert job["stats"] is None
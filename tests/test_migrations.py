@@ -0,0 +1,38 @@
+from datetime import datetime
+from backend import migrations
+from backend.db import transaction
+from benchmarks.seed import seed_shg
+
+
+def test_all_migrations_recorded():
+    assert migrations.get_applied_versions() == {v for v, _, _ in migrations.MIGRATIONS}
+    assert migrations.migrate() == []
+
+
+def test_bare_entry_dates_become_timestamps(shg, members):
+    with transaction() as cur:
+        cur.execute("""
+            INSERT INTO transactions (shg_id, member_id, txn_type, amount, created_by, created_at)
+            VALUES (%s, %s, 'deposit', 500, 'president', '2020-01-01')
+        """, (shg, members[0]))
+        txn_id = cur.lastrowid
+        migrations._010_sqlite_entry_timestamps(cur)
+        cur.execute("SELECT created_at FROM transactions WHERE id=%s", (txn_id,))
+        assert cur.fetchone()[0] == datetime(2020, 1, 1)
+
+
+def test_hot_queries_use_indexes():
+    # Seeded, so the planner has real tables to choose plans for
+    shg_id = seed_shg(members=50, years=2)
+    report = migrations.explain_hot_queries(shg_id)
+    assert {r["query"] for r in report} == {name for name, _, _ in migrations.hot_queries(shg_id)}
+    assert [r for r in report if not r["ok"]] == []
+
+
+def test_full_index_scan_is_flagged(monkeypatch):
+    # Reads every member through an index, in index order: not a seek
+    monkeypatch.setattr(migrations, "hot_queries", lambda shg_id: [
+        ("all members", "SELECT shg_id FROM members ORDER BY shg_id, status", ()),
+    ])
+    report = migrations.explain_hot_queries(1)
+    assert [(r["type"], r["ok"]) for r in report] == [("SCAN", False)]
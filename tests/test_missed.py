@@ -0,0 +1,41 @@
+from datetime import date
+import numpy as np
+from backend import api
+from backend.db import transaction
+from backend.missed import MEMBER, DEPOSIT, STATUS, build_missed, find_missed_deposits, month_index, month_of
+
+
+def test_unpaid_months_are_missed():
+    calendar = np.array([
+        (MEMBER, 1, 100, 1, 500),
+        (DEPOSIT, 1, 100, 1, 500),
+        (DEPOSIT, 1, 102, 1, 500),
+    ])
+    missed = build_missed(calendar, last_month=103)
+    assert missed.months_for(1) == [month_of(101), month_of(103)]
+    assert missed.rows()[0]["amount_due"] == 1000
+
+
+def test_months_after_leaving_are_not_missed():
+    calendar = np.array([
+        (MEMBER, 1, 100, 0, 500),
+        (MEMBER, 2, 101, 1, 500),
+        (DEPOSIT, 1, 100, 1, 500),
+        (STATUS, 1, 102, 0, 1),  # left
+    ])
+    missed = build_missed(calendar, last_month=104)
+    assert missed.counts() == {1: 1, 2: 4}
+
+
+def test_find_missed_deposits(shg, members):
+    member_id = members[0]
+    current = month_index(date.today())
+    year, month = month_of(current - 3)
+    with transaction() as cur:
+        cur.execute("UPDATE members SET join_date=%s WHERE shg_id=%s",
+                    (date(year, month, 1), shg))
+    api.add_deposit(shg, member_id, 500, month, year)
+
+    missed = find_missed_deposits(shg)
+    assert missed.months_for(member_id) == [month_of(current - 2), month_of(current - 1)]
+    assert missed.counts()[members[1]] == 3
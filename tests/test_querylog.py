@@ -0,0 +1,39 @@
+from backend import querylog
+from backend.cache import get_data_version
+
+
+def test_fingerprint():
+    assert querylog.fingerprint(
+        "SELECT id FROM t WHERE id IN (%s, %s,%s) AND name='x'\n  LIMIT 10"
+    ) == "SELECT id FROM t WHERE id IN (...) AND name=? LIMIT ?"
+    assert querylog.fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)") == \
+        querylog.fingerprint("INSERT INTO t (a, b) VALUES (%s, %s)")
+
+
+def test_rerun_totals(shg):
+    querylog.start_rerun("test")
+    get_data_version(shg)
+    get_data_version(shg)
+    rerun = querylog.finish_rerun()
+    assert (rerun["queries"], rerun["connections"]) == (2, 2)
+    assert rerun["wall_ms"] is not None
+    assert querylog.finish_rerun() is None
+
+
+def test_interrupted_rerun(shg):
+    querylog.start_rerun("first")
+    get_data_version(shg)
+    querylog.start_rerun("second")  # the first never reached finish_rerun()
+    querylog.finish_rerun()
+
+    first = [r for r in querylog._reruns if r["page"] == "first"][-1]
+    assert first["wall_ms"] is None and first["queries"] == 1
+    assert "_t0" not in first
+
+
+def test_top_queries_name_the_caller(shg, members):  # members: the SHG has a balances row
+    querylog.reset_stats()
+    get_data_version(shg)
+    top = querylog.get_query_stats()[0]
+    assert top["caller"] == "backend.cache.get_data_version"
+    assert top["calls"] == 1 and top["rows"] == 1
@@ -0,0 +1,43 @@
+from datetime import date
+from backend import api
+from backend.reports import build_report_data
+
+
+def _ledger(shg, members):
+    api.add_deposits_bulk(shg, [(m, 500) for m in members], 1, 2025)
+    loan_id = api.give_loan(shg, members[0], 1000, 2)
+    api.repay_loan(loan_id, 20, "interest")
+    api.repay_loan(loan_id, 400, "principal")
+
+
+def test_report_data(shg, members):
+    _ledger(shg, members)
+    report = build_report_data(shg, date(2025, 1, 1), date(2025, 1, 31))
+
+    assert report.shg_name == "Test SHG" and report.village == "Testpur"
+    assert report.period_from == "01 Jan 2025"
+    assert {k: report.summary[k] for k in ("savings", "loan", "cash")} == \
+        {"savings": 1500, "loan": 1000, "cash": 500}
+    assert [
+        (r["name"], r["deposit"], r["loan"], r["repaid"], r["balance"], r["missed"])
+        for r in report.member_summary
+    ] == [
+        ("Member0 Test", 500, 1000, 400, 600, 0),
+        ("Member1 Test", 500, 0, 0, 0, 0),
+        ("Member2 Test", 500, 0, 0, 0, 0),
+    ]
+    assert [(l["name"], l["amount"], l["interest"], l["status"]) for l in report.loan_summary] == \
+        [("Member0 Test", 1000, 20, "active")]
+
+
+def test_text_period_has_no_totals(shg, members):
+    report = build_report_data(shg, "Jan 2025", "Mar 2025")
+    assert report.period_from == "Jan 2025"
+    assert report.summary["period"] is None
+
+
+def test_period_totals_in_the_report(shg, members):
+    _ledger(shg, members)
+    report = build_report_data(shg, date(2025, 1, 1), date(2025, 1, 31))
+    assert report.summary["period"]["deposits"] == 1500
+    assert report.summary["period"]["loans_disbursed"] == 0  # given this month
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend import sms
+from backend.db import transaction
+
+
+@pytest.fixture
+def gateway():
+    """A local stand-in for the SMS gateway; returns (url, state)"""
+    state = {"status": 200, "delay": 0, "numbers": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(state["delay"])
+            state["numbers"].append(body["numbers"])
+            self.send_response(state["status"])
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def outbox(shg, members, monkeypatch):
+    """An empty outbox and no background dispatcher; returns the queued mobiles"""
+    monkeypatch.setattr(sms, "ensure_dispatcher", lambda: None)
+    with transaction() as cur:
+        cur.execute("DELETE FROM sms_outbox")
+    mobiles = [f"900000000{i}" for i in range(len(members))]
+    sms.enqueue_sms_many([(shg, m, mobile, "test") for m, mobile in zip(members, mobiles)])
+    return mobiles
+
+
+def _outbox():
+    with transaction() as cur:
+        cur.execute("SELECT mobile, status, attempts, next_attempt_at FROM sms_outbox ORDER BY id")
+        return cur.fetchall()
+
+
+def _make_due():
+    with transaction() as cur:
+        cur.execute("UPDATE sms_outbox SET next_attempt_at = NOW() - INTERVAL 1 SECOND")
+
+
+def test_enqueue_returns_before_sending(shg, members, gateway):
+    url, state = gateway
+    state["delay"] = 0.5  # a slow gateway
+    with transaction() as cur:
+        cur.execute("DELETE FROM sms_outbox")
+    sms.start_dispatcher(url, poll_interval=0.05)
+    try:
+        started = time.perf_counter()
+        sms.enqueue_sms_many([(shg, m, "9000000000", "test") for m in members])
+        assert time.perf_counter() - started < 0.5
+
+        deadline = time.time() + 10
+        while time.time() < deadline and any(row[1] != "sent" for row in _outbox()):
+            time.sleep(0.05)
+        assert [row[1] for row in _outbox()] == ["sent"] * 3
+    finally:
+        sms.stop_dispatcher()
+
+
+def test_drains_in_batches(gateway, outbox):
+    url, state = gateway
+    dispatcher = sms.SmsDispatcher(url, batch_size=2)
+    try:
+        assert dispatcher.drain_once() == 2
+        assert sorted(state["numbers"]) == outbox[:2]
+        assert dispatcher.drain_once() == 1
+        assert dispatcher.drain_once() == 0
+    finally:
+        dispatcher.stop()
+    assert sorted(state["numbers"]) == outbox
+    assert [(row[1], row[2]) for row in _outbox()] == [("sent", 1)] * 3
+
+
+def test_failed_send_backs_off(gateway, outbox):
+    url, state = gateway
+    state["status"] = 500
+    dispatcher = sms.SmsDispatcher(url, retry_delay=30, max_attempts=3)
+    try:
+        for attempts, delay in ((1, 30), (2, 60)):
+            assert dispatcher.drain_once() == 3
+            for _, status, tries, next_attempt_at in _outbox():
+                assert (status, tries) == ("pending", attempts)
+                wait = next_attempt_at - datetime.now()
+                assert timedelta(seconds=delay - 5) < wait <= timedelta(seconds=delay)
+            assert dispatcher.drain_once() == 0  # not due yet
+            _make_due()
+
+        assert dispatcher.drain_once() == 3
+    finally:
+        dispatcher.stop()
+    assert [(row[1], row[2]) for row in _outbox()] == [("failed", 3)] * 3
+    assert len(state["numbers"]) == 9
+
+
+def test_outcomes_logged_in_one_batch(shg, gateway, outbox, monkeypatch):
+    url, _ = gateway
+    calls = []
+    log_sms_many = sms.log_sms_many
+
+    def recording_log(rows, cur=None):
+        calls.append(list(rows))
+        log_sms_many(calls[-1], cur)
+
+    monkeypatch.setattr(sms, "log_sms_many", recording_log)
+    dispatcher = sms.SmsDispatcher(url)
+    try:
+        dispatcher.drain_once()
+    finally:
+        dispatcher.stop()
+
+    assert len(calls) == 1 and len(calls[0]) == 3
+    with transaction() as cur:
+        cur.execute("SELECT mobile, status FROM sms_logs WHERE shg_id=%s ORDER BY mobile", (shg,))
+        assert cur.fetchall() == [(mobile, "sent") for mobile in outbox]